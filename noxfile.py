@@ -29,3 +29,16 @@ def toml_sort(session):
 def test(session):
     # Not certain this is a good approach. But it currently works.
     session.run("pytest", "--cov=./src/crewcal", "tests/")
+
+
+@nox.session
+def benchmark(session):
+    # Saves the results in .benchmarks/ and fails when the mean time of a benchmark
+    # regresses by more than 25% compared to the previous saved run.
+    session.run(
+        "pytest",
+        "tests/test_011.py",
+        "--benchmark-autosave",
+        "--benchmark-compare",
+        "--benchmark-compare-fail=mean:25%",
+    )
@@ -0,0 +1,203 @@
+"""Reference table of airports, to fill in airport names and timezones locally.
+
+The LLM only needs to read the airport codes of a schedule: the name and timezone of
+each airport follow from its IATA code. A compact table of the airports crews fly to is
+shipped with crewcal (data/airports.tsv); it is read on first use and indexed by code.
+Airports missing from it can be added with a file in the same format, named by the
+CREWCAL_AIRPORTS environment variable.
+
+enrich_events() fills in names and replaces timezones of known airports in extracted
+events, so that a misspelled timezone from the LLM does not break calendar generation.
+Airports missing from the table can be passed in as well, for example as looked up by
+the LLM (see LLMAirports).
+"""
+
+import logging
+import os
+from collections.abc import Iterable, Iterator
+from functools import cache
+from pathlib import Path
+from typing import NamedTuple
+
+import pendulum
+from pendulum.tz.zoneinfo.exceptions import InvalidTimezone
+from pydantic import BaseModel, Field
+
+AIRPORTS_FILE = Path(__file__).parent / "data" / "airports.tsv"
+
+# The airport fields of an event: codes, names and timezones of each leg.
+_AIRPORT_FIELDS = (
+    ("departure_airport", "departure_airport_name", "departure_timezone"),
+    ("destination_airport", "destination_airport_name", "destination_timezone"),
+)
+
+
+class UnknownAirportError(LookupError):
+    """Raised when no valid timezone is found for airports of the schedule."""
+
+
+class Airport(NamedTuple):
+    """An airport of the reference table."""
+
+    code: str
+    name: str
+    timezone: str
+
+
+class LLMAirport(BaseModel):
+    """An airport missing from the airport table, as looked up by the LLM."""
+
+    code: str = Field(description="Three letter IATA code of the airport.")
+    name: str = Field(description="Name of the airport.")
+    timezone: str = Field(
+        description="IANA timezone of the airport, for example 'America/Toronto'."
+    )
+
+
+class LLMAirports(BaseModel):
+    """List of airports looked up by the LLM."""
+
+    airports: list[LLMAirport]
+
+    def by_code(self) -> dict[str, Airport]:
+        """The airports with a valid timezone by IATA code, as in airport_index()."""
+        return {
+            airport.code.strip().upper(): Airport(
+                airport.code.strip().upper(), airport.name, airport.timezone
+            )
+            for airport in self.airports
+            if is_valid_timezone(airport.timezone)
+        }
+
+
+def read_airports(filename: str | Path) -> Iterator[Airport]:
+    """Read an airport table: one airport per line, code, name and timezone separated by tabs.
+
+    Empty lines and lines starting with '#' are skipped.
+
+    Args:
+        filename (str | Path): The table.
+
+    Yields:
+        Airport: The airports, in file order.
+    """
+    with Path(filename).open(encoding="utf-8") as file:
+        for line in file:
+            if not line.strip() or line.startswith("#"):
+                continue
+            code, name, timezone = (field.strip() for field in line.split("\t"))
+            yield Airport(code.upper(), name, timezone)
+
+
+@cache
+def airport_index() -> dict[str, Airport]:
+    """The airports of the reference table by IATA code, read on first use.
+
+    Returns:
+        dict[str, Airport]: The airports.
+    """
+    index = {airport.code: airport for airport in read_airports(AIRPORTS_FILE)}
+    if os.environ.get("CREWCAL_AIRPORTS"):
+        index.update(
+            (airport.code, airport)
+            for airport in read_airports(os.environ["CREWCAL_AIRPORTS"])
+        )
+    return index
+
+
+def lookup_airport(code: str) -> Airport | None:
+    """Find an airport by IATA code.
+
+    Args:
+        code (str): The code, for example 'YYZ'.
+
+    Returns:
+        Airport: The airport, or None if it is not in the table.
+    """
+    return airport_index().get(code.strip().upper())
+
+
+@cache
+def is_valid_timezone(name: str) -> bool:
+    """Whether name is a timezone known to pendulum, for example 'America/Toronto'."""
+    try:
+        pendulum.timezone(name)
+    except (InvalidTimezone, ValueError):
+        return False
+    return True
+
+
+def unknown_airport_codes(events: Iterable[dict]) -> list[str]:
+    """Codes of the airports of events that are not in the airport table.
+
+    Args:
+        events (Iterable[dict]): The events, in crewcal json format.
+
+    Returns:
+        list[str]: The codes, upper case, in order of first appearance.
+    """
+    codes = (
+        code.strip().upper()
+        for event in events
+        for codes_field, _, _ in _AIRPORT_FIELDS
+        for code in event.get(codes_field) or []
+    )
+    return [code for code in dict.fromkeys(codes) if lookup_airport(code) is None]
+
+
+def enrich_event(event: dict, airports: dict[str, Airport] | None = None) -> dict:
+    """Fill in the airport names and timezones of an event from its airport codes.
+
+    Known airports get the timezone of the table, and their name unless the event has
+    one. Of unknown airports the name and timezone of the event are kept; an invalid
+    timezone is logged. Events without airport codes are returned as they are.
+
+    Args:
+        event (dict): The event, in crewcal json format, possibly without names and timezones.
+        airports (dict[str, Airport], optional): Airports missing from the table, by code.
+
+    Returns:
+        dict: The event with names and timezones, one for each airport code.
+    """
+    if not any(codes in event for codes, _, _ in _AIRPORT_FIELDS):
+        return event
+
+    enriched = dict(event)
+    for codes_field, names_field, zones_field in _AIRPORT_FIELDS:
+        codes = event.get(codes_field) or []
+        names = event.get(names_field) or []
+        zones = event.get(zones_field) or []
+        enriched_names = []
+        enriched_zones = []
+        for position, code in enumerate(codes):
+            name = names[position] if position < len(names) else ""
+            zone = zones[position] if position < len(zones) else ""
+            airport = lookup_airport(code) or (airports or {}).get(code.strip().upper())
+            if airport is not None:
+                name = name or airport.name
+                zone = airport.timezone
+            elif not is_valid_timezone(zone):
+                logging.warning(
+                    f"Airport '{code}' is not in the airport table and has no valid "
+                    f"timezone ('{zone}'); add it to the file named by CREWCAL_AIRPORTS."
+                )
+            enriched_names.append(name)
+            enriched_zones.append(zone)
+        enriched[names_field] = enriched_names
+        enriched[zones_field] = enriched_zones
+    return enriched
+
+
+def enrich_events(
+    events: Iterable[dict], airports: dict[str, Airport] | None = None
+) -> list[dict]:
+    """Fill in the airport names and timezones of events, see enrich_event().
+
+    Args:
+        events (Iterable[dict]): The events, in crewcal json format.
+        airports (dict[str, Airport], optional): Airports missing from the table, by code.
+
+    Returns:
+        list[dict]: The enriched events.
+    """
+    return [enrich_event(event, airports) for event in events]
@@ -0,0 +1,327 @@
+"""LLM backends used for the extraction.
+
+The backend provides the (langchain) chat model the extraction chains run on:
+- OpenAIBackend: OpenAI's API (the default).
+- OpenAICompatibleBackend: any server with an OpenAI compatible API, for example a local model server.
+- ReplayBackend: an offline, deterministic stand-in serving canned responses from a fixture file.
+  Useful in CI, for load tests and to measure crewcal's own overhead separately from model latency.
+"""
+
+import json
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.chat_models import ChatOpenAI
+from langchain.chat_models.base import BaseChatModel
+from langchain.pydantic_v1 import Field
+from langchain.schema import AIMessage, BaseMessage, ChatGeneration, ChatResult
+from langchain.schema.messages import AIMessageChunk
+from langchain.schema.output import ChatGenerationChunk
+
+from crewcal.compact import estimate_tokens
+
+DEFAULT_MODEL_NAME = "gpt-4o-mini-2024-07-18"
+# Deadline per LLM request; slower requests are abandoned and retried (see crewcal.resilience).
+DEFAULT_TIMEOUT_SECONDS = 120.0
+BACKEND_NAMES = ["openai", "local", "replay"]
+
+
+class LLMBackend(ABC):
+    """Provides the chat model used for the extraction."""
+
+    model_name: str = DEFAULT_MODEL_NAME
+
+    @abstractmethod
+    def chat_model(self) -> BaseChatModel:
+        """Create the chat model.
+
+        Returns:
+            BaseChatModel: The chat model.
+        """
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI's chat completion API.
+
+    The chat model, and with it the API client and its connection pool, is created once
+    and shared by all extractions using the backend. The client does not retry failed
+    requests itself; crewcal's RetryPolicy does.
+    """
+
+    timeout_seconds: float
+    _chat_model: BaseChatModel | None = None
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        """Sets up the backend for the given OpenAI model.
+
+        Args:
+            model_name (str, optional): OpenAI model name.
+            timeout_seconds (float, optional): Deadline for each request to the API.
+        """
+        self.model_name = model_name
+        self.timeout_seconds = timeout_seconds
+
+    def chat_model(self) -> BaseChatModel:
+        """Get the chat model, creating it on first use.
+
+        Returns:
+            BaseChatModel: The chat model.
+        """
+        if self._chat_model is None:
+            self._chat_model = self._create_chat_model()
+        return self._chat_model
+
+    def _create_chat_model(self) -> BaseChatModel:
+        return ChatOpenAI(
+            model_name=self.model_name,
+            temperature=0,
+            request_timeout=self.timeout_seconds,
+            max_retries=0,
+        )
+
+
+class OpenAICompatibleBackend(OpenAIBackend):
+    """A server with an OpenAI compatible API, for example a model served locally."""
+
+    base_url: str
+    api_key: str
+
+    def __init__(
+        self,
+        base_url: str,
+        model_name: str,
+        api_key: str = "not-needed",
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        """Sets up the backend for the given server and model.
+
+        Args:
+            base_url (str): Base url of the API, for example 'http://localhost:8000/v1'.
+            model_name (str): Model name as known to the server.
+            api_key (str, optional): API key, if the server requires one.
+            timeout_seconds (float, optional): Deadline for each request to the server.
+        """
+        super().__init__(model_name, timeout_seconds)
+        self.base_url = base_url
+        self.api_key = api_key
+
+    def _create_chat_model(self) -> BaseChatModel:
+        return ChatOpenAI(
+            model_name=self.model_name,
+            openai_api_base=self.base_url,
+            openai_api_key=self.api_key,
+            temperature=0,
+            request_timeout=self.timeout_seconds,
+            max_retries=0,
+        )
+
+
+def _token_usage(messages: list[BaseMessage], response: AIMessage) -> dict[str, int]:
+    """Estimated token usage of a replayed request, reported like OpenAI's API does."""
+    function_call = response.additional_kwargs.get("function_call")
+    completion = function_call["arguments"] if function_call else response.content
+    prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+    completion_tokens = estimate_tokens(completion)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that answers with canned responses instead of calling an LLM.
+
+    When a function call is requested, the arguments stored for that function name are returned.
+    Otherwise the stored content is returned. The token usage is estimated from the length of
+    the messages (see crewcal.compact.estimate_tokens()). Streamed responses arrive in pieces of
+    stream_chunk_size characters, with the latency spread over them.
+    """
+
+    function_arguments: dict[str, Any] = Field(default_factory=dict)
+    content: Any = ""
+    latency: float = 0.0
+    stream_chunk_size: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "crewcal-replay"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: CallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+
+        message = self._response(kwargs)
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": _token_usage(messages, message)},
+        )
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],  # noqa: ARG002
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: CallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._response(kwargs)
+        function_call = message.additional_kwargs.get("function_call")
+        text = function_call["arguments"] if function_call else message.content
+        size = max(1, self.stream_chunk_size)
+        pieces = [text[start : start + size] for start in range(0, len(text), size)]
+
+        for count, piece in enumerate(pieces or [""]):
+            if self.latency:
+                time.sleep(self.latency / max(1, len(pieces)))
+            if function_call:
+                # Like OpenAI, only the first piece of a function call holds its name.
+                delta = {"arguments": piece}
+                if not count:
+                    delta["name"] = function_call["name"]
+                chunk = AIMessageChunk(
+                    content="", additional_kwargs={"function_call": delta}
+                )
+            else:
+                chunk = AIMessageChunk(content=piece)
+            yield ChatGenerationChunk(message=chunk)
+
+    def _response(self, kwargs: dict[str, Any]) -> AIMessage:
+        """The canned response to a request with the given model arguments."""
+        function_name = (kwargs.get("function_call") or {}).get("name")
+        if function_name:
+            if function_name not in self.function_arguments:
+                msg = f"Replay fixture has no response for function '{function_name}'."
+                raise KeyError(msg)
+            arguments = self.function_arguments[function_name]
+            return AIMessage(
+                content="",
+                additional_kwargs={
+                    "function_call": {
+                        "name": function_name,
+                        "arguments": json.dumps(arguments),
+                    }
+                },
+            )
+
+        content = self.content
+        return AIMessage(
+            content=content if isinstance(content, str) else json.dumps(content)
+        )
+
+
+class ReplayBackend(LLMBackend):
+    """Offline, deterministic stand-in for an LLM, serving canned responses from a fixture.
+
+    The fixture is a json file such as:
+    {"functions": {"Schedule": {"events": [...]}}, "content": {"hotels": [...]}}
+
+    'functions' holds the function call arguments returned per function name (the schedule
+    extraction uses the 'Schedule' function); 'content' is returned for plain completions
+    (the hotel extraction).
+    """
+
+    fixture: dict
+    latency: float
+
+    def __init__(
+        self,
+        fixture: str | Path | dict | list,
+        latency: float = 0.0,
+        model_name: str = "",
+    ) -> None:
+        """Sets up the backend with the responses in fixture.
+
+        Args:
+            fixture (str | Path | dict | list): Path to the fixture file, or the fixture itself. A crewcal
+                json schedule file (as saved by 'crewcal extract --to-json'), or its list of events, can
+                be used as fixture too; the events are then returned by the schedule extraction.
+            latency (float, optional): Seconds to wait before each response, to simulate a real model.
+            model_name (str, optional): Name used in cache keys. Defaults to 'replay:<fixture file>'.
+        """
+        if isinstance(fixture, (dict, list)):
+            content = fixture
+            self.model_name = model_name or "replay"
+        else:
+            with Path(fixture).open("r") as infile:
+                content = json.load(infile)
+            self.model_name = model_name or f"replay:{Path(fixture).name}"
+
+        if isinstance(content, list):
+            content = {
+                "functions": {"Schedule": {"events": content}},
+                "content": {"hotels": []},
+            }
+
+        self.fixture = content
+        self.latency = latency
+
+    def chat_model(self) -> BaseChatModel:
+        """Create the chat model.
+
+        Returns:
+            BaseChatModel: The chat model.
+        """
+        return ReplayChatModel(
+            function_arguments=self.fixture.get("functions", {}),
+            content=self.fixture.get("content", ""),
+            latency=self.latency,
+        )
+
+
+def get_backend(
+    name: str = "openai",
+    model_name: str = "",
+    base_url: str = "",
+    api_key: str = "",
+    fixture: str = "",
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+) -> LLMBackend:
+    """Create a backend by name, for example from configuration or command line options.
+
+    Args:
+        name (str, optional): One of 'openai', 'local' (OpenAI compatible server) or 'replay'.
+        model_name (str, optional): Model name; defaults to crewcal's default OpenAI model.
+        base_url (str, optional): Base url of the OpenAI compatible server ('local' only).
+        api_key (str, optional): API key for the OpenAI compatible server ('local' only).
+        fixture (str, optional): Fixture file, or crewcal json schedule file ('replay' only).
+        timeout_seconds (float, optional): Deadline for each LLM request ('openai' and 'local').
+
+    Returns:
+        LLMBackend: The backend.
+    """
+    if name == "openai":
+        return OpenAIBackend(model_name or DEFAULT_MODEL_NAME, timeout_seconds)
+
+    if name == "local":
+        if not base_url:
+            msg = "The 'local' backend requires a base url."
+            raise ValueError(msg)
+        return OpenAICompatibleBackend(
+            base_url,
+            model_name or DEFAULT_MODEL_NAME,
+            api_key or "not-needed",
+            timeout_seconds,
+        )
+
+    if name == "replay":
+        if not fixture:
+            msg = "The 'replay' backend requires a fixture file."
+            raise ValueError(msg)
+        return ReplayBackend(fixture, model_name=model_name)
+
+    msg = f"Unknown LLM backend '{name}', expected one of {BACKEND_NAMES}."
+    raise ValueError(msg)
@@ -0,0 +1,200 @@
+"""Extract many crew schedules in one go.
+
+The LLM calls for the individual schedules are spread over a bounded pool of
+worker threads, so total run time scales with the concurrency limit rather than
+being the sum of all LLM latencies. Rate limited and timed out calls are retried with
+exponential backoff. A circuit breaker shared by all schedules of the run stops
+calling the LLM for a while when calls keep failing.
+"""
+
+import glob
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from crewcal.backends import LLMBackend
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.resilience import CircuitBreaker, RetryPolicy
+
+REPORT_FILE_NAME = "crewcal_batch_report.json"
+
+
+class BatchItem(BaseModel):
+    """Outcome of the extraction of a single schedule in a batch."""
+
+    source: str
+    target: str
+    status: str = "pending"  # one of: ok, skipped, failed
+    seconds: float = 0.0
+    error: str = ""
+
+
+class BatchReport(BaseModel):
+    """Summary of a batch extraction run."""
+
+    items: list[BatchItem]
+    concurrency: int
+    seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        """Number of schedules extracted successfully."""
+        return sum(item.status == "ok" for item in self.items)
+
+    @property
+    def failed(self) -> int:
+        """Number of schedules that could not be extracted."""
+        return sum(item.status == "failed" for item in self.items)
+
+
+def find_schedule_pdfs(source: str) -> list[Path]:
+    """Find the pdf schedules in a folder, or matching a glob pattern.
+
+    Args:
+        source (str): Folder containing pdf files, or a glob pattern such as 'rosters/*.pdf'.
+
+    Returns:
+        list[Path]: Sorted list of pdf files.
+    """
+    source_path = Path(source)
+    if source_path.is_dir():
+        paths = [*source_path.glob("*.pdf"), *source_path.glob("*.PDF")]
+    else:
+        matches = glob.glob(source, recursive=True)  # noqa: PTH207
+        paths = [Path(name) for name in matches]
+
+    return sorted({path for path in paths if path.is_file()})
+
+
+def _extract_one(
+    item: BatchItem,
+    to_json: bool,
+    use_cache: bool,
+    retry_policy: RetryPolicy,
+    backend: LLMBackend | None,
+) -> BatchItem:
+    """Extract a single schedule.
+
+    The schedule is extracted once: OpenAISchedule retries its failed LLM calls itself, per
+    the retry policy, and only the failed chunks.
+    """
+    target = {"to_json_file" if to_json else "to_icalendar_file": item.target}
+    started = time.perf_counter()
+    try:
+        sched = OpenAISchedule(
+            item.source,
+            use_cache=use_cache,
+            backend=backend,
+            retry_policy=retry_policy,
+            **target,
+        )
+    except Exception as e:
+        item.error = str(e)
+    else:
+        if sched.failed_chunks:
+            # The target is written, but with the duties of these chunks missing.
+            item.error = (
+                f"The LLM failed on chunk(s) {sched.failed_chunks}; duties are missing."
+            )
+    if item.error:
+        logging.warning(f"Error extracting '{item.source}': {item.error}")
+    item.status = "failed" if item.error else "ok"
+
+    item.seconds = time.perf_counter() - started
+    return item
+
+
+def extract_batch(
+    sources: Iterable[str | Path],
+    target_folder: str | Path,
+    to_json: bool = False,
+    overwrite: bool = False,
+    concurrency: int = 4,
+    max_retries: int = 5,
+    backoff_seconds: float = 2.0,
+    use_cache: bool = True,
+    backend: LLMBackend | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> BatchReport:
+    """Extract a number of pdf schedules concurrently.
+
+    Each schedule is saved in the target folder under its own name with an .ics (or .json)
+    suffix. Schedules that would be saved under the same name (such as 'a/roster.pdf' and
+    'b/roster.PDF') are not extracted but failed, so that none overwrites another. A
+    summary report is saved in the same folder as crewcal_batch_report.json.
+
+    Sample use:
+    - report = extract_batch(find_schedule_pdfs("rosters"), "calendars", concurrency=8)
+
+    Args:
+        sources (Iterable[str | Path]): The pdf schedules.
+        target_folder (str | Path): Folder for the extracted schedules and report.
+        to_json (bool, optional): Save to crewcal json format instead of iCalendar.
+        overwrite (bool, optional): Overwrite existing target files; otherwise these are skipped.
+        concurrency (int, optional): Maximum number of simultaneous LLM calls.
+        max_retries (int, optional): Retries per LLM call when the LLM fails transiently.
+        backoff_seconds (float, optional): Initial delay for the exponential backoff.
+        use_cache (bool, optional): Reuse earlier LLM results for identical input.
+        backend (LLMBackend, optional): The LLM backend. Defaults to OpenAI.
+        retry_policy (RetryPolicy, optional): Retry policy shared by all schedules; overrides
+            max_retries and backoff_seconds. Defaults to a policy with a circuit breaker.
+
+    Returns:
+        BatchReport: Outcome per schedule.
+    """
+    target_path = Path(target_folder)
+    target_path.mkdir(parents=True, exist_ok=True)
+    retry_policy = retry_policy or RetryPolicy(
+        max_retries=max_retries,
+        backoff_seconds=backoff_seconds,
+        circuit_breaker=CircuitBreaker(),
+    )
+    suffix = ".json" if to_json else ".ics"
+
+    items = []
+    # The sources of each target name; compared case-insensitively, as file systems may be.
+    sources_by_name: dict[str, list[str]] = defaultdict(list)
+    for source in sources:
+        target = target_path / Path(source).with_suffix(suffix).name
+        item = BatchItem(source=str(source), target=str(target))
+        sources_by_name[target.name.casefold()].append(item.source)
+        items.append(item)
+
+    for item in items:
+        same_name = sources_by_name[Path(item.target).name.casefold()]
+        if len(same_name) > 1:
+            item.status = "failed"
+            item.error = f"Schedules {same_name} would be saved as the same file."
+            logging.warning(f"Error extracting '{item.source}': {item.error}")
+        elif Path(item.target).is_file() and not overwrite:
+            item.status = "skipped"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [
+            executor.submit(
+                _extract_one,
+                item,
+                to_json,
+                use_cache,
+                retry_policy,
+                backend,
+            )
+            for item in items
+            if item.status == "pending"
+        ]
+        for future in futures:
+            future.result()
+
+    report = BatchReport(
+        items=items, concurrency=concurrency, seconds=time.perf_counter() - started
+    )
+    with (target_path / REPORT_FILE_NAME).open("w") as outfile:
+        outfile.write(report.model_dump_json(indent=2))
+
+    return report
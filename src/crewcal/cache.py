@@ -0,0 +1,157 @@
+"""Persistent on-disk cache for LLM extraction results.
+
+Extraction results are stored as JSON files, one per entry, in a cache folder.
+Entries are content-addressed: the key is a hash of everything that determines
+the LLM response (document text, prompt template, model name and function schema).
+Re-running the same schedule therefore costs nothing once it has been extracted.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+
+def default_cache_dir() -> Path:
+    """Return the default cache folder.
+
+    Uses the CREWCAL_CACHE_DIR environment variable if set, otherwise a crewcal
+    folder in XDG_CACHE_HOME (defaulting to ~/.cache).
+
+    Returns:
+        Path: The cache folder.
+    """
+    if os.environ.get("CREWCAL_CACHE_DIR"):
+        return Path(os.environ["CREWCAL_CACHE_DIR"])
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "crewcal"
+
+
+class ExtractionCache:
+    """Content-addressed cache of LLM extraction results with size and age based eviction."""
+
+    directory: Path
+    max_entries: int
+    max_bytes: int
+    max_age_seconds: float
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        max_entries: int = 512,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_age_days: float = 30,
+    ) -> None:
+        """Sets up the cache in the given folder.
+
+        Args:
+            directory (str | Path, optional): Cache folder. Defaults to default_cache_dir().
+            max_entries (int, optional): Maximum number of entries kept.
+            max_bytes (int, optional): Maximum total size of all entries in bytes.
+            max_age_days (float, optional): Entries not used for longer than this are dropped.
+        """
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Create a cache key from the parts that determine an extraction result.
+
+        Args:
+            *parts (str): For example document text, prompt template, model name, function schema.
+
+        Returns:
+            str: Hex digest identifying the combination of parts.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = part.encode("utf-8")
+            # Length prefix so that ("ab", "c") and ("a", "bc") do not collide.
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Any:  # noqa: ANN401
+        """Return the cached value for key, or None if absent or expired.
+
+        Args:
+            key (str): Cache key, see make_key().
+
+        Returns:
+            Any: The cached (JSON compatible) value.
+        """
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            with path.open("r") as infile:
+                value = json.load(infile)
+        except (OSError, ValueError):
+            return None
+
+        # Touch the entry so that eviction is least-recently-used.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return value
+
+    def set(self, key: str, value: object) -> None:
+        """Store a JSON compatible value under key and evict old entries if needed.
+
+        Args:
+            key (str): Cache key, see make_key().
+            value (object): JSON compatible value.
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("w") as outfile:
+                json.dump(value, outfile)
+            tmp_path.replace(path)
+        except OSError as e:
+            logging.warning(f"Could not write to extraction cache: {e}")
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then the least recently used ones until within the size limits."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort(reverse=True)
+        total_bytes = 0
+        for count, (_, size, path) in enumerate(entries, start=1):
+            total_bytes += size
+            if count > self.max_entries or total_bytes > self.max_bytes:
+                path.unlink(missing_ok=True)
+
+    def purge(self) -> int:
+        """Remove all entries from the cache.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
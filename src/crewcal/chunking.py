@@ -0,0 +1,98 @@
+"""Split a long schedule document into chunks that can be extracted in parallel.
+
+Chunks follow page boundaries, adjusted so that a duty continuing at the top of a
+page stays with the page on which it started. The 'Hotel Information' section is
+appended to every chunk, because the LLM uses it to fill in the hotel of each duty.
+"""
+
+import re
+from collections.abc import Iterable
+
+HOTEL_SECTION_HEADER = "Hotel Information"
+
+# Duties start with their date, for example '31/10/2023 Tue' or '2023-10-31'.
+_DUTY_START = re.compile(r"^\s*(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})\b")
+
+
+def split_hotel_section(text: str) -> tuple[str, str]:
+    """Separate the 'Hotel Information' section from the rest of a schedule document.
+
+    The section runs from its header up to the end of the document.
+
+    Args:
+        text (str): Schedule document text.
+
+    Returns:
+        tuple[str, str]: The document without the hotel section, and the hotel section ('' if absent).
+    """
+    position = text.find(HOTEL_SECTION_HEADER)
+    if position < 0:
+        return text, ""
+    return text[:position], text[position:]
+
+
+def _split_continuation(page: str) -> tuple[str, str]:
+    """Split a page into the lines continuing the previous page's last duty and the remainder."""
+    lines = page.splitlines(keepends=True)
+    for count, line in enumerate(lines):
+        if _DUTY_START.match(line):
+            return "".join(lines[:count]), "".join(lines[count:])
+    return "", page
+
+
+def chunk_pages(pages: list[str], pages_per_chunk: int) -> list[str]:
+    """Group the pages of a schedule document into chunks for separate extraction.
+
+    Args:
+        pages (list[str]): Text of each page of the schedule.
+        pages_per_chunk (int): Number of pages per chunk. 0 (or less) keeps the document in one chunk.
+
+    Returns:
+        list[str]: The chunks, each followed by the hotel section of the document (if any).
+    """
+    document, hotel_section = split_hotel_section("".join(pages))
+    if pages_per_chunk <= 0 or len(pages) <= pages_per_chunk:
+        return [document + hotel_section] if document.strip() else []
+
+    # Remove the hotel section from the pages; it is added to every chunk instead.
+    remaining = len(document)
+    schedule_pages = []
+    for page in pages:
+        schedule_pages.append(page[:remaining])
+        remaining = max(0, remaining - len(page))
+
+    chunks = []
+    for start in range(0, len(schedule_pages), pages_per_chunk):
+        chunk = "".join(schedule_pages[start : start + pages_per_chunk])
+        if chunks:
+            continuation, chunk = _split_continuation(chunk)
+            chunks[-1] += continuation
+        chunks.append(chunk)
+
+    return [chunk + hotel_section for chunk in chunks if chunk.strip()]
+
+
+def merge_events(event_lists: Iterable[list[dict]]) -> list[dict]:
+    """Merge the events extracted from separate chunks.
+
+    Events are deduplicated on departure date, departure time and flight numbers;
+    the first occurrence is kept. The result is sorted by departure, so it does not
+    depend on the order in which chunks complete.
+
+    Args:
+        event_lists (Iterable[list[dict]]): The events (in crewcal json format) of each chunk.
+
+    Returns:
+        list[dict]: The merged events.
+    """
+    merged = {}
+    for events in event_lists:
+        for event in events:
+            key = (
+                event.get("starting_date", ""),
+                event.get("starting_time", ""),
+                tuple(event.get("duties", [])),
+            )
+            merged.setdefault(key, event)
+
+    return [merged[key] for key in sorted(merged)]
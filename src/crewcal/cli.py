@@ -1,16 +1,80 @@
 """Command Line  Interface for Crewcal, a tool that extracts flight data from an airline crew schedule."""
 
+import os
 import pathlib
+import sys
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
 
 import click
+from dotenv import find_dotenv, load_dotenv
 from halo import Halo
 
-from crewcal import schedule
-from crewcal.llm_extract import OpenAISchedule
+from crewcal.cache import ExtractionCache
+
+if TYPE_CHECKING:
+    from crewcal.metrics import MetricsHook
+
+# The LLM and pdf machinery (langchain, openai, pypdf) is slow to import, and so is the
+# calendar machinery to a lesser extent. These are imported inside the commands that
+# need them, so that '--help' and local commands such as 'convert' start fast.
+
+# The CREWCAL_* options may be set in a .env file in the working folder; it is read before
+# click parses the options.
+_ = load_dotenv(find_dotenv(usecwd=True))
 
 
 @click.group()
-def cli():
+@click.option(
+    "--backend",
+    type=click.Choice(["openai", "local", "replay"]),
+    default="openai",
+    show_default=True,
+    envvar="CREWCAL_LLM_BACKEND",
+    help="LLM backend: OpenAI, a local OpenAI compatible server, or offline replay of a fixture.",
+)
+@click.option(
+    "--model",
+    default="",
+    envvar="CREWCAL_LLM_MODEL",
+    help="Model name (defaults to crewcal's OpenAI model).",
+)
+@click.option(
+    "--base-url",
+    default="",
+    envvar="CREWCAL_LLM_BASE_URL",
+    help="Base url of the OpenAI compatible server ('local' backend).",
+)
+@click.option(
+    "--replay-fixture",
+    default="",
+    envvar="CREWCAL_REPLAY_FIXTURE",
+    help="Fixture with canned responses, or a crewcal json schedule ('replay' backend).",
+)
+@click.option(
+    "--timeout",
+    default=120.0,
+    show_default=True,
+    envvar="CREWCAL_LLM_TIMEOUT",
+    help="Seconds to wait for each LLM request; slower requests are retried.",
+)
+@click.option(
+    "--metrics",
+    default="",
+    envvar="CREWCAL_METRICS",
+    help="Append timing, token and cost metrics of each extraction as a JSON line to "
+    "this file ('-' for standard output).",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    backend: str,
+    model: str,
+    base_url: str,
+    replay_fixture: str,
+    timeout: float,
+    metrics: str,
+) -> None:
     """Crewcal is a tool that extracts flight data from an airline crew schedule.
 
     An LLM (Large Language Model) is used to extract data from the unstructured schedule
@@ -20,7 +84,127 @@ def cli():
     Note that the an environment variable named "OPENAI_API_KEY" must be set
     with your OpenAI API key. At present (november 2023) each 'extract' costs just
     under USD 0.01 (charged to your OpenAI account).
+
+    The backend options can also be set with environment variables CREWCAL_LLM_BACKEND,
+    CREWCAL_LLM_MODEL, CREWCAL_LLM_BASE_URL, CREWCAL_REPLAY_FIXTURE and
+    CREWCAL_LLM_TIMEOUT, also in a .env file in the working folder. An API key for a local
+    server is read from CREWCAL_LLM_API_KEY.
+    """
+    if metrics:
+        from crewcal.metrics import JsonLinesWriter, add_metrics_hook
+
+        hook = JsonLinesWriter(metrics)
+        add_metrics_hook(hook)
+        ctx.call_on_close(lambda: _remove_metrics_hook(hook))
+
+    ctx.obj = {
+        "name": backend,
+        "model_name": model,
+        "base_url": base_url,
+        "api_key": os.environ.get("CREWCAL_LLM_API_KEY", ""),
+        "fixture": replay_fixture,
+        "timeout_seconds": timeout,
+    }
+
+
+def _remove_metrics_hook(hook: "MetricsHook") -> None:
+    """Unregister the metrics hook of this invocation."""
+    from crewcal.metrics import remove_metrics_hook
+
+    remove_metrics_hook(hook)
+
+
+def _llm_backend():
+    """The LLM backend selected with the crewcal options."""
+    from crewcal.backends import get_backend
+
+    return get_backend(**(click.get_current_context().obj or {}))
+
+
+def _extract_streamed(
+    sched,  # noqa: ANN001
+    out_path: pathlib.Path,
+    to_json: bool,
+    hotel_folder: str,
+) -> None:
+    """Extract with streamed LLM responses, showing the duties as they arrive."""
+    with Halo(text="Waiting for the first duties.", spinner="dots") as spinner:
+        events = _show_progress(spinner, sched.stream_events())
+        if to_json:
+            for _ in events:
+                pass
+            sched.write_json(str(out_path))
+        else:
+            sched.stream_icalendar(str(out_path), events)
+        if hotel_folder:
+            sched.extract_hotels(pathlib.Path(hotel_folder))
+        sched.emit_metrics()
+        _report_layout(spinner, sched.metrics.layout)
+        spinner.info(f"Extracted schedule saved to {out_path}.")
+        if hotel_folder:
+            spinner.info(f"Extracted hotel information saved to {hotel_folder}.")
+
+
+def _extract_incremental(
+    sched,  # noqa: ANN001
+    out_path: pathlib.Path,
+    to_json: bool,
+    hotel_folder: str,
+) -> None:
+    """Re-extract only the pages changed since the previous extraction to out_path."""
+    from crewcal.incremental import manifest_path
+
+    with Halo(text="Re-extracting changed pages.", spinner="dots") as spinner:
+        sched.extract_incremental(
+            manifest_path(str(out_path)), to_file=str(out_path) if to_json else ""
+        )
+        if not to_json:
+            sched.write_icalendar(str(out_path))
+        if hotel_folder:
+            sched.extract_hotels(pathlib.Path(hotel_folder))
+        sched.emit_metrics()
+        _report_layout(spinner, sched.metrics.layout)
+        spinner.info(f"Extracted schedule saved to {out_path}.")
+        if hotel_folder:
+            spinner.info(f"Extracted hotel information saved to {hotel_folder}.")
+
+
+def _show_progress(spinner: Halo, events: Iterator[dict]) -> Iterator[dict]:
+    """Pass the events on, showing the number of duties and the latest one in the spinner."""
+    for count, event in enumerate(events, start=1):
+        spinner.text = (
+            f"{count} duties extracted, latest: "
+            f"{event.get('starting_date', '')} {event.get('summary', '')}"
+        )
+        yield event
+
+
+def _report_layout(spinner: Halo, layout: str) -> None:
+    """Tell whether the schedule was read by a layout parser or extracted by the LLM."""
+    if layout:
+        spinner.info(f"Schedule read as a known '{layout}' layout, without the LLM.")
+    else:
+        spinner.info("Schedule extracted by the LLM.")
+
+
+def _exit_on_missing_pages(failed_chunks: list[int], pages_per_chunk: int) -> None:
+    """Warn about the pages the LLM failed on, and exit with status 1, if there are any.
+
+    The warning is echoed rather than shown by the spinner, so it is seen in logs too.
     """
+    if not failed_chunks:
+        return
+    size = max(1, pages_per_chunk)
+    pages = [
+        str(page)
+        for chunk in failed_chunks
+        for page in range((chunk - 1) * size + 1, chunk * size + 1)
+    ]
+    click.echo(
+        f"The LLM failed on page(s) {', '.join(pages)}; their duties are missing.",
+        err=True,
+    )
+    sys.exit(1)
 
 
 @click.command
@@ -65,6 +249,8 @@ def convert(json: str, ical: str, overwrite: bool) -> int:
         )
         json_path = json_path_modified
 
+    from crewcal import schedule
+
     sched = schedule.Schedule.from_json(str(json_path))
     sched.to_icalendar_file(str(ical_path))
 
@@ -84,9 +270,76 @@ def convert(json: str, ical: str, overwrite: bool) -> int:
     is_flag=True,
     help="Overwrite the target file if it already exists.",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not use or store cached LLM results; always call the LLM.",
+)
+@click.option(
+    "--purge-cache",
+    is_flag=True,
+    help="Remove all cached LLM results before extracting.",
+)
+@click.option(
+    "--hotel-folder",
+    default="",
+    help="Also extract hotel contacts into vCard files in this folder (the pdf is read once).",
+)
+@click.option(
+    "--pages-per-chunk",
+    default=0,
+    show_default=True,
+    help="Extract long schedules in parallel chunks of this many pages (0: no chunking).",
+)
+@click.option(
+    "--incremental",
+    "-i",
+    is_flag=True,
+    help="Re-extract a reissued schedule: only pages changed since the previous extraction "
+    "to TARGETFILE are sent to the LLM. Implies --overwrite.",
+)
+@click.option(
+    "--slim",
+    is_flag=True,
+    help="Ask the LLM for airport codes only; airport names and timezones are filled in "
+    "from crewcal's airport table (fewer output tokens).",
+)
+@click.option(
+    "--layouts",
+    is_flag=True,
+    help="Read schedules with a registered layout parser (see crewcal.layouts) directly, "
+    "without the LLM; other schedules still go to the LLM. Experimental.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Remove page numbers and headers and footers repeated on every page from the text "
+    "sent to the LLM (fewer input tokens). Lines repeated at the top or bottom of every "
+    "page are kept only once.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Show the duties while the LLM generates them, and write each to the target file "
+    "as soon as it is complete. The schedule is sent in one request.",
+)
 @click.argument("sourcefile")
 @click.argument("targetfile")
-def extract(sourcefile: str, targetfile: str, to_json: bool, overwrite: bool) -> int:
+def extract(
+    sourcefile: str,
+    targetfile: str,
+    to_json: bool,
+    overwrite: bool,
+    no_cache: bool,
+    purge_cache: bool,
+    hotel_folder: str,
+    pages_per_chunk: int,
+    incremental: bool,
+    slim: bool,
+    layouts: bool,
+    compact: bool,
+    stream: bool,
+) -> int:
     """Extract schedule from pdf file and save to iCalendar format (or json).
 
     The saved json is in a format specific to crewcal. If saved to json,
@@ -100,10 +353,13 @@ def extract(sourcefile: str, targetfile: str, to_json: bool, overwrite: bool) ->
     out_path = pathlib.Path(targetfile)
     source_path = pathlib.Path(sourcefile)
 
-    if not (out_path.suffix):
-        out_path = out_path.with_suffix(".json" if to_json else ".ics")
+    out_path = (
+        out_path
+        if out_path.suffix
+        else out_path.with_suffix(".json" if to_json else ".ics")
+    )
 
-    if out_path.is_file() and not overwrite:
+    if out_path.is_file() and not (overwrite or incremental):
         click.echo(
             f"File '{out_path}' already exists. Consider using '--overwrite' option."
         )
@@ -120,6 +376,56 @@ def extract(sourcefile: str, targetfile: str, to_json: bool, overwrite: bool) ->
         )
         source_path = source_path_modified
 
+    if stream and incremental:
+        click.echo(
+            "Options '--stream' and '--incremental' cannot be combined.", err=True
+        )
+        sys.exit(1)
+
+    if pages_per_chunk and incremental:
+        click.echo(
+            "Options '--pages-per-chunk' and '--incremental' cannot be combined; "
+            "incremental extraction always sends the changed pages one by one.",
+            err=True,
+        )
+        sys.exit(1)
+
+    if purge_cache:
+        ExtractionCache().purge()
+
+    from crewcal.llm_extract import OpenAISchedule
+
+    if stream:
+        _extract_streamed(
+            OpenAISchedule(
+                schedule_path=str(source_path),
+                use_cache=not no_cache,
+                backend=_llm_backend(),
+                slim=slim,
+                layouts=layouts,
+                compact=compact,
+            ),
+            out_path,
+            to_json=to_json,
+            hotel_folder=hotel_folder,
+        )
+        return 0
+
+    if incremental:
+        sched = OpenAISchedule(
+            schedule_path=str(source_path),
+            use_cache=not no_cache,
+            backend=_llm_backend(),
+            slim=slim,
+            layouts=layouts,
+            compact=compact,
+        )
+        _extract_incremental(
+            sched, out_path, to_json=to_json, hotel_folder=hotel_folder
+        )
+        _exit_on_missing_pages(sched.failed_chunks, 1)
+        return 0
+
     with (
         Halo(text="Extracting schedule, saving to iCalendar format.", spinner="dots")
         if not to_json
@@ -127,16 +433,36 @@ def extract(sourcefile: str, targetfile: str, to_json: bool, overwrite: bool) ->
             text="Extracting schedule, saving to crewcal json format.", spinner="dots"
         )
     ) as spinner:
-        (
+        sched = (
             OpenAISchedule(
-                schedule_path=str(source_path), to_icalendar_file=str(out_path)
+                schedule_path=str(source_path),
+                to_icalendar_file=str(out_path),
+                to_hotel_folder=hotel_folder,
+                use_cache=not no_cache,
+                pages_per_chunk=pages_per_chunk,
+                backend=_llm_backend(),
+                slim=slim,
+                layouts=layouts,
+                compact=compact,
             )
             if not to_json
             else OpenAISchedule(
-                schedule_path=str(source_path), to_json_file=str(out_path)
+                schedule_path=str(source_path),
+                to_json_file=str(out_path),
+                to_hotel_folder=hotel_folder,
+                use_cache=not no_cache,
+                pages_per_chunk=pages_per_chunk,
+                backend=_llm_backend(),
+                slim=slim,
+                layouts=layouts,
+                compact=compact,
             )
         )
+        _report_layout(spinner, sched.metrics.layout)
         spinner.info(f"Extracted schedule saved to {out_path}.")
+        if hotel_folder:
+            spinner.info(f"Extracted hotel information saved to {hotel_folder}.")
+    _exit_on_missing_pages(sched.failed_chunks, pages_per_chunk)
 
     return 0
 
@@ -148,9 +474,25 @@ def extract(sourcefile: str, targetfile: str, to_json: bool, overwrite: bool) ->
     is_flag=True,
     help="Do not convert if target folder already exists.",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not use or store cached LLM results; always call the LLM.",
+)
+@click.option(
+    "--purge-cache",
+    is_flag=True,
+    help="Remove all cached LLM results before extracting.",
+)
 @click.argument("sourcefile")
 @click.argument("targetfolder")
-def hotels(sourcefile: str, targetfolder: str, nooverwrite: bool) -> int:
+def hotels(
+    sourcefile: str,
+    targetfolder: str,
+    nooverwrite: bool,
+    no_cache: bool,
+    purge_cache: bool,
+) -> int:
     """Extract hotel contact information from pdf schedule.
 
     A vCard file will be saved in the target folder for each hotel.
@@ -180,17 +522,383 @@ def hotels(sourcefile: str, targetfolder: str, nooverwrite: bool) -> int:
         )
         source_path = source_path_modified
 
+    if purge_cache:
+        ExtractionCache().purge()
+
+    from crewcal.llm_extract import OpenAISchedule
+
     with Halo(
         text="Extracting hotel contacts, saving to vCard format.", spinner="dots"
     ) as spinner:
-        (OpenAISchedule(schedule_path=str(source_path), to_hotel_folder=str(out_path)))
+        (
+            OpenAISchedule(
+                schedule_path=str(source_path),
+                to_hotel_folder=str(out_path),
+                use_cache=not no_cache,
+                backend=_llm_backend(),
+            )
+        )
         spinner.info(f"Extracted hotel information saved to {out_path}.")
     return 0
 
 
+@click.command
+@click.option(
+    "--to-json",
+    "-j",
+    is_flag=True,
+    help="Save to crewcal json schedule files (instead of Icalendar).",
+)
+@click.option(
+    "--overwrite",
+    "-o",
+    is_flag=True,
+    help="Overwrite target files that already exist (otherwise these are skipped).",
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    default=4,
+    show_default=True,
+    help="Maximum number of simultaneous LLM calls.",
+)
+@click.option(
+    "--max-retries",
+    default=5,
+    show_default=True,
+    help="Retries per LLM call when the LLM is rate limited, times out or fails.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not use or store cached LLM results; always call the LLM.",
+)
+@click.argument("source")
+@click.argument("targetfolder")
+def batch(
+    source: str,
+    targetfolder: str,
+    to_json: bool,
+    overwrite: bool,
+    concurrency: int,
+    max_retries: int,
+    no_cache: bool,
+) -> int:
+    """Extract all pdf schedules in a folder (or matching a pattern) concurrently.
+
+    Each schedule is saved in TARGETFOLDER with the same name and an .ics (or .json)
+    suffix. A summary report is saved as crewcal_batch_report.json.
+
+    \b
+    Args:
+        SOURCE (str): Folder with pdf files, or a quoted glob pattern such as 'rosters/*.pdf'.
+        TARGETFOLDER (str): Folder where the extracted schedules will be saved.
+    """  # noqa: D301
+    from crewcal.batch import REPORT_FILE_NAME, extract_batch, find_schedule_pdfs
+
+    sources = find_schedule_pdfs(source)
+    if not sources:
+        click.echo(f"No pdf files found for '{source}'.", err=True)
+        sys.exit(1)
+
+    with Halo(
+        text=f"Extracting {len(sources)} schedules, {concurrency} at a time.",
+        spinner="dots",
+    ) as spinner:
+        report = extract_batch(
+            sources,
+            targetfolder,
+            to_json=to_json,
+            overwrite=overwrite,
+            concurrency=concurrency,
+            max_retries=max_retries,
+            use_cache=not no_cache,
+            backend=_llm_backend(),
+        )
+        spinner.info(
+            f"{report.succeeded} extracted, {report.failed} failed, "
+            f"{len(report.items) - report.succeeded - report.failed} skipped "
+            f"in {report.seconds:.1f}s. Results saved to {targetfolder}."
+        )
+
+    if report.failed:
+        click.echo(
+            f"{report.failed} schedule(s) failed; see {REPORT_FILE_NAME} for the errors.",
+            err=True,
+        )
+        sys.exit(1)
+    return 0
+
+
+@click.command
+@click.option(
+    "--to-json",
+    "-j",
+    is_flag=True,
+    help="Save to crewcal json schedule file (instead of Icalendar).",
+)
+@click.option(
+    "--overwrite",
+    "-o",
+    is_flag=True,
+    help="Overwrite the target file if it already exists.",
+)
+@click.argument("targetfile")
+@click.argument("jsonfiles", nargs=-1, required=True)
+def merge(targetfile: str, jsonfiles: tuple, to_json: bool, overwrite: bool) -> int:
+    """Merge crewcal json schedule files into a single calendar.
+
+    Duties appearing in several schedules (same flight numbers and departure) are
+    included once, with the crew of all of them. Useful for a shared crew calendar.
+
+    \b
+    Args:
+        TARGETFILE (str): Path to iCalendar (or json) file.
+        JSONFILES (str): Paths to crewcal json schedule files.
+    """  # noqa: D301
+    out_path = pathlib.Path(targetfile)
+
+    if not (out_path.suffix):
+        out_path = out_path.with_suffix(".json" if to_json else ".ics")
+
+    if out_path.is_file() and not overwrite:
+        click.echo(
+            f"File '{out_path}' already exists. Consider using '--overwrite' option.",
+            err=True,
+        )
+        sys.exit(1)
+
+    missing = [
+        json_file for json_file in jsonfiles if not pathlib.Path(json_file).is_file()
+    ]
+    if missing:
+        click.echo(f"User specified file(s) not found: {', '.join(missing)}.", err=True)
+        sys.exit(1)
+
+    from crewcal.schedule import Schedule
+
+    merged = Schedule.merge(Schedule.from_json(json_file) for json_file in jsonfiles)
+    if to_json:
+        merged.to_json_file(str(out_path))
+    else:
+        merged.to_icalendar_file(str(out_path))
+    click.echo(
+        f"Merged {len(jsonfiles)} schedules into {len(merged.events)} events, "
+        f"saved to {out_path}."
+    )
+
+    return 0
+
+
+@click.command
+@click.option(
+    "--calendar",
+    default="",
+    help="Also save the complete new calendar, with updated sequence numbers, to this "
+    "iCalendar file; use it as OLDFILE next time.",
+)
+@click.option(
+    "--overwrite",
+    "-o",
+    is_flag=True,
+    help="Overwrite the target file if it already exists.",
+)
+@click.argument("oldfile")
+@click.argument("newfile")
+@click.argument("targetfile")
+def diff(
+    oldfile: str, newfile: str, targetfile: str, calendar: str, overwrite: bool
+) -> int:
+    """Save only the events that were added, changed or cancelled since a previous version.
+
+    Calendar clients apply these updates to the events they have (matched by UID), so
+    only the changes need to be synced. Changed and cancelled events get a higher
+    sequence number; cancelled events have status CANCELLED.
+
+    \b
+    Args:
+        OLDFILE (str): Previous version: crewcal json schedule or iCalendar file.
+        NEWFILE (str): New version: crewcal json schedule or iCalendar file.
+        TARGETFILE (str): Path to the iCalendar file with the updates.
+    """  # noqa: D301
+    out_path = pathlib.Path(targetfile)
+
+    if not (out_path.suffix):
+        out_path = out_path.with_suffix(".ics")
+
+    if out_path.is_file() and not overwrite:
+        click.echo(
+            f"File '{out_path}' already exists. Consider using '--overwrite' option.",
+            err=True,
+        )
+        sys.exit(1)
+
+    missing = [name for name in (oldfile, newfile) if not pathlib.Path(name).is_file()]
+    if missing:
+        click.echo(f"User specified file(s) not found: {', '.join(missing)}.", err=True)
+        sys.exit(1)
+
+    from crewcal.diff import diff_calendars, read_calendar_events, write_calendar_events
+
+    difference = diff_calendars(
+        read_calendar_events(oldfile), read_calendar_events(newfile)
+    )
+    with out_path.open("w") as outfile:
+        write_calendar_events(difference.updates, outfile)
+    if calendar:
+        with pathlib.Path(calendar).open("w") as outfile:
+            write_calendar_events(difference.calendar, outfile)
+    click.echo(f"{difference.summary()}. Updates saved to {out_path}.")
+
+    return 0
+
+
+@click.command
+@click.option(
+    "--to-json",
+    "-j",
+    is_flag=True,
+    help="Save to crewcal json schedule files (instead of Icalendar).",
+)
+@click.option(
+    "--concurrency",
+    "-c",
+    default=4,
+    show_default=True,
+    help="Maximum number of schedules extracted at the same time.",
+)
+@click.option(
+    "--settle-seconds",
+    default=2.0,
+    show_default=True,
+    help="Extract a file once it has not changed for this long (skips partial writes).",
+)
+@click.option(
+    "--poll-seconds",
+    default=2.0,
+    show_default=True,
+    help="Interval between checks of the folder.",
+)
+@click.option(
+    "--polling",
+    is_flag=True,
+    help="Scan the folder instead of using filesystem notifications.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not use or store cached LLM results; always call the LLM.",
+)
+@click.argument("sourcefolder")
+@click.argument("targetfolder")
+def watch(
+    sourcefolder: str,
+    targetfolder: str,
+    to_json: bool,
+    concurrency: int,
+    settle_seconds: float,
+    poll_seconds: float,
+    polling: bool,
+    no_cache: bool,
+) -> int:
+    """Watch a folder and extract the pdf schedules arriving in it.
+
+    New and modified pdf files are extracted into TARGETFOLDER (under their own name,
+    with an .ics or .json suffix). Files whose contents were extracted before are
+    skipped. Filesystem notifications are used if the 'watchdog' package is installed.
+
+    \b
+    Args:
+        SOURCEFOLDER (str): Folder to watch.
+        TARGETFOLDER (str): Folder for the extracted schedules.
+    """  # noqa: D301
+    if not pathlib.Path(sourcefolder).is_dir():
+        click.echo(f"User specified folder '{sourcefolder}' not found.", err=True)
+        sys.exit(1)
+
+    from crewcal.watch import FolderWatcher
+
+    watcher = FolderWatcher(
+        sourcefolder,
+        targetfolder,
+        to_json=to_json,
+        concurrency=concurrency,
+        poll_seconds=poll_seconds,
+        settle_seconds=settle_seconds,
+        use_cache=not no_cache,
+        backend=_llm_backend(),
+    )
+    click.echo(f"Watching {sourcefolder}; press Ctrl+C to stop.")
+    try:
+        watcher.run(notifications=not polling)
+    except KeyboardInterrupt:
+        click.echo("Stopped.")
+
+    return 0
+
+
+@click.command
+@click.option(
+    "--host", default="127.0.0.1", show_default=True, help="Address to listen on."
+)
+@click.option("--port", default=8765, show_default=True, help="Port to listen on.")
+@click.option(
+    "--workers",
+    "-w",
+    default=2,
+    show_default=True,
+    help="Number of schedules extracted at the same time.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not use or store cached LLM results; always call the LLM.",
+)
+def serve(host: str, port: int, workers: int, no_cache: bool) -> int:
+    """Run a local extraction service.
+
+    PDF schedules are uploaded with POST /jobs?format=ics|json|vcard (add &wait=1 to get
+    the result in the response). Otherwise poll GET /jobs/<id> and fetch the result
+    from GET /jobs/<id>/result. The LLM client and caches stay warm between jobs.
+    """
+    from crewcal.server import ExtractionService, make_server
+
+    service = ExtractionService(
+        backend=_llm_backend(), workers=workers, use_cache=not no_cache
+    )
+    server = make_server(service, host=host, port=port)
+    service.start()
+    click.echo(
+        f"Serving crewcal on http://{host}:{server.server_port} with {workers} workers."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("Stopping.")
+    finally:
+        server.server_close()
+        service.stop()
+
+    return 0
+
+
+@click.command
+def purge_cache() -> int:
+    """Remove all cached LLM extraction results."""
+    removed = ExtractionCache().purge()
+    click.echo(f"Removed {removed} cached extraction result(s).")
+    return 0
+
+
 cli.add_command(extract)
 cli.add_command(convert)
 cli.add_command(hotels)
+cli.add_command(batch)
+cli.add_command(merge)
+cli.add_command(diff)
+cli.add_command(watch)
+cli.add_command(serve)
+cli.add_command(purge_cache)
 
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,146 @@
+"""Compact schedule text before it is sent to the LLM.
+
+The text read from a roster PDF contains much that costs tokens without helping the
+extraction: runs of spaces from column alignment, the same page header and footer on
+every page, and page numbers. Compaction removes these deterministically, so identical
+PDFs still give identical prompts (and cache hits). The hotel extraction only needs the
+'Hotel Information' section, so it gets just that section when present.
+
+A line repeated verbatim at the top or bottom of (nearly) every page cannot be told apart
+from a page header by its text alone: a roster that ends every page with the same crew
+line loses the repeats. Compaction is therefore off unless asked for.
+"""
+
+import math
+import re
+from functools import cache
+from typing import TYPE_CHECKING
+
+from crewcal.chunking import split_hotel_section
+
+if TYPE_CHECKING:
+    import tiktoken
+
+# Number of lines at the top and at the bottom of a page that may be page furniture.
+FURNITURE_LINES = 3
+
+# Share of the pages a line must be repeated on, at the top or bottom, to be furniture.
+FURNITURE_SHARE = 0.9
+
+_PAGE_NUMBER = re.compile(r"page\s*\d+(\s*(of|/)\s*\d+)?", re.IGNORECASE)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of whitespace within lines and drop empty lines.
+
+    Args:
+        text (str): Text, for example of a PDF page.
+
+    Returns:
+        str: The text, each line followed by a newline.
+    """
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "".join(f"{line}\n" for line in lines if line)
+
+
+def _furniture_zone(lines: list[str]) -> range:
+    """Positions of the lines at the top and bottom of a page."""
+    if len(lines) <= 2 * FURNITURE_LINES:
+        return range(len(lines))
+    return range(-FURNITURE_LINES, FURNITURE_LINES)
+
+
+def strip_page_furniture(pages: list[str]) -> list[str]:
+    """Remove page numbers, and headers and footers repeated on (nearly) all pages.
+
+    A line repeated verbatim near the top or bottom of at least FURNITURE_SHARE of the
+    pages (and of at least two) is page furniture. It is kept on the first page it appears
+    on (a column header, for example, is still useful once) and removed from the others.
+    Page numbers are only recognised in the form 'Page 2' or 'Page 2 of 5'.
+
+    Args:
+        pages (list[str]): Text of each page, with normalized whitespace.
+
+    Returns:
+        list[str]: Text of each page without page furniture.
+    """
+    page_lines = [page.splitlines() for page in pages]
+    appearances: dict[str, int] = {}
+    for lines in page_lines:
+        zone = {lines[position] for position in _furniture_zone(lines)}
+        for line in zone:
+            appearances[line] = appearances.get(line, 0) + 1
+
+    threshold = max(2, math.ceil(FURNITURE_SHARE * len(pages)))
+    furniture = {line for line, count in appearances.items() if count >= threshold}
+
+    seen = set()
+    compacted = []
+    for lines in page_lines:
+        zone = {position % len(lines) for position in _furniture_zone(lines)}
+        kept = []
+        for position, line in enumerate(lines):
+            if position in zone:
+                if _PAGE_NUMBER.fullmatch(line) or line in seen:
+                    continue
+                if line in furniture:
+                    seen.add(line)
+            kept.append(line)
+        compacted.append("".join(f"{line}\n" for line in kept))
+    return compacted
+
+
+def compact_pages(pages: list[str]) -> list[str]:
+    """Compact the text of each page of a schedule for the LLM.
+
+    Args:
+        pages (list[str]): Text of each page, as read from the PDF.
+
+    Returns:
+        list[str]: The compacted text of each page.
+    """
+    return strip_page_furniture([normalize_whitespace(page) for page in pages])
+
+
+def hotel_document(pages: list[str]) -> str:
+    """The part of a (compacted) schedule that the hotel extraction needs.
+
+    Args:
+        pages (list[str]): Text of each page.
+
+    Returns:
+        str: The 'Hotel Information' section, or the whole document if it has none.
+    """
+    document, hotel_section = split_hotel_section("".join(pages))
+    return hotel_section or document
+
+
+@cache
+def _encoding(model_name: str) -> "tiktoken.Encoding | None":
+    """The tiktoken encoding of a model, or None if tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str, model_name: str = "") -> int:
+    """Number of tokens of text for an OpenAI model.
+
+    Exact if tiktoken is installed; otherwise estimated at four characters per token.
+
+    Args:
+        text (str): The text.
+        model_name (str, optional): Model name, for example 'gpt-4o-mini'.
+
+    Returns:
+        int: The number of tokens.
+    """
+    encoding = _encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
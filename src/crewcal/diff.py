@@ -0,0 +1,258 @@
+"""Differences between two versions of a calendar, for cheap subscriber sync.
+
+Events have stable UIDs (see Event.get_uid()), so two exports of a roster can be
+compared event by event. diff_calendars() finds the events that were added, changed or
+cancelled, and gives them the SEQUENCE number a calendar client expects: changed and
+cancelled events get the sequence of their previous version plus one. Only these events
+need to be sent to subscribers (or pushed to a CalDAV server), so sync traffic grows
+with the number of changes rather than with the size of the roster.
+
+The previous version may be a crewcal json schedule or an iCalendar file written by
+crewcal. Events are compared on their iCalendar representation.
+"""
+
+import hashlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TextIO
+
+from pydantic import BaseModel
+
+from crewcal.schedule import CALENDAR_CREATOR, Event, Schedule, calendar_frame
+
+# Properties that describe the version or state of an event rather than its contents.
+_VERSION_PROPERTIES = ("SEQUENCE", "STATUS", "DTSTAMP", "LAST-MODIFIED", "CREATED")
+
+
+def _property_name(line: str) -> str:
+    """Name of the property of a content line, for example 'SUMMARY'."""
+    end = min(
+        (position for position in (line.find(":"), line.find(";")) if position >= 0),
+        default=len(line),
+    )
+    return line[:end].upper()
+
+
+class CalendarEvent(BaseModel):
+    """An event of an iCalendar file, as its (unfolded) content lines."""
+
+    uid: str
+    lines: list[str]
+    sequence: int = 0
+
+    @staticmethod
+    def from_lines(lines: list[str]) -> "CalendarEvent":
+        """Create from the content lines of a VEVENT, from BEGIN:VEVENT up to END:VEVENT.
+
+        Args:
+            lines (list[str]): The unfolded content lines.
+
+        Returns:
+            CalendarEvent: The event.
+        """
+        uid = ""
+        sequence = 0
+        for line in lines:
+            name = _property_name(line)
+            if name == "UID":
+                uid = line.split(":", 1)[1]
+            elif name == "SEQUENCE":
+                sequence = int(line.split(":", 1)[1] or 0)
+        return CalendarEvent(uid=uid, lines=lines, sequence=sequence)
+
+    @staticmethod
+    def from_event(event: Event) -> "CalendarEvent":
+        """Create from a crewcal event.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            CalendarEvent: The event, as it is written to an iCalendar file.
+        """
+        return CalendarEvent.from_lines(
+            event.to_icalendar_event().serialize().split("\r\n")
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the contents of the event; the same for every version with the same contents."""
+        content = sorted(
+            line
+            for line in self.lines
+            if _property_name(line) not in _VERSION_PROPERTIES
+        )
+        return hashlib.sha256("\n".join(content).encode("utf-8")).hexdigest()
+
+    def with_version(self, sequence: int, status: str = "") -> "CalendarEvent":
+        """A copy of the event with another SEQUENCE number, and optionally STATUS.
+
+        Args:
+            sequence (int): The sequence number.
+            status (str, optional): The status, for example 'CANCELLED'. Defaults to the
+                status of this event.
+
+        Returns:
+            CalendarEvent: The copy.
+        """
+        removed = ("SEQUENCE", "STATUS") if status else ("SEQUENCE",)
+        lines = [line for line in self.lines if _property_name(line) not in removed]
+        extra = [f"SEQUENCE:{sequence}"] if sequence else []
+        if status:
+            extra.append(f"STATUS:{status}")
+        lines[-1:-1] = extra
+        return CalendarEvent(uid=self.uid, lines=lines, sequence=sequence)
+
+    def serialize(self) -> str:
+        """The VEVENT block of the event, as written to an iCalendar file."""
+        return "\r\n".join(self.lines)
+
+
+def parse_icalendar_events(text: str) -> list[CalendarEvent]:
+    """Read the events of an iCalendar file.
+
+    Only the VEVENT blocks are read, line by line, without interpreting the properties;
+    this is much faster than parsing the whole calendar.
+
+    Args:
+        text (str): Contents of the iCalendar file.
+
+    Returns:
+        list[CalendarEvent]: The events, in file order.
+    """
+    events = []
+    lines: list[str] | None = None
+    unfolded: list[str] = []
+    for raw_line in text.splitlines():
+        if raw_line[:1] in (" ", "\t") and unfolded:
+            # A folded line continues the previous one.
+            unfolded[-1] += raw_line[1:]
+        elif raw_line:
+            unfolded.append(raw_line)
+
+    for line in unfolded:
+        if line == "BEGIN:VEVENT":
+            lines = [line]
+        elif lines is not None:
+            lines.append(line)
+            if line == "END:VEVENT":
+                events.append(CalendarEvent.from_lines(lines))
+                lines = None
+    return events
+
+
+def read_calendar_events(filename: str | Path) -> list[CalendarEvent]:
+    """Read the events of a crewcal json schedule (.json) or of an iCalendar file.
+
+    Args:
+        filename (str | Path): The file.
+
+    Returns:
+        list[CalendarEvent]: The events.
+    """
+    path = Path(filename)
+    if path.suffix.lower() == ".json":
+        return [
+            CalendarEvent.from_event(event) for event in Schedule.from_json(path).events
+        ]
+    return parse_icalendar_events(path.read_text(encoding="utf-8"))
+
+
+class CalendarDiff(BaseModel):
+    """The events that changed between two versions of a calendar."""
+
+    added: list[CalendarEvent] = []
+    changed: list[CalendarEvent] = []
+    cancelled: list[CalendarEvent] = []
+    unchanged: list[CalendarEvent] = []
+
+    @property
+    def updates(self) -> list[CalendarEvent]:
+        """The events to send to subscribers: added, changed and cancelled."""
+        return [*self.added, *self.changed, *self.cancelled]
+
+    @property
+    def calendar(self) -> list[CalendarEvent]:
+        """All current events of the new version, with their sequence numbers.
+
+        Save these as the previous version for the next comparison.
+        """
+        return [*self.unchanged, *self.changed, *self.added]
+
+    def summary(self) -> str:
+        """Counts of added, changed, cancelled and unchanged events, for display."""
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.cancelled)} cancelled, {len(self.unchanged)} unchanged"
+        )
+
+
+def diff_calendars(
+    old: Iterable[CalendarEvent], new: Iterable[CalendarEvent | Event]
+) -> CalendarDiff:
+    """Compare two versions of a calendar.
+
+    Events are matched by UID in a hash index, so the time taken grows linearly with the
+    number of events. An event of the new version with different contents is changed, and
+    gets the sequence number of its old version plus one. An event of the old version that
+    is not in the new version is cancelled: it is kept with STATUS:CANCELLED and its
+    sequence number plus one, so that clients remove it.
+
+    Args:
+        old (Iterable[CalendarEvent]): The events of the previous version.
+        new (Iterable[CalendarEvent | Event]): The events of the new version.
+
+    Returns:
+        CalendarDiff: The differences.
+    """
+    previous: dict[str, CalendarEvent] = {event.uid: event for event in old}
+    difference = CalendarDiff()
+    seen = set()
+    for event in new:
+        if isinstance(event, Event):
+            event = CalendarEvent.from_event(event)
+        if event.uid in seen:
+            continue
+        seen.add(event.uid)
+
+        earlier = previous.get(event.uid)
+        if earlier is None:
+            difference.added.append(event)
+        elif earlier.fingerprint != event.fingerprint or _is_cancelled(earlier):
+            difference.changed.append(event.with_version(earlier.sequence + 1))
+        else:
+            difference.unchanged.append(event.with_version(earlier.sequence))
+
+    difference.cancelled = [
+        event.with_version(event.sequence + 1, status="CANCELLED")
+        for uid, event in previous.items()
+        if uid not in seen and not _is_cancelled(event)
+    ]
+    return difference
+
+
+def _is_cancelled(event: CalendarEvent) -> bool:
+    return "STATUS:CANCELLED" in event.lines
+
+
+def write_calendar_events(
+    events: Iterable[CalendarEvent], file: TextIO, creator: str = CALENDAR_CREATOR
+) -> int:
+    """Write events to an iCalendar file.
+
+    Args:
+        events (Iterable[CalendarEvent]): The events.
+        file (TextIO): Open file (or other text stream) to write to.
+        creator (str, optional): PRODID of the calendar.
+
+    Returns:
+        int: Number of characters written.
+    """
+    header, footer = calendar_frame(creator)
+    written = file.write(header)
+    for event in events:
+        written += file.write("\r\n")
+        written += file.write(event.serialize())
+    written += file.write("\r\n")
+    written += file.write(footer)
+    return written
@@ -0,0 +1,197 @@
+"""Local index of hotel contact cards, so that known hotels skip the LLM.
+
+Crews stay at the same few dozen layover hotels all year. The 'Hotel Information'
+section of a schedule is split into one entry per hotel, and each entry is looked up in
+an index of the vCards generated before. Only the hotels that are not in the index are
+sent to the LLM, in one request; their vCards are added to the index afterwards.
+
+Entries are keyed by their normalised text: name, address and phone number, without
+case, punctuation, dates and times (which differ between stays at the same hotel).
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from crewcal.cache import default_cache_dir
+from crewcal.chunking import HOTEL_SECTION_HEADER
+from crewcal.hotel import Hotel
+
+INDEX_FOLDER_NAME = "hotel-index"
+INDEX_FILE_NAME = "hotels.json"
+
+# Phone numbers such as '+351 21 319 8900' or '(416) 555-0100'; at least 8 digits, so
+# that postal codes and house numbers are not mistaken for one.
+_PHONE = re.compile(r"\+?\(?\d[\d\s().-]{5,}\d")
+_PHONE_DIGITS = 8
+# Dates and times of a stay, for example '31/10/2023', '2023-10-31' and '21:55'.
+_DATE_OR_TIME = re.compile(r"\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2}|\b\d{1,2}:\d{2}\b")
+_WORD = re.compile(r"[^\W_]+")
+# Index files are rewritten by whichever extraction finishes; one at a time.
+_write_lock = threading.Lock()
+
+
+def parse_hotel_entries(section: str) -> list[str]:
+    """Split the 'Hotel Information' section of a schedule into one entry per hotel.
+
+    An entry ends at the line with its phone number, so that a hotel spread over several
+    lines (name, address, phone) is one entry. Lines after the last phone number form a
+    last entry.
+
+    Args:
+        section (str): The hotel section, as given by split_hotel_section().
+
+    Returns:
+        list[str]: The text of each entry, lines separated by newlines.
+    """
+    entries = []
+    lines: list[str] = []
+    for line in section.splitlines():
+        line = line.strip()
+        if not line or line.startswith(HOTEL_SECTION_HEADER):
+            continue
+        lines.append(line)
+        if _has_phone(line):
+            entries.append("\n".join(lines))
+            lines = []
+    if lines:
+        entries.append("\n".join(lines))
+    return entries
+
+
+def _has_phone(line: str) -> bool:
+    return any(
+        len(_digits(match)) >= _PHONE_DIGITS
+        for match in _PHONE.findall(_DATE_OR_TIME.sub(" ", line))
+    )
+
+
+def hotel_key(entry: str) -> str:
+    """Key of a hotel entry in the index: its words, without case, punctuation, dates and times.
+
+    Args:
+        entry (str): The hotel entry.
+
+    Returns:
+        str: The key.
+    """
+    return " ".join(_WORD.findall(_DATE_OR_TIME.sub(" ", entry).casefold()))
+
+
+def _digits(text: str) -> str:
+    return re.sub(r"\D", "", text)
+
+
+def _vcard_values(hotel: Hotel, name: str) -> list[str]:
+    """The values of a property of the vCard of a hotel, for example 'TEL'."""
+    values = []
+    for line in hotel.hotel_contact.splitlines():
+        prefix, _, value = line.partition(":")
+        if prefix.split(";")[0].strip().upper() == name and value.strip():
+            values.append(value.strip())
+    return values
+
+
+def match_hotels(entries: list[str], hotels: list[Hotel]) -> dict[int, Hotel]:
+    """Find the entry each hotel (as generated by the LLM) was generated from.
+
+    A hotel matches the entry containing its phone number, or else the entry containing
+    all words of its name. A single hotel generated from a single entry matches it.
+
+    Args:
+        entries (list[str]): The hotel entries sent to the LLM.
+        hotels (list[Hotel]): The hotels returned by the LLM.
+
+    Returns:
+        dict[int, Hotel]: The hotel for each matched entry, by position of the entry.
+    """
+    if len(entries) == 1 and len(hotels) == 1:
+        return {0: hotels[0]}
+
+    entry_digits = [_digits(entry) for entry in entries]
+    entry_words = [set(hotel_key(entry).split()) for entry in entries]
+    matched: dict[int, Hotel] = {}
+    for hotel in hotels:
+        phones = [_digits(value)[-7:] for value in _vcard_values(hotel, "TEL")]
+        names = [set(hotel_key(value).split()) for value in _vcard_values(hotel, "FN")]
+        for position in range(len(entries)):
+            if position in matched:
+                continue
+            if any(
+                phone and phone in entry_digits[position] for phone in phones
+            ) or any(name and name <= entry_words[position] for name in names):
+                matched[position] = hotel
+                break
+    return matched
+
+
+def default_index_path() -> Path:
+    """Return the default location of the hotel index.
+
+    The index is kept in a folder of its own in the cache folder, so that it is not
+    evicted with the cached extraction results.
+
+    Returns:
+        Path: The index file.
+    """
+    return default_cache_dir() / INDEX_FOLDER_NAME / INDEX_FILE_NAME
+
+
+class HotelIndex(BaseModel):
+    """The vCards of known hotels, by hotel_key() of their entry in the schedule."""
+
+    hotels: dict[str, Hotel] = {}
+
+    @staticmethod
+    def from_file(filename: str | Path) -> "HotelIndex":
+        """Load an index from file. A missing or unreadable file gives an empty index.
+
+        Args:
+            filename (str | Path): The path of the index file.
+
+        Returns:
+            HotelIndex: The index.
+        """
+        try:
+            return HotelIndex.model_validate_json(Path(filename).read_text())
+        except (OSError, ValueError):
+            return HotelIndex()
+
+    def to_file(self, filename: str | Path) -> None:
+        """Save the index to file, adding the hotels saved there by others in the meantime.
+
+        Args:
+            filename (str | Path): The path of the index file.
+        """
+        path = Path(filename)
+        with _write_lock:
+            merged = HotelIndex.from_file(path).hotels
+            merged.update(self.hotels)
+            self.hotels = merged
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(self.model_dump_json(indent=2))
+            tmp_path.replace(path)
+
+    def lookup(self, entry: str) -> Hotel | None:
+        """Find a hotel entry in the index.
+
+        Args:
+            entry (str): The hotel entry, from parse_hotel_entries().
+
+        Returns:
+            Hotel: The hotel, or None if unknown.
+        """
+        return self.hotels.get(hotel_key(entry))
+
+    def add(self, entry: str, hotel: Hotel) -> None:
+        """Add a hotel to the index.
+
+        Args:
+            entry (str): The hotel entry the hotel was generated from.
+            hotel (Hotel): The hotel.
+        """
+        self.hotels[hotel_key(entry)] = hotel
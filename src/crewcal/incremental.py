@@ -0,0 +1,128 @@
+"""Remember which events were extracted from which page of a schedule.
+
+Airlines reissue the same roster many times with small changes. A page manifest
+records a fingerprint of each page together with the events extracted from it, so
+that a reissue only needs the changed pages to go to the LLM.
+
+The 'Hotel Information' section is sent along with every page, but is not part of the
+page fingerprints: a change in the section only invalidates the pages with duties to the
+airports of the changed hotel entries.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from crewcal.hotel_index import parse_hotel_entries
+
+
+def page_fingerprint(text: str) -> str:
+    """Fingerprint of the text of a page (or chunk) of a schedule.
+
+    Args:
+        text (str): Page text.
+
+    Returns:
+        str: Hex digest of the text, ignoring differences in whitespace.
+    """
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def hotel_fingerprint(events: list[dict], hotel_section: str) -> str:
+    """Fingerprint of the hotel entries that the events of a page may have been given.
+
+    Args:
+        events (list[dict]): The events extracted from the page.
+        hotel_section (str): The 'Hotel Information' section of the schedule.
+
+    Returns:
+        str: Hex digest of the hotel entries mentioning a destination airport of the events.
+    """
+    airports = {
+        airport for event in events for airport in event.get("destination_airport", [])
+    }
+    entries = [
+        entry
+        for entry in parse_hotel_entries(hotel_section)
+        if any(re.search(rf"\b{re.escape(airport)}\b", entry) for airport in airports)
+    ]
+    return page_fingerprint("\n".join(entries))
+
+
+class PageExtraction(BaseModel):
+    """The events extracted from a single page of a schedule."""
+
+    fingerprint: str
+    hotel_fingerprint: str = ""
+    events: list[dict]
+
+
+class PageManifest(BaseModel):
+    """The events extracted from each page of a schedule.
+
+    The extraction key identifies the prompt, model and schema used; a manifest created
+    with a different extraction key is not reused.
+    """
+
+    extraction_key: str = ""
+    pages: list[PageExtraction] = []
+
+    def events_by_fingerprint(
+        self, extraction_key: str, hotel_section: str = ""
+    ) -> dict[str, list[dict]]:
+        """Events per page fingerprint, if the manifest was created with extraction_key.
+
+        Pages whose hotel entries changed are left out, see hotel_fingerprint().
+
+        Args:
+            extraction_key (str): Identifies the prompt, model and schema of the current extraction.
+            hotel_section (str, optional): The 'Hotel Information' section of the current schedule.
+
+        Returns:
+            dict[str, list[dict]]: Events per page fingerprint; empty if the extraction key differs.
+        """
+        if extraction_key != self.extraction_key:
+            return {}
+        return {
+            page.fingerprint: page.events
+            for page in self.pages
+            if page.hotel_fingerprint == hotel_fingerprint(page.events, hotel_section)
+        }
+
+    @staticmethod
+    def from_file(filename: str) -> "PageManifest":
+        """Load a manifest from file. A missing or unreadable file gives an empty manifest.
+
+        Args:
+            filename (str): The path of the manifest file.
+
+        Returns:
+            PageManifest: The manifest.
+        """
+        try:
+            return PageManifest.model_validate_json(Path(filename).read_text())
+        except (OSError, ValueError):
+            return PageManifest()
+
+    def to_file(self, filename: str) -> None:
+        """Save the manifest to file.
+
+        Args:
+            filename (str): The path of the manifest file.
+        """
+        with Path(filename).open("w") as outfile:
+            outfile.write(self.model_dump_json(indent=2))
+
+
+def manifest_path(target_file: str) -> str:
+    """Path of the page manifest kept next to an extracted schedule file.
+
+    Args:
+        target_file (str): The extracted iCalendar or json file.
+
+    Returns:
+        str: The manifest path, for example 'schedule.ics.pages.json'.
+    """
+    return f"{target_file}.pages.json"
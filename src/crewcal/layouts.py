@@ -0,0 +1,114 @@
+"""Parsers for known roster layouts, to extract a schedule without the LLM.
+
+Most schedules are printed by a few crew management systems, each with a fixed layout
+of its duties. A layout parser recognises such a layout in the text of a schedule and
+reads the duties directly, in milliseconds. With layouts enabled, OpenAISchedule tries
+the registered parsers before the LLM, and falls back to the LLM when no parser
+recognises the schedule or the events of the parser are not valid.
+
+crewcal has no built-in parsers yet: a parser is only added once it has been checked
+against real rosters of its layout. Register one with register_layout_parser(), and
+enable layouts with OpenAISchedule(..., layouts=True) or crewcal extract --layouts.
+
+Parsers give events with airport codes only; the airport names and timezones are filled
+in from the airport table (see crewcal.airports).
+"""
+
+import logging
+from abc import ABC, abstractmethod
+
+from crewcal.airports import enrich_events, is_valid_timezone
+from crewcal.schedule import Event
+
+
+class LayoutParser(ABC):
+    """Recognises the layout of a schedule, and reads its duties into events."""
+
+    name: str = ""
+
+    @abstractmethod
+    def detect(self, text: str) -> bool:
+        """Whether the schedule looks like it has this layout; a quick check.
+
+        Args:
+            text (str): The text of the schedule.
+
+        Returns:
+            bool: True if parse() should be tried.
+        """
+
+    @abstractmethod
+    def parse(self, text: str) -> list[dict]:
+        """Read the events of a schedule with this layout.
+
+        Args:
+            text (str): The text of the schedule.
+
+        Raises:
+            ValueError: The schedule does not have this layout after all.
+
+        Returns:
+            list[dict]: The events in crewcal json format; airport names and timezones may
+                be left out.
+        """
+
+
+_parsers: list[LayoutParser] = []
+
+
+def register_layout_parser(parser: LayoutParser) -> None:
+    """Register a parser for a roster layout; it is tried before the ones registered earlier.
+
+    Args:
+        parser (LayoutParser): The parser.
+    """
+    _parsers.insert(0, parser)
+
+
+def remove_layout_parser(parser: LayoutParser) -> None:
+    """Unregister a parser registered with register_layout_parser().
+
+    Args:
+        parser (LayoutParser): The registered parser.
+    """
+    if parser in _parsers:
+        _parsers.remove(parser)
+
+
+def _validate(events: list[dict]) -> None:
+    """Raise ValueError unless there are events, all valid and with known timezones."""
+    if not events:
+        msg = "No duties found."
+        raise ValueError(msg)
+    for event in events:
+        Event.model_validate(event)
+        for zone in (*event["departure_timezone"], *event["destination_timezone"]):
+            if not is_valid_timezone(zone):
+                msg = f"No valid timezone for the airports of '{event['summary']}'."
+                raise ValueError(msg)
+
+
+def parse_known_layout(text: str) -> tuple[str, list[dict]] | None:
+    """Extract the events of a schedule with the first layout parser that recognises it.
+
+    A parser that fails, or gives invalid events, is skipped.
+
+    Args:
+        text (str): The text of the schedule, as read from the PDF.
+
+    Returns:
+        tuple[str, list[dict]]: The name of the parser and the events in crewcal json
+            format, or None if no parser recognises the schedule.
+    """
+    for parser in _parsers.copy():
+        if not parser.detect(text):
+            continue
+        try:
+            events = enrich_events(parser.parse(text))
+            _validate(events)
+        except ValueError as e:
+            # pydantic's ValidationError is a ValueError too.
+            logging.info(f"The '{parser.name}' layout parser does not apply: {e}")
+            continue
+        return parser.name, events
+    return None
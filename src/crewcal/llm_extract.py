@@ -6,24 +6,82 @@ to extract flight details in a structured format.
 As at nov 2023 about 0.75 US cents per call in OpenAI API costs.
 """
 
+import asyncio
 import json
 import logging
 import os
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Any
 
 import openai
 from dotenv import find_dotenv, load_dotenv
-from langchain.chat_models import ChatOpenAI
-from langchain.document_loaders import PyPDFLoader
+from langchain.callbacks import OpenAICallbackHandler, get_openai_callback
 from langchain.output_parsers import PydanticOutputParser
-from langchain.output_parsers.openai_functions import JsonKeyOutputFunctionsParser
 from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
+from langchain.schema import BaseMessage
+from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
 from langchain.utils.openai_functions import convert_pydantic_to_openai_function
+from pydantic import ValidationError
 
-from crewcal.hotel import Hotels
-from crewcal.llm_prompts import template_flight_schedule, template_hotel_contacts
-from crewcal.schedule import Schedule
+from crewcal.airports import (
+    Airport,
+    LLMAirports,
+    UnknownAirportError,
+    enrich_events,
+    unknown_airport_codes,
+)
+from crewcal.backends import LLMBackend, OpenAIBackend
+from crewcal.cache import ExtractionCache
+from crewcal.chunking import (
+    HOTEL_SECTION_HEADER,
+    chunk_pages,
+    merge_events,
+    split_hotel_section,
+)
+from crewcal.compact import compact_pages, estimate_tokens, hotel_document
+from crewcal.hotel import Hotel, Hotels
+from crewcal.hotel_index import (
+    HotelIndex,
+    default_index_path,
+    hotel_key,
+    match_hotels,
+    parse_hotel_entries,
+)
+from crewcal.incremental import (
+    PageExtraction,
+    PageManifest,
+    hotel_fingerprint,
+    page_fingerprint,
+)
+from crewcal.layouts import parse_known_layout
+from crewcal.llm_prompts import (
+    template_airports,
+    template_event_repair,
+    template_flight_schedule,
+    template_flight_schedule_slim,
+    template_hotel_contacts,
+)
+from crewcal.metrics import ExtractionMetrics, emit_metrics
+from crewcal.pdf_text import read_pdf_pages
+from crewcal.resilience import (
+    CircuitOpenError,
+    PartialExtractionError,
+    RetryPolicy,
+    parse_function_call_events,
+)
+from crewcal.schedule import (
+    Event,
+    JsonArrayParser,
+    Schedule,
+    SlimEvent,
+    SlimSchedule,
+    iter_json_array,
+    write_icalendar_file,
+)
 
 _ = load_dotenv(find_dotenv())
 try:
@@ -32,6 +90,18 @@ except KeyError:
     logging.warning("WARNING - Environment variable OPENAI_API_KEY should be set.")
 
 
+def _function_call_arguments(message: BaseMessage) -> str:
+    """The piece of the function call arguments in a chunk of a streamed LLM response."""
+    function_call = message.additional_kwargs.get("function_call") or {}
+    return function_call.get("arguments") or ""
+
+
+def _log_cost_warning() -> None:
+    logging.warning(
+        "WARNING - This script costs ~0.75 US cents per call in OpenAI API costs (GPT-3.5)."
+    )
+
+
 class OpenAISchedule:
     """Extracts flight data from an airline crew schedule provided in PDF format.
 
@@ -42,6 +112,18 @@ class OpenAISchedule:
     extracted_schedule: str = ""
     extracted_hotels: Hotels
     llm_model_name: str = "gpt-4o-mini-2024-07-18"
+    max_concurrency: int = 4
+    pages_per_chunk: int = 0
+    compact: bool = False
+    slim: bool = False
+    layouts: bool = False
+    backend: LLMBackend
+    cache: ExtractionCache | None
+    metrics: ExtractionMetrics
+    retry_policy: RetryPolicy
+    hotel_index_file: str = ""
+    # Numbers (from 1) of the chunks the LLM failed on; their duties are missing.
+    failed_chunks: list[int]
 
     def __init__(
         self,
@@ -49,6 +131,13 @@ class OpenAISchedule:
         to_json_file: str = "",
         to_icalendar_file: str = "",
         to_hotel_folder: str = "",
+        use_cache: bool = True,
+        pages_per_chunk: int = 0,
+        backend: LLMBackend | None = None,
+        compact: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        slim: bool = False,
+        layouts: bool = False,
     ) -> None:
         """Sets up the object using the provided schedule_path. Additionally, it allows for an optional to_file path where the schedule can be extracted.
 
@@ -68,75 +157,802 @@ class OpenAISchedule:
 
         - sched = OpenAISchedule("schedule.pdf", to_icalendar_file="schedule.ics") - to extract data from a PDF file and save it to a JSON file
 
+        - sched = OpenAISchedule("schedule.pdf", to_icalendar_file="schedule.ics", to_hotel_folder="hotels") - to extract
+          both schedule and hotels; the PDF is read once and both LLM requests run in parallel
+
         Parameters:
             schedule_path (str): The path to the schedule PDF file.
             to_json_file (str, optional): The path to the file where the schedule will be extracted.
             to_icalendar_file (str, optional): The path to the file where the iCalendar representation of the schedule will be saved.
             to_hotel_folder (str, optional): The folder where hotel contact info cards will be saved.
+            use_cache (bool, optional): Reuse earlier LLM results for identical input. Defaults to True.
+            pages_per_chunk (int, optional): Extract long schedules in parallel chunks of this many pages. Defaults to 0 (no chunking).
+            backend (LLMBackend, optional): The LLM backend. Defaults to OpenAI with llm_model_name.
+            compact (bool, optional): Remove page furniture and whitespace runs from the text sent to the LLM (see crewcal.compact). Defaults to False.
+            retry_policy (RetryPolicy, optional): Retries of failed LLM calls. Defaults to up to 5 retries with exponential backoff.
+            slim (bool, optional): Ask the LLM for airport codes only; names and timezones are filled in from the airport table. Defaults to False.
+            layouts (bool, optional): Read schedules with a known layout directly, without the LLM (see crewcal.layouts). Defaults to False.
 
         Returns:
             None
         """
         self.schedule_path = schedule_path
+        self.backend = backend or OpenAIBackend(self.llm_model_name)
+        self.llm_model_name = self.backend.model_name
+        self.cache = ExtractionCache() if use_cache else None
+        self.hotel_index_file = str(default_index_path()) if use_cache else ""
+        self.pages_per_chunk = pages_per_chunk
+        self.compact = compact
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.slim = slim
+        self.layouts = layouts
+        self.metrics = ExtractionMetrics(source=schedule_path, started_at=time.time())
+        self.failed_chunks = []
+        self._pages = {}
+        # Airports missing from the airport table, as looked up by the LLM in slim mode.
+        self._llm_airports: dict[str, Airport] = {}
 
-        if to_json_file:
-            self.extract(to_json_file)
+        if to_hotel_folder and (to_json_file or to_icalendar_file):
+            self.extract_all(
+                Path(to_hotel_folder),
+                to_json_file=to_json_file,
+                to_icalendar_file=to_icalendar_file,
+            )
+        else:
+            if to_json_file:
+                self.extract(to_json_file)
 
-        if to_icalendar_file:
-            if not self.extracted_schedule:
-                self.extract()
-            self.write_icalendar(to_icalendar_file)
+            if to_icalendar_file:
+                if not self.extracted_schedule:
+                    self.extract()
+                self.write_icalendar(to_icalendar_file)
+
+            if to_hotel_folder:
+                self.extract_hotels(Path(to_hotel_folder))
+
+        if to_json_file or to_icalendar_file or to_hotel_folder:
+            self.emit_metrics()
+
+    @classmethod
+    async def acreate(
+        cls,
+        schedule_path: str,
+        to_json_file: str = "",
+        to_icalendar_file: str = "",
+        to_hotel_folder: str = "",
+        use_cache: bool = True,
+        pages_per_chunk: int = 0,
+        backend: LLMBackend | None = None,
+        compact: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        slim: bool = False,
+        layouts: bool = False,
+    ) -> "OpenAISchedule":
+        """Asynchronous counterpart of the constructor.
+
+        Sets up the object and performs the requested extractions without blocking the event loop.
+
+        Sample use:
+        - sched = await OpenAISchedule.acreate("schedule.pdf", to_icalendar_file="schedule.ics")
 
-        if to_hotel_folder:
-            self.extract_hotels(Path(to_hotel_folder))
+        Parameters:
+            schedule_path (str): The path to the schedule PDF file.
+            to_json_file (str, optional): The path to the file where the schedule will be extracted.
+            to_icalendar_file (str, optional): The path to the file where the iCalendar representation of the schedule will be saved.
+            to_hotel_folder (str, optional): The folder where hotel contact info cards will be saved.
+            use_cache (bool, optional): Reuse earlier LLM results for identical input. Defaults to True.
+            pages_per_chunk (int, optional): Extract long schedules in parallel chunks of this many pages. Defaults to 0 (no chunking).
+            backend (LLMBackend, optional): The LLM backend. Defaults to OpenAI with llm_model_name.
+            compact (bool, optional): Remove page furniture and whitespace runs from the text sent to the LLM (see crewcal.compact). Defaults to False.
+            retry_policy (RetryPolicy, optional): Retries of failed LLM calls. Defaults to up to 5 retries with exponential backoff.
+            slim (bool, optional): Ask the LLM for airport codes only; names and timezones are filled in from the airport table. Defaults to False.
+            layouts (bool, optional): Read schedules with a known layout directly, without the LLM (see crewcal.layouts). Defaults to False.
+
+        Returns:
+            OpenAISchedule: The new object.
+        """
+        new_schedule = cls(
+            schedule_path,
+            use_cache=use_cache,
+            pages_per_chunk=pages_per_chunk,
+            backend=backend,
+            compact=compact,
+            retry_policy=retry_policy,
+            slim=slim,
+            layouts=layouts,
+        )
+
+        if to_hotel_folder and (to_json_file or to_icalendar_file):
+            await new_schedule.aextract_all(
+                Path(to_hotel_folder),
+                to_json_file=to_json_file,
+                to_icalendar_file=to_icalendar_file,
+            )
+        else:
+            if to_json_file:
+                await new_schedule.aextract(to_json_file)
+
+            if to_icalendar_file:
+                if not new_schedule.extracted_schedule:
+                    await new_schedule.aextract()
+                new_schedule.write_icalendar(to_icalendar_file)
+
+            if to_hotel_folder:
+                await new_schedule.aextract_hotels(Path(to_hotel_folder))
+
+        if to_json_file or to_icalendar_file or to_hotel_folder:
+            new_schedule.emit_metrics()
+
+        return new_schedule
 
     def extract(self, to_file: str = "") -> None:
         """Uses LLM to extract event data from a schedule PDF file and optionally saves it to a JSON file.
 
+        With layouts set, schedules with a known layout are read without the LLM, see crewcal.layouts. When
+        pages_per_chunk is set, long schedules are split into chunks of pages that are
+        extracted in parallel; the events of all chunks are merged afterwards.
+
         Parameters:
             to_file (str, optional): The path to the output JSON file. If not provided, the extracted data will not be saved.
 
         Returns:
             None
         """
-        full_sched_doc = self.read_schedule_pdf(self.schedule_path)
+        chunks = [] if self._read_known_layout() else self._schedule_chunks()
 
-        if full_sched_doc:
-            model = ChatOpenAI(model_name=self.llm_model_name, temperature=0)
-            prompt = ChatPromptTemplate.from_messages(
-                [("system", template_flight_schedule), ("human", "{input}")]
-            )
+        if chunks:
+            results = self._cached_schedule_results(chunks)
+            self._extract_pending(chunks, results)
+            self.extracted_schedule = self._combine_schedule_results(results)
+            self.metrics.events = len(self.extracted_schedule)
+
+        if to_file:
+            self.write_json(to_file)
+
+    def extract_incremental(self, manifest_file: str, to_file: str = "") -> None:
+        """Re-extracts a reissued schedule, sending only new or changed pages to the LLM.
+
+        The schedule is extracted page by page. The manifest file records the events extracted
+        from each page; events of pages that did not change since the previous extraction are
+        reused. The manifest is created if it does not exist, and updated afterwards. With layouts
+        set, schedules with a known layout are read directly, see crewcal.layouts.
+
+        Sample use:
+        - sched = OpenAISchedule("reissued.pdf")
+        - sched.extract_incremental("schedule.ics.pages.json")
+        - sched.write_icalendar("schedule.ics")
+
+        Parameters:
+            manifest_file (str): The path to the page manifest of the previous extraction.
+            to_file (str, optional): The path to the output JSON file. If not provided, the extracted data will not be saved.
+
+        Returns:
+            None
+        """
+        if self._read_known_layout():
+            if to_file:
+                self.write_json(to_file)
+            return
+
+        pages = self._prompt_pages()
+        chunks = chunk_pages(pages, 1)
+        hotel_section = split_hotel_section("".join(pages))[1]
+        # Identifies prompt, model and schema; pages extracted otherwise are not reused.
+        extraction_key = self._schedule_cache_key("")
+        known = PageManifest.from_file(manifest_file).events_by_fingerprint(
+            extraction_key, hotel_section
+        )
+        # Every chunk ends with the hotel section, which is keyed per page separately.
+        fingerprints = [
+            page_fingerprint(split_hotel_section(chunk)[0]) for chunk in chunks
+        ]
 
-            schedule_extraction_function = [
-                convert_pydantic_to_openai_function(Schedule)
+        results = [known.get(fingerprint) for fingerprint in fingerprints]
+        logging.info(
+            f"{len(chunks) - results.count(None)} of {len(chunks)} pages unchanged."
+        )
+        self._extract_pending(chunks, results)
+        self.extracted_schedule = self._enrich(
+            merge_events(result for result in results if result is not None)
+        )
+        self.metrics.events = len(self.extracted_schedule)
+
+        PageManifest(
+            extraction_key=extraction_key,
+            pages=[
+                PageExtraction(
+                    fingerprint=fingerprint,
+                    hotel_fingerprint=hotel_fingerprint(result, hotel_section),
+                    events=result,
+                )
+                for fingerprint, result in zip(fingerprints, results, strict=True)
+                if result is not None
+            ],
+        ).to_file(manifest_file)
+
+        if to_file:
+            self.write_json(to_file)
+
+    async def aextract(self, to_file: str = "") -> None:
+        """Asynchronous version of extract().
+
+        The PDF is parsed in an executor and the LLM is awaited, so the event loop stays responsive.
+
+        Parameters:
+            to_file (str, optional): The path to the output JSON file. If not provided, the extracted data will not be saved.
+
+        Returns:
+            None
+        """
+        loop = asyncio.get_running_loop()
+        known_layout = await loop.run_in_executor(None, self._read_known_layout)
+        chunks = (
+            []
+            if known_layout
+            else await loop.run_in_executor(None, self._schedule_chunks)
+        )
+
+        if chunks:
+            results = self._cached_schedule_results(chunks)
+            pending = [
+                chunk
+                for chunk, result in zip(chunks, results, strict=True)
+                if result is None
             ]
 
-            extraction_model = model.bind(
-                functions=schedule_extraction_function,
-                function_call={"name": "Schedule"},
-            )
+            if pending:
+                _log_cost_warning()
+                with get_openai_callback() as cb, self.metrics.timer("llm_seconds"):
+                    outputs = await self._arun_batch(
+                        self._schedule_chain(),
+                        [{"input": chunk} for chunk in pending],
+                        cb,
+                    )
+                    repairs = self._repair_requests(pending, outputs)
+                    if repairs:
+                        repaired = await self._arun_batch(
+                            self._repair_chain(), list(repairs.values()), cb
+                        )
+                        self._apply_repairs(outputs, repairs, repaired)
+                logging.warning("Actual OpenAI API cost in USD:" + str(cb.total_cost))
+                self.metrics.add_llm_usage(cb)
+                self._store_schedule_results(chunks, results, outputs)
 
-            extraction_chain = (
-                prompt
-                | extraction_model
-                | JsonKeyOutputFunctionsParser(key_name="events")
+            # May ask the LLM for airports missing from the airport table (slim mode).
+            self.extracted_schedule = await loop.run_in_executor(
+                None, self._combine_schedule_results, results
             )
+            self.metrics.events = len(self.extracted_schedule)
+
+        if to_file:
+            self.write_json(to_file)
+
+    def stream_events(self) -> Iterator[dict]:
+        """Extracts the schedule, yielding each event as soon as the LLM has generated it.
+
+        The function call arguments are parsed while the response streams in. Each event is
+        validated, and completed from the airport table, as soon as it is complete, so the
+        first duties are available long before the response is. Schedules with a known
+        layout and cached schedules are yielded at once. The schedule is sent in one request
+        (pages_per_chunk is not used). A failed request is retried until the first event has
+        arrived; invalid events are requested again (once) after the response is complete.
+        Afterwards the schedule is in extracted_schedule, as after extract().
+
+        Sample use:
+        - for event in OpenAISchedule("schedule.pdf").stream_events(): print(event["summary"])
+
+        Yields:
+            dict: Each event, in crewcal json format.
+        """
+        document, ready = self._stream_start()
+        if ready is not None:
+            yield from ready
+            return
+
+        _log_cost_warning()
+        started = time.perf_counter()
+        events: list[dict] = []
+        invalid: list[tuple[Any, str]] = []
+        attempt = 0
+        truncated = False
+        while True:
+            self.retry_policy.check_circuit()
+            attempt += 1
+            self.metrics.add(llm_calls=1)
+            try:
+                for item in iter_json_array(self._stream_arguments(document)):
+                    event = self._accept_streamed_event(item, events, invalid)
+                    if event is not None:
+                        yield event
+            except Exception as e:
+                delay = self._stream_failed(e, attempt, bool(events or invalid))
+                if delay is None:
+                    truncated = True
+                    break
+                time.sleep(delay)
+            else:
+                self.retry_policy.record(events)
+                break
+
+        outputs = self._streamed_outputs(events, invalid, truncated)
+        yield from self._repair_streamed(document, outputs, len(events))
+        self.metrics.add(llm_seconds=time.perf_counter() - started)
+        self._finish_stream(document, outputs)
+
+    async def astream_events(self) -> AsyncIterator[dict]:
+        """Asynchronous version of stream_events().
+
+        Sample use:
+        - async for event in OpenAISchedule("schedule.pdf").astream_events(): ...
+
+        Yields:
+            dict: Each event, in crewcal json format.
+        """
+        loop = asyncio.get_running_loop()
+        document, ready = await loop.run_in_executor(None, self._stream_start)
+        if ready is not None:
+            for event in ready:
+                yield event
+            return
+
+        _log_cost_warning()
+        started = time.perf_counter()
+        events: list[dict] = []
+        invalid: list[tuple[Any, str]] = []
+        attempt = 0
+        truncated = False
+        while True:
+            self.retry_policy.check_circuit()
+            attempt += 1
+            self.metrics.add(llm_calls=1)
+            try:
+                async for item in self._astream_items(document):
+                    event = self._accept_streamed_event(item, events, invalid)
+                    if event is not None:
+                        yield event
+            except Exception as e:
+                delay = self._stream_failed(e, attempt, bool(events or invalid))
+                if delay is None:
+                    truncated = True
+                    break
+                await asyncio.sleep(delay)
+            else:
+                self.retry_policy.record(events)
+                break
+
+        outputs = self._streamed_outputs(events, invalid, truncated)
+        for event in await self._arepair_streamed(document, outputs, len(events)):
+            yield event
+        self.metrics.add(llm_seconds=time.perf_counter() - started)
+        self._finish_stream(document, outputs)
+
+    def stream_icalendar(
+        self, filepath: str, events: Iterable[dict] | None = None
+    ) -> None:
+        """Extracts the schedule into an iCalendar file, writing each event as soon as it is generated.
+
+        The file is written under a temporary name and renamed when complete.
+
+        Parameters:
+            filepath (str): The path to the iCalendar file.
+            events (Iterable[dict], optional): The events to write. Defaults to stream_events(); pass a
+                wrapper of it to follow the progress.
+
+        Returns:
+            None
+        """
+        events = self.stream_events() if events is None else events
+        write_icalendar_file(
+            (Event.model_validate(event) for event in events), filepath
+        )
+        self.metrics.add(bytes_written=Path(filepath).stat().st_size)
+
+    def _stream_start(self) -> tuple[str, list[dict] | None]:
+        """The document to stream from the LLM, and the events if no LLM request is needed."""
+        if self._read_known_layout():
+            return "", self.extracted_schedule
+
+        document = "".join(self._prompt_pages())
+        if not document:
+            return "", []
+        [cached] = self._cached_schedule_results([document])
+        if cached is None:
+            return document, None
+
+        self.extracted_schedule = self._combine_schedule_results([cached])
+        self.metrics.events = len(self.extracted_schedule)
+        return document, self.extracted_schedule
+
+    def _stream_arguments(self, document: str) -> Iterator[str]:
+        """The function call arguments of the schedule extraction, in pieces as they arrive."""
+        for chunk in self._stream_chain().stream({"input": document}):
+            yield _function_call_arguments(chunk)
+
+    async def _astream_items(self, document: str) -> AsyncIterator[Any]:
+        """The events of the schedule extraction as they arrive, unvalidated (asynchronously)."""
+        parser = JsonArrayParser()
+        async for chunk in self._stream_chain().astream({"input": document}):
+            for item in parser.feed(_function_call_arguments(chunk)):
+                yield item
+            if parser.complete:
+                return
+        for item in parser.close():
+            yield item
+
+    def _accept_streamed_event(
+        self, item: object, events: list[dict], invalid: list[tuple[Any, str]]
+    ) -> dict | None:
+        """Validate a streamed event; returns it completed from the airport table, or None if invalid."""
+        try:
+            (SlimEvent if self.slim else Event).model_validate(item)
+        except ValidationError as e:
+            invalid.append((item, str(e)))
+            return None
+
+        if not events:
+            self.metrics.first_event_seconds = time.time() - self.metrics.started_at
+        events.append(item)
+        return self._enrich([item])[0]
 
-            logging.warning(
-                "WARNING - This script costs ~0.75 US cents per call in OpenAI API costs (GPT-3.5)."
+    def _stream_failed(
+        self, error: Exception, attempt: int, received: bool
+    ) -> float | None:
+        """Handle a failed streamed request.
+
+        A response that breaks off after events were received is kept. A request that
+        failed before is retried per the retry policy; otherwise the error is raised.
+
+        Returns:
+            float: Seconds to wait before retrying, or None to keep the events received.
+        """
+        self.retry_policy.record(error)
+        if received and isinstance(error, ValueError):
+            return None
+        if (
+            received
+            or not self.retry_policy.is_retryable(error)
+            or attempt > self.retry_policy.max_retries
+        ):
+            raise error
+        return self._retry_delay(attempt, [error])
+
+    @staticmethod
+    def _streamed_outputs(
+        events: list[dict], invalid: list[tuple[Any, str]], truncated: bool
+    ) -> list:
+        """The streamed response as an output of _run_batch(), for the repair and the cache."""
+        if invalid or truncated:
+            return [PartialExtractionError(list(events), invalid, truncated)]
+        return [events]
+
+    def _repair_streamed(
+        self, document: str, outputs: list, received: int
+    ) -> list[dict]:
+        """Request the invalid events of a streamed response again.
+
+        The repaired events are added to outputs, and returned (enriched) to be yielded.
+        """
+        repairs = self._repair_requests([document], outputs)
+        if not repairs:
+            return []
+        with get_openai_callback() as cb:
+            repaired = self._run_batch(self._repair_chain(), list(repairs.values()), cb)
+        self.metrics.add_llm_usage(cb)
+        self._apply_repairs(outputs, repairs, repaired)
+        return self._enrich(outputs[0].events[received:])
+
+    async def _arepair_streamed(
+        self, document: str, outputs: list, received: int
+    ) -> list[dict]:
+        """Asynchronous version of _repair_streamed()."""
+        repairs = self._repair_requests([document], outputs)
+        if not repairs:
+            return []
+        with get_openai_callback() as cb:
+            repaired = await self._arun_batch(
+                self._repair_chain(), list(repairs.values()), cb
             )
+        self.metrics.add_llm_usage(cb)
+        self._apply_repairs(outputs, repairs, repaired)
+        return self._enrich(outputs[0].events[received:])
 
-            from langchain.callbacks import get_openai_callback
+    def _finish_stream(self, document: str, outputs: list) -> None:
+        """Store and cache the events of a streamed response."""
+        results = [None]
+        self._store_schedule_results([document], results, outputs)
+        self.extracted_schedule = self._combine_schedule_results(results)
+        self.metrics.events = len(self.extracted_schedule)
 
-            with get_openai_callback() as cb:
-                self.extracted_schedule = extraction_chain.invoke(
-                    {"input": full_sched_doc}
-                )
+    def _read_known_layout(self) -> bool:
+        """Read the schedule with a layout parser, without the LLM, if one recognises it.
+
+        Returns:
+            bool: True if the schedule was read; the parser is reported in the metrics.
+        """
+        if not self.layouts:
+            return False
+        parsed = parse_known_layout(self.read_schedule_pdf(self.schedule_path))
+        if parsed is None:
+            return False
+
+        self.metrics.layout, self.extracted_schedule = parsed
+        self.metrics.events = len(self.extracted_schedule)
+        logging.info(
+            f"Schedule read by the '{self.metrics.layout}' layout parser, without the LLM."
+        )
+        return True
+
+    def _schedule_chunks(self) -> list[str]:
+        """The document text(s) to send to the LLM for the schedule extraction."""
+        pages = self._prompt_pages()
+        if self.pages_per_chunk <= 0:
+            full_sched_doc = "".join(pages)
+            return [full_sched_doc] if full_sched_doc else []
+
+        return chunk_pages(pages, self.pages_per_chunk)
 
+    def _prompt_pages(self) -> list[str]:
+        """The text of each page of the schedule, compacted for the LLM unless disabled."""
+        pages = self.read_schedule_pages(self.schedule_path)
+        if not self.compact:
+            return pages
+
+        compacted = compact_pages(pages)
+        self._report_compaction("".join(pages), "".join(compacted))
+        return compacted
+
+    def _hotel_document(self) -> str:
+        """The document text to send to the LLM for the hotel extraction."""
+        pages = self.read_schedule_pages(self.schedule_path)
+        if not self.compact:
+            return "".join(pages)
+
+        document = hotel_document(compact_pages(pages))
+        self._report_compaction("".join(pages), document)
+        return document
+
+    def _report_compaction(self, document: str, compacted: str) -> None:
+        """Add the tokens saved by compacting document to the metrics."""
+        saved = estimate_tokens(document, self.llm_model_name) - estimate_tokens(
+            compacted, self.llm_model_name
+        )
+        logging.info(f"Compaction saved about {saved} tokens.")
+        self.metrics.add(tokens_saved=saved)
+
+    def _extract_pending(self, chunks: list[str], results: list) -> None:
+        """Extract the chunks that have no result yet with the LLM, in parallel.
+
+        The results are filled in place, see _store_schedule_results(). Invalid events in a
+        response are requested again, once, see _repair_requests().
+        """
+        pending = [
+            chunk
+            for chunk, result in zip(chunks, results, strict=True)
+            if result is None
+        ]
+
+        if pending:
+            _log_cost_warning()
+            with get_openai_callback() as cb, self.metrics.timer("llm_seconds"):
+                outputs = self._run_batch(
+                    self._schedule_chain(), [{"input": chunk} for chunk in pending], cb
+                )
+                repairs = self._repair_requests(pending, outputs)
+                if repairs:
+                    repaired = self._run_batch(
+                        self._repair_chain(), list(repairs.values()), cb
+                    )
+                    self._apply_repairs(outputs, repairs, repaired)
             logging.warning("Actual OpenAI API cost in USD:" + str(cb.total_cost))
+            self.metrics.add_llm_usage(cb)
+            self._store_schedule_results(chunks, results, outputs)
 
-        if to_file:
-            self.write_json(to_file)
+    def _run_batch(
+        self,
+        chain,  # noqa: ANN001
+        inputs: list,
+        usage: OpenAICallbackHandler | None = None,
+    ) -> list:
+        """Run the chain on each input in parallel, retrying failed calls per the retry policy.
+
+        Only the calls that failed for a transient reason are retried. langchain runs the
+        calls on worker threads, where the handler of get_openai_callback() is not active;
+        pass it as usage to count their tokens and cost.
+
+        Returns:
+            list: The output for each input, or the exception of its last attempt.
+        """
+        outputs = [None] * len(inputs)
+        pending = list(range(len(inputs)))
+        attempt = 0
+        while pending:
+            if attempt:
+                time.sleep(self._retry_delay(attempt, [outputs[i] for i in pending]))
+            if not self._circuit_allows(outputs, pending, attempt):
+                break
+            attempt += 1
+            self.metrics.add(llm_calls=len(pending))
+            answers = chain.batch(
+                [inputs[index] for index in pending],
+                config=self._batch_config(usage),
+                return_exceptions=True,
+            )
+            pending = self._record_answers(pending, answers, outputs, attempt)
+        return outputs
+
+    async def _arun_batch(
+        self,
+        chain,  # noqa: ANN001
+        inputs: list,
+        usage: OpenAICallbackHandler | None = None,
+    ) -> list:
+        """Asynchronous version of _run_batch()."""
+        outputs = [None] * len(inputs)
+        pending = list(range(len(inputs)))
+        attempt = 0
+        while pending:
+            if attempt:
+                await asyncio.sleep(
+                    self._retry_delay(attempt, [outputs[i] for i in pending])
+                )
+            if not self._circuit_allows(outputs, pending, attempt):
+                break
+            attempt += 1
+            self.metrics.add(llm_calls=len(pending))
+            answers = await chain.abatch(
+                [inputs[index] for index in pending],
+                config=self._batch_config(usage),
+                return_exceptions=True,
+            )
+            pending = self._record_answers(pending, answers, outputs, attempt)
+        return outputs
+
+    def _batch_config(self, usage: OpenAICallbackHandler | None) -> dict:
+        """The langchain config of a batch of LLM calls."""
+        config: dict[str, Any] = {"max_concurrency": self.max_concurrency}
+        if usage is not None:
+            config["callbacks"] = [usage]
+        return config
+
+    def _circuit_allows(self, outputs: list, pending: list[int], attempt: int) -> bool:
+        """Check the circuit breaker before (re)trying the pending calls.
+
+        A first attempt raises CircuitOpenError when the breaker is open; for a retry the
+        calls fail with it instead.
+        """
+        try:
+            self.retry_policy.check_circuit()
+        except CircuitOpenError as e:
+            if not attempt:
+                raise
+            for index in pending:
+                outputs[index] = e
+            return False
+        return True
+
+    def _record_answers(
+        self, pending: list[int], answers: list, outputs: list, attempt: int
+    ) -> list[int]:
+        """Store the answers of the pending calls in outputs; returns the calls to retry."""
+        retry = []
+        for index, answer in zip(pending, answers, strict=True):
+            outputs[index] = answer
+            self.retry_policy.record(answer)
+            if (
+                isinstance(answer, Exception)
+                and self.retry_policy.is_retryable(answer)
+                and attempt <= self.retry_policy.max_retries
+            ):
+                retry.append(index)
+        return retry
+
+    def _retry_delay(self, attempt: int, errors: list) -> float:
+        """Seconds to wait before retrying calls that failed with errors."""
+        delay = max(self.retry_policy.delay(attempt, error) for error in errors)
+        logging.warning(
+            f"{len(errors)} LLM calls failed ({type(errors[0]).__name__}), "
+            f"retrying in {delay:.1f}s."
+        )
+        self.metrics.add(retries=len(errors))
+        return delay
+
+    def _repair_requests(self, chunks: list[str], outputs: list) -> dict[int, dict]:
+        """Requests to extract the invalid events of partially valid outputs again, by output."""
+        return {
+            index: {
+                "input": chunk,
+                "invalid": json.dumps(
+                    [
+                        {"event": event, "errors": errors}
+                        for event, errors in output.invalid
+                    ],
+                    ensure_ascii=False,
+                ),
+            }
+            for index, (chunk, output) in enumerate(zip(chunks, outputs, strict=True))
+            if isinstance(output, PartialExtractionError) and output.invalid
+        }
+
+    def _apply_repairs(
+        self, outputs: list, repairs: dict[int, dict], repaired: list
+    ) -> None:
+        """Add the repaired events to the partial outputs they were requested for."""
+        for index, answer in zip(repairs, repaired, strict=True):
+            partial = outputs[index]
+            if isinstance(answer, PartialExtractionError):
+                partial.events.extend(answer.events)
+                partial.invalid = answer.invalid
+                partial.truncated = partial.truncated or answer.truncated
+            elif isinstance(answer, Exception):
+                logging.warning(f"Repair of invalid events failed: {answer}")
+            else:
+                partial.events.extend(answer)
+                partial.invalid = []
+
+    def _cached_schedule_results(self, chunks: list[str]) -> list:
+        """Events from the cache for each chunk, None for chunks that must go to the LLM."""
+        results = []
+        for chunk in chunks:
+            cached = (
+                self.cache.get(self._schedule_cache_key(chunk)) if self.cache else None
+            )
+            if cached is not None:
+                logging.info("Schedule extraction served from cache.")
+                self.metrics.add(cache_hits=1)
+            results.append(cached)
+        return results
+
+    def _store_schedule_results(
+        self, chunks: list[str], results: list, outputs: list
+    ) -> None:
+        """Fill in the LLM outputs for the pending chunks (in place) and cache them.
+
+        Failed chunks are logged, recorded in failed_chunks and left out, unless all chunks
+        failed. Of partially valid outputs the valid events are kept; these are only cached
+        when nothing was lost.
+        """
+        pending = (count for count, result in enumerate(results) if result is None)
+        errors = []
+        for count, output in zip(pending, outputs, strict=True):
+            if isinstance(output, PartialExtractionError):
+                if output.invalid:
+                    logging.warning(
+                        f"Dropped {len(output.invalid)} invalid events of chunk {count + 1}."
+                    )
+                if output.truncated:
+                    logging.warning(
+                        f"The LLM response for chunk {count + 1} was cut short; "
+                        "events after the cut are missing."
+                    )
+                results[count] = output.events
+                if self.cache and not (output.invalid or output.truncated):
+                    self.cache.set(
+                        self._schedule_cache_key(chunks[count]), output.events
+                    )
+                continue
+            if isinstance(output, Exception):
+                logging.warning(f"Extraction of chunk {count + 1} failed: {output}")
+                errors.append(output)
+                self.failed_chunks.append(count + 1)
+                self.metrics.add(failed_chunks=1)
+                continue
+            results[count] = output
+            if self.cache:
+                self.cache.set(self._schedule_cache_key(chunks[count]), output)
+
+        if errors and len(errors) == len(chunks):
+            raise errors[0]
+
+    def _combine_schedule_results(self, results: list) -> list:
+        """Combine the events of all chunks into a single list of events.
+
+        Airport names and timezones are filled in from the airport table.
+        """
+        if len(results) == 1:
+            return self._enrich(results[0])
+        return self._enrich(
+            merge_events(result for result in results if result is not None)
+        )
 
     def extract_hotels(self, to_folder: Path) -> None:
         """Uses an LLM to extract hotel contact information from a flight schedule.
@@ -150,48 +966,365 @@ class OpenAISchedule:
         Returns:
             None
         """
-        full_sched_doc = self.read_schedule_pdf(self.schedule_path)
+        full_sched_doc = self._hotel_document()
 
         if full_sched_doc:
-            model = ChatOpenAI(model_name=self.llm_model_name, temperature=0)
-            hotel_parser = template_hotel_contacts
-            hotel_parser = PydanticOutputParser(pydantic_object=Hotels)
-            prompt = ChatPromptTemplate.from_template(
-                template_hotel_contacts + "\n\n"
-                "Document: {document}\n\n"
-                "{format_instructions}"
-            )
+            entries, known, document = self._indexed_hotels(full_sched_doc)
+            hotels = self._request_hotels(document) if document else Hotels(hotels=[])
+            self.extracted_hotels = self._combine_indexed_hotels(entries, known, hotels)
+            self.write_hotels(to_folder)
+
+    async def aextract_hotels(self, to_folder: Path) -> None:
+        """Asynchronous version of extract_hotels().
 
-            extraction_chain = (
-                {
-                    "document": RunnablePassthrough(),
-                    "format_instructions": lambda _: hotel_parser.get_format_instructions(),
-                }
-                | prompt
-                | model
-                | hotel_parser
+        Args:
+            to_folder (Path): Destination folder of the vCard files.
+
+        Returns:
+            None
+        """
+        await self.aread_schedule_pdf(self.schedule_path)
+        full_sched_doc = self._hotel_document()
+
+        if full_sched_doc:
+            entries, known, document = self._indexed_hotels(full_sched_doc)
+            hotels = (
+                await self._arequest_hotels(document) if document else Hotels(hotels=[])
             )
+            self.extracted_hotels = self._combine_indexed_hotels(entries, known, hotels)
+            self.write_hotels(to_folder)
+
+    def _indexed_hotels(
+        self, document: str
+    ) -> tuple[list[str], list[Hotel | None], str]:
+        """Look up the hotels of the hotel section of document in the hotel index.
+
+        Returns:
+            tuple[list[str], list[Hotel | None], str]: The hotel entries; the indexed hotel
+                of each entry, None if unknown; and the document to send to the LLM for
+                the unknown hotels ('' if there are none). Without hotel index or hotel
+                section there are no entries and the whole document goes to the LLM.
+        """
+        _, section = split_hotel_section(document)
+        if not (self.hotel_index_file and section):
+            return [], [], document
+
+        index = HotelIndex.from_file(self.hotel_index_file)
+        # Stays at the same hotel on other dates are the same hotel.
+        entries_by_key: dict[str, str] = {}
+        for entry in parse_hotel_entries(section):
+            entries_by_key.setdefault(hotel_key(entry), entry)
+        entries = list(entries_by_key.values())
+        known = [index.lookup(entry) for entry in entries]
+        unknown = [
+            entry for entry, hotel in zip(entries, known, strict=True) if hotel is None
+        ]
+        self.metrics.add(hotel_index_hits=len(entries) - len(unknown))
+        if not unknown:
+            logging.info("All hotels found in the hotel index.")
+            return entries, known, ""
+
+        return (
+            entries,
+            known,
+            "".join(f"{line}\n" for line in [HOTEL_SECTION_HEADER, *unknown]),
+        )
+
+    def _combine_indexed_hotels(
+        self, entries: list[str], known: list[Hotel | None], hotels: Hotels
+    ) -> Hotels:
+        """Combine the indexed hotels with those from the LLM, and index the latter."""
+        if not entries:
+            return hotels
+
+        unknown = [
+            entry for entry, hotel in zip(entries, known, strict=True) if hotel is None
+        ]
+        matched = match_hotels(unknown, hotels.hotels) if unknown else {}
+        if matched:
+            index = HotelIndex()
+            for position, hotel in matched.items():
+                index.add(unknown[position], hotel)
+            index.to_file(self.hotel_index_file)
+
+        indexed = [hotel for hotel in known if hotel is not None]
+        return Hotels(hotels=indexed + hotels.hotels)
+
+    def _request_hotels(self, document: str) -> Hotels:
+        """Hotels in document, from the cache or else from the LLM."""
+        cache_key = self._hotel_cache_key(document)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            logging.info("Hotel extraction served from cache.")
+            self.metrics.add(cache_hits=1)
+            return Hotels.model_validate(cached)
+
+        _log_cost_warning()
+        with get_openai_callback() as cb, self.metrics.timer("llm_seconds"):
+            [hotels] = self._run_batch(self._hotel_chain(), [document], cb)
+            if str(cb.total_cost) != "":
+                logging.warning("Actual OpenAI API cost in USD:" + str(cb.total_cost))
+        self.metrics.add_llm_usage(cb)
+        return self._store_hotels(cache_key, hotels)
 
-            logging.warning(
-                "WARNING - This script costs ~0.75 US cents per call in OpenAI API costs (GPT-3.5)."
+    async def _arequest_hotels(self, document: str) -> Hotels:
+        """Asynchronous version of _request_hotels()."""
+        cache_key = self._hotel_cache_key(document)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            logging.info("Hotel extraction served from cache.")
+            self.metrics.add(cache_hits=1)
+            return Hotels.model_validate(cached)
+
+        _log_cost_warning()
+        with get_openai_callback() as cb, self.metrics.timer("llm_seconds"):
+            [hotels] = await self._arun_batch(self._hotel_chain(), [document], cb)
+            if str(cb.total_cost) != "":
+                logging.warning("Actual OpenAI API cost in USD:" + str(cb.total_cost))
+        self.metrics.add_llm_usage(cb)
+        return self._store_hotels(cache_key, hotels)
+
+    def _store_hotels(self, cache_key: str, hotels: Hotels | Exception) -> Hotels:
+        """Cache the hotels from the LLM; raises the exception of a failed request."""
+        if isinstance(hotels, Exception):
+            raise hotels
+        if self.cache:
+            self.cache.set(cache_key, hotels.model_dump())
+        return hotels
+
+    def extract_all(
+        self, to_hotel_folder: Path, to_json_file: str = "", to_icalendar_file: str = ""
+    ) -> None:
+        """Extracts both the schedule and the hotel contact information in one pass.
+
+        The PDF is read only once. The schedule and hotel LLM requests are issued in parallel
+        over the same document text, so the wall time is that of the slowest request.
+
+        Args:
+            to_hotel_folder (Path): Destination folder of the vCard files.
+            to_json_file (str, optional): The path to the output JSON file.
+            to_icalendar_file (str, optional): The path to the output iCalendar file.
+
+        Returns:
+            None
+        """
+        self.read_schedule_pdf(self.schedule_path)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            schedule_future = executor.submit(self.extract, to_json_file)
+            hotels_future = executor.submit(self.extract_hotels, Path(to_hotel_folder))
+            schedule_future.result()
+            hotels_future.result()
+
+        if to_icalendar_file and self.extracted_schedule:
+            self.write_icalendar(to_icalendar_file)
+
+    async def aextract_all(
+        self, to_hotel_folder: Path, to_json_file: str = "", to_icalendar_file: str = ""
+    ) -> None:
+        """Asynchronous version of extract_all().
+
+        Args:
+            to_hotel_folder (Path): Destination folder of the vCard files.
+            to_json_file (str, optional): The path to the output JSON file.
+            to_icalendar_file (str, optional): The path to the output iCalendar file.
+
+        Returns:
+            None
+        """
+        await self.aread_schedule_pdf(self.schedule_path)
+
+        await asyncio.gather(
+            self.aextract(to_json_file), self.aextract_hotels(Path(to_hotel_folder))
+        )
+
+        if to_icalendar_file and self.extracted_schedule:
+            self.write_icalendar(to_icalendar_file)
+
+    def write_hotels(self, to_folder: Path) -> None:
+        """Writes a vCard file for each of the extracted hotels.
+
+        Args:
+            to_folder (Path): Destination folder of the vCard files.
+        """
+        if not to_folder.exists() and len(self.extracted_hotels.hotels) > 0:
+            to_folder.mkdir(parents=True, exist_ok=True)
+
+        self.metrics.hotels = len(self.extracted_hotels.hotels)
+        for hotel in self.extracted_hotels.hotels:
+            destination_file = to_folder / hotel.vcf_file_name
+            with Path.open(destination_file, "w") as file:
+                file.write(hotel.hotel_contact)
+            self.metrics.add(bytes_written=destination_file.stat().st_size)
+
+    def _schedule_function(self) -> dict:
+        """OpenAI function definition used to extract the schedule.
+
+        In slim mode the events have no airport names and timezones; the function keeps
+        its name.
+        """
+        if self.slim:
+            return convert_pydantic_to_openai_function(SlimSchedule, name="Schedule")
+        return convert_pydantic_to_openai_function(Schedule)
+
+    def _schedule_template(self) -> str:
+        """System prompt of the schedule extraction."""
+        return template_flight_schedule_slim if self.slim else template_flight_schedule
+
+    def _parse_events(self):
+        """Parser of the schedule function call, validating events against the schema."""
+        return RunnableLambda(
+            partial(parse_function_call_events, model=SlimEvent if self.slim else Event)
+        )
+
+    def _schedule_model(self):
+        """The chat model, bound to answer with a call of the schedule function."""
+        return self.backend.chat_model().bind(
+            functions=[self._schedule_function()],
+            function_call={"name": "Schedule"},
+        )
+
+    def _schedule_chain(self):
+        """Build the LLM chain that extracts the list of events from the schedule document.
+
+        A response with invalid events gives a PartialExtractionError holding the valid ones.
+        """
+        return self._stream_chain() | self._parse_events()
+
+    def _stream_chain(self):
+        """Build the LLM chain that answers with a call of the schedule function, unparsed."""
+        prompt = ChatPromptTemplate.from_messages(
+            [("system", self._schedule_template()), ("human", "{input}")]
+        )
+
+        return prompt | self._schedule_model()
+
+    def _repair_chain(self):
+        """Build the LLM chain that extracts invalid events of an earlier response again."""
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", self._schedule_template()),
+                ("human", "{input}"),
+                ("human", template_event_repair),
+            ]
+        )
+
+        return prompt | self._schedule_model() | self._parse_events()
+
+    def _hotel_parser(self) -> PydanticOutputParser:
+        """Output parser for the hotel contact extraction."""
+        return PydanticOutputParser(pydantic_object=Hotels)
+
+    def _hotel_chain(self):
+        """Build the LLM chain that extracts hotel contact cards from the schedule document."""
+        model = self.backend.chat_model()
+        hotel_parser = self._hotel_parser()
+        prompt = ChatPromptTemplate.from_template(
+            template_hotel_contacts + "\n\n"
+            "Document: {document}\n\n"
+            "{format_instructions}"
+        )
+
+        return (
+            {
+                "document": RunnablePassthrough(),
+                "format_instructions": lambda _: hotel_parser.get_format_instructions(),
+            }
+            | prompt
+            | model
+            | hotel_parser
+        )
+
+    def _enrich(self, events: list[dict]) -> list[dict]:
+        """Fill in the airport names and timezones of events, see crewcal.airports.
+
+        In slim mode the LLM gives no timezones, so the airports missing from the airport
+        table are looked up with the LLM, once per run.
+
+        Raises:
+            UnknownAirportError: In slim mode, no valid timezone was found for an airport.
+        """
+        if self.slim:
+            self._look_up_airports(unknown_airport_codes(events))
+        return enrich_events(events, self._llm_airports)
+
+    def _look_up_airports(self, codes: list[str]) -> None:
+        """Ask the LLM for the airports missing from the table; raise for those it does not know."""
+        codes = [code for code in codes if code not in self._llm_airports]
+        if not codes:
+            return
+        self._llm_airports.update(self._request_airports(codes))
+        missing = [code for code in codes if code not in self._llm_airports]
+        if missing:
+            msg = (
+                f"No valid timezone found for airport(s) {', '.join(missing)}. Add them "
+                "to the file named by CREWCAL_AIRPORTS, or extract without slim mode."
             )
+            raise UnknownAirportError(msg)
 
-            from langchain.callbacks import get_openai_callback
+    def _request_airports(self, codes: list[str]) -> dict[str, Airport]:
+        """The airports with the given codes, from the cache or else from the LLM."""
+        document = ", ".join(codes)
+        cache_key = self._cache_key(
+            document,
+            template_airports,
+            self._airport_parser().get_format_instructions(),
+        )
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            self.metrics.add(cache_hits=1)
+            return LLMAirports.model_validate(cached).by_code()
 
-            with get_openai_callback() as cb:
-                self.extracted_hotels = extraction_chain.invoke(full_sched_doc)
-                if str(cb.total_cost) != "":
-                    logging.warning(
-                        "Actual OpenAI API cost in USD:" + str(cb.total_cost)
-                    )
+        _log_cost_warning()
+        with get_openai_callback() as cb, self.metrics.timer("llm_seconds"):
+            [airports] = self._run_batch(self._airport_chain(), [document], cb)
+        self.metrics.add_llm_usage(cb)
+        if isinstance(airports, Exception):
+            raise airports
+        if self.cache:
+            self.cache.set(cache_key, airports.model_dump())
+        return airports.by_code()
+
+    def _airport_parser(self) -> PydanticOutputParser:
+        """Output parser for the airport lookup."""
+        return PydanticOutputParser(pydantic_object=LLMAirports)
+
+    def _airport_chain(self):
+        """Build the LLM chain that looks up airports missing from the airport table."""
+        airport_parser = self._airport_parser()
+        prompt = ChatPromptTemplate.from_template(
+            template_airports + "\n{format_instructions}"
+        )
+
+        return (
+            {
+                "codes": RunnablePassthrough(),
+                "format_instructions": lambda _: airport_parser.get_format_instructions(),
+            }
+            | prompt
+            | self.backend.chat_model()
+            | airport_parser
+        )
 
-            if not to_folder.exists() and len(self.extracted_hotels.hotels) > 0:
-                to_folder.mkdir(parents=True, exist_ok=True)
+    def _cache_key(self, document: str, template: str, schema: str) -> str:
+        """Cache key for an extraction of document with the given prompt template and output schema."""
+        return ExtractionCache.make_key(document, template, self.llm_model_name, schema)
 
-            for hotel in self.extracted_hotels.hotels:
-                destination_file = to_folder / hotel.vcf_file_name
-                with Path.open(destination_file, "w") as file:
-                    file.write(hotel.hotel_contact)
+    def _schedule_cache_key(self, document: str) -> str:
+        """Cache key for the schedule extraction of document."""
+        return self._cache_key(
+            document,
+            self._schedule_template(),
+            json.dumps(self._schedule_function(), sort_keys=True),
+        )
+
+    def _hotel_cache_key(self, document: str) -> str:
+        """Cache key for the hotel extraction of document."""
+        return self._cache_key(
+            document,
+            template_hotel_contacts,
+            self._hotel_parser().get_format_instructions(),
+        )
 
     def read_schedule_pdf(self, filepath: str = "") -> str:
         """Reads the contents of a schedule PDF file and returns as a document for an LLM input.
@@ -202,14 +1335,55 @@ class OpenAISchedule:
         Returns:
             str: The concatenated text of all pages in the PDF file.
         """
-        if filepath:
-            loader = PyPDFLoader(str(filepath))
-            documents = loader.load()
-            full_sched_doc = "".join([doc.page_content for doc in documents])
-        else:
-            full_sched_doc = ""
+        return "".join(self.read_schedule_pages(filepath))
+
+    def read_schedule_pages(self, filepath: str = "") -> list[str]:
+        """Reads the text of each page of a schedule PDF file.
+
+        The pages are kept, so that combined extractions read the PDF only once. Long PDFs are
+        read by several processes in parallel, and the text is cached unless use_cache is False.
 
-        return full_sched_doc
+        Args:
+            filepath (str): The path to the PDF file.
+
+        Returns:
+            list[str]: The text of each page in the PDF file.
+        """
+        if not filepath:
+            return []
+
+        if str(filepath) not in self._pages:
+            with self.metrics.timer("pdf_load_seconds"):
+                pages = read_pdf_pages(str(filepath), cache=self.cache)
+            self.metrics.add(
+                page_count=len(pages), characters=sum(len(page) for page in pages)
+            )
+            self._pages[str(filepath)] = pages
+
+        return self._pages[str(filepath)]
+
+    async def aread_schedule_pdf(self, filepath: str = "") -> str:
+        """Asynchronous version of read_schedule_pdf(); the PDF is parsed in the default executor.
+
+        Args:
+            filepath (str): The path to the PDF file.
+
+        Returns:
+            str: The concatenated text of all pages in the PDF file.
+        """
+        if str(filepath) in self._pages:
+            return self.read_schedule_pdf(filepath)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.read_schedule_pdf, filepath)
+
+    def emit_metrics(self) -> None:
+        """Passes the metrics collected so far to the registered metrics hooks.
+
+        This happens automatically when the extraction is requested at object creation.
+        Otherwise call it after the last extraction or write of a run.
+        """
+        emit_metrics(self.metrics)
 
     def json_dumps(self) -> str:
         """Returns the JSON representation of the schedule in a basic formatted string.
@@ -221,13 +1395,21 @@ class OpenAISchedule:
 
     def write_json(self, filepath: str = "./sched.json") -> None:
         """Writes the JSON representation of the schedule to a file."""
-        with Path(filepath).open("w") as outfile:
+        with (
+            self.metrics.timer("serialization_seconds"),
+            Path(filepath).open("w") as outfile,
+        ):
             json.dump(self.extracted_schedule, outfile)
+        self.metrics.add(bytes_written=Path(filepath).stat().st_size)
 
     def write_icalendar(self, filepath: str) -> None:
         """Writes the iCalendar representation of the schedule to a file."""
-        sched = Schedule.from_json_string(self.extracted_schedule)
-        sched.to_icalendar_file(filepath)
+        with self.metrics.timer("validation_seconds"):
+            sched = Schedule.from_json_string(self.extracted_schedule)
+        with self.metrics.timer("serialization_seconds"):
+            sched.to_icalendar_file(filepath)
+        if Path(filepath).is_file():
+            self.metrics.add(bytes_written=Path(filepath).stat().st_size)
         del sched
 
     @staticmethod
@@ -249,5 +1431,4 @@ class OpenAISchedule:
 
 
 # TODO: Crew member names are captured, but not seniority and function.
-# TODO: Must be asynchronous somehow as OpenAI may take a while to respond.
 # TODO: Set all variables to Path in _init_ for OpenaiSchedule class (as opposed to str).
@@ -29,6 +29,39 @@ Always include all items in your output even if they are empty.
 """
 
 
+template_flight_schedule_slim = """
+Your task is to convert the information I will provide into a list of calendar events.
+
+The information contains a list of duties for an airline crew member. Duties consist of one or more flights. You will represent each duty as a calendar event.
+
+The section with Hotel Information contains no new events. Instead it contains the hotel at destination for some of the flights.
+
+Each event contains the following items:
+- Departure date in yyyy-mm-dd format
+- Departure time in HH:mm format
+- Duties which contains one or multiple flight numbers
+- Summary which contains the origin and departure airports
+- Origin airport code. Sometimes multiple flights exist. Capture all origin airports.
+- Destination airport code
+- Arrival date. A '+1' means the next day. Only capture yyyy-mm-dd format.
+- Arrival time, the last occurrence of a time for each day. A '+1' means the next day. Only capture HH:mm format.
+- List of crew members
+- A list of all times found. Only capture HH:mm format.
+- List of all airport codes.
+- Hotel information at destination. Obtain this from the document section 'Hotel Information'. It includes the name, full address and phone number of the hotel at destination. For some flights this does not exist. In that case keep this part empty.
+
+Only give the three letter airport codes, not the names or timezones of the airports.
+
+Always include all items in your output even if they are empty.
+"""
+
+
+template_airports = """
+Give the name and the IANA timezone (for example 'America/Toronto') of each of the airports with the following three letter IATA codes.
+
+Airport codes: {codes}
+"""
+
 template_hotel_contacts = """
 The provided document may contain a section with hotel information, base your answer on this section.
 
@@ -39,3 +72,12 @@ For each hotel, provide:
 
 If you cannot find any hotel contact information, return an empty list.
 """
+
+
+template_event_repair = """
+Some of the calendar events you extracted from the information above are not valid. These events are listed below, each with its validation errors.
+
+Extract only these events again, complete and valid. Always include all items, even if they are empty.
+
+Invalid events: {invalid}
+"""
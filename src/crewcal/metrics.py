@@ -0,0 +1,148 @@
+"""Timing, token and cost metrics of extraction runs.
+
+Each OpenAISchedule collects an ExtractionMetrics object while it works. When a run
+completes, the metrics are passed to all registered hooks, for example to write them
+as JSON lines or to ship them to a metrics collector.
+"""
+
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, PrivateAttr
+
+if TYPE_CHECKING:
+    from langchain.callbacks.openai_info import OpenAICallbackHandler
+
+MetricsHook = Callable[["ExtractionMetrics"], None]
+
+_hooks: list[MetricsHook] = []
+
+
+class ExtractionMetrics(BaseModel):
+    """Metrics of the extraction of a single schedule."""
+
+    source: str = ""
+    started_at: float = 0.0
+    # Name of the layout parser that read the schedule; empty if the LLM extracted it.
+    layout: str = ""
+    pdf_load_seconds: float = 0.0
+    page_count: int = 0
+    characters: int = 0
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    first_event_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    tokens_saved: int = 0
+    cache_hits: int = 0
+    hotel_index_hits: int = 0
+    retries: int = 0
+    failed_chunks: int = 0
+    events: int = 0
+    hotels: int = 0
+    validation_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+    bytes_written: int = 0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def add(self, **increments: float) -> None:
+        """Add to one or more of the metrics; safe to call from multiple threads.
+
+        Args:
+            **increments (float): Amount to add per metric, for example llm_calls=1.
+        """
+        with self._lock:
+            for name, amount in increments.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Add the time spent in the with block to the given metric.
+
+        Args:
+            name (str): Name of the metric, for example 'llm_seconds'.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(**{name: time.perf_counter() - started})
+
+    def add_llm_usage(self, callback: "OpenAICallbackHandler") -> None:
+        """Add the token usage and cost recorded by a langchain OpenAI callback handler.
+
+        Args:
+            callback: The handler returned by langchain's get_openai_callback().
+        """
+        self.add(
+            prompt_tokens=callback.prompt_tokens,
+            completion_tokens=callback.completion_tokens,
+            cost_usd=callback.total_cost,
+        )
+
+
+def add_metrics_hook(hook: MetricsHook) -> None:
+    """Register a function that is called with the metrics of every completed run.
+
+    Args:
+        hook (MetricsHook): Function accepting an ExtractionMetrics object.
+    """
+    _hooks.append(hook)
+
+
+def remove_metrics_hook(hook: MetricsHook) -> None:
+    """Unregister a function registered with add_metrics_hook().
+
+    Args:
+        hook (MetricsHook): The registered function.
+    """
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def emit_metrics(metrics: ExtractionMetrics) -> None:
+    """Pass the metrics of a completed run to all registered hooks.
+
+    Args:
+        metrics (ExtractionMetrics): The metrics.
+    """
+    for hook in _hooks.copy():
+        hook(metrics)
+
+
+class JsonLinesWriter:
+    """Metrics hook that appends the metrics of each run as a JSON line to a file."""
+
+    filename: str
+    _lock: threading.Lock
+
+    def __init__(self, filename: str) -> None:
+        """Sets up the writer.
+
+        Args:
+            filename (str): File to append to; '-' writes to standard output.
+        """
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics: ExtractionMetrics) -> None:
+        """Write the metrics.
+
+        Args:
+            metrics (ExtractionMetrics): The metrics.
+        """
+        line = metrics.model_dump_json() + "\n"
+        with self._lock:
+            if self.filename == "-":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            else:
+                with Path(self.filename).open("a") as outfile:
+                    outfile.write(line)
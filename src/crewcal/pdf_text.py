@@ -0,0 +1,99 @@
+"""Read the text of each page of a PDF file, in parallel and cached.
+
+Long rosters are parsed by a pool of (spawned) processes, each taking a range of pages.
+This is only done from the main thread: batch runs, the extraction service and combined
+extractions already read their PDFs on worker threads. The text of the pages is stored
+in the extraction cache, keyed by a hash of the file contents, so a PDF that was read
+before (by an earlier run, or by the other half of a combined run) is not parsed again.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import pypdf
+
+from crewcal.cache import ExtractionCache
+
+# Below this number of pages, starting worker processes costs more than it saves.
+PARALLEL_MIN_PAGES = 16
+# Changes whenever the way text is extracted changes, so that cached text is not reused.
+_PAGE_TEXT_VERSION = f"pypdf-{pypdf.__version__}"
+
+
+def file_hash(filepath: str) -> str:
+    """Hash of the contents of a file.
+
+    Args:
+        filepath (str): The path to the file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with Path(filepath).open("rb") as infile:
+        for block in iter(lambda: infile.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_page_range(filepath: str, start: int, stop: int) -> list[str]:
+    """The text of pages start up to stop; runs in a worker process."""
+    reader = pypdf.PdfReader(filepath)
+    return [reader.pages[number].extract_text() for number in range(start, stop)]
+
+
+def read_pdf_pages(
+    filepath: str,
+    cache: ExtractionCache | None = None,
+    processes: int | None = None,
+) -> list[str]:
+    """Read the text of each page of a PDF file.
+
+    The text is the same as that of langchain's PyPDFLoader.
+
+    Args:
+        filepath (str): The path to the PDF file.
+        cache (ExtractionCache, optional): Cache for the page text. Defaults to no caching.
+        processes (int, optional): Maximum number of worker processes. Defaults to the number
+            of CPUs; 1 reads the pages in the current process, as do calls from other threads
+            than the main thread.
+
+    Returns:
+        list[str]: The text of each page.
+    """
+    cache_key = ""
+    if cache is not None:
+        cache_key = cache.make_key("pdf-pages", _PAGE_TEXT_VERSION, file_hash(filepath))
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    page_count = len(pypdf.PdfReader(filepath).pages)
+    processes = min(processes or os.cpu_count() or 1, page_count)
+    # Worker threads are already running in parallel; more processes would oversubscribe the
+    # CPUs, and forking a process with several threads can deadlock.
+    if threading.current_thread() is not threading.main_thread():
+        processes = 1
+    if processes <= 1 or page_count < PARALLEL_MIN_PAGES:
+        pages = _read_page_range(filepath, 0, page_count)
+    else:
+        size = -(-page_count // processes)
+        starts = range(0, page_count, size)
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=get_context("spawn")
+        ) as executor:
+            ranges = executor.map(
+                _read_page_range,
+                [filepath] * len(starts),
+                starts,
+                [min(start + size, page_count) for start in starts],
+            )
+            pages = [page for page_range in ranges for page in page_range]
+
+    if cache is not None:
+        cache.set(cache_key, pages)
+    return pages
@@ -0,0 +1,377 @@
+"""Retries, circuit breaking and salvage of partial results for LLM calls.
+
+A slow or rate limited response should not stall or sink a whole extraction:
+- RetryPolicy: retries calls that failed for a transient reason (rate limit, timeout,
+  connection or server error) with exponential backoff and jitter, waiting as long as
+  the rate limit headers of the response ask for.
+- CircuitBreaker: shared by the extractions of a batch run. After a number of
+  consecutive transient failures it fails calls immediately for a while, instead of
+  letting every schedule wait through its own retries against an unavailable API.
+- parse_function_call_events(): reads the events from a function call response, keeping
+  the complete, valid events of a malformed or truncated response.
+
+Per-call deadlines are set on the backend (see OpenAIBackend's timeout_seconds); a call
+that times out is retried like any other transient failure.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+import openai
+from langchain.schema import BaseMessage
+from pydantic import BaseModel, ValidationError
+
+from crewcal.schedule import Event, iter_json_array
+
+T = TypeVar("T")
+
+# Errors worth retrying: the same request may well succeed a little later.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class PartialExtractionError(ValueError):
+    """An LLM response of which only part of the events could be used.
+
+    Attributes:
+        events (list[dict]): The valid events of the response.
+        invalid (list[tuple[Any, str]]): Each invalid event with its validation errors.
+        truncated (bool): Whether the response ended before the list of events did.
+    """
+
+    events: list[dict]
+    invalid: list[tuple[Any, str]]
+    truncated: bool
+
+    def __init__(
+        self,
+        events: list[dict],
+        invalid: list[tuple[Any, str]],
+        truncated: bool = False,
+    ) -> None:
+        """Sets up the error with the usable and the invalid parts of the response.
+
+        Args:
+            events (list[dict]): The valid events.
+            invalid (list[tuple[Any, str]]): Each invalid event with its validation errors.
+            truncated (bool, optional): Whether the response was cut short.
+        """
+        super().__init__(
+            f"{len(invalid)} invalid events"
+            + (", response truncated" if truncated else "")
+            + f"; {len(events)} valid events kept."
+        )
+        self.events = events
+        self.invalid = invalid
+        self.truncated = truncated
+
+
+class CircuitBreaker:
+    """Stops calls to the LLM for a while after a run of transient failures.
+
+    The breaker is closed (calls pass) until failure_threshold consecutive failures are
+    recorded. It then opens: calls fail immediately with CircuitOpenError. After
+    reset_seconds a single trial call is let through; the breaker closes if it succeeds
+    and opens again if it fails. Safe to share between threads.
+    """
+
+    failure_threshold: int
+    reset_seconds: float
+    _failures: int
+    _opened_at: float | None
+    _trial_running: bool
+    _lock: threading.Lock
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 60.0) -> None:
+        """Sets up a closed breaker.
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the breaker.
+            reset_seconds (float, optional): Time the breaker stays open before a trial call.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being stopped."""
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Check whether a call may go ahead.
+
+        Returns:
+            bool: False while the breaker is open, except for the trial call after reset_seconds.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call; this closes the breaker."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Record a call that failed for a transient reason."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logging.warning(
+                        f"{self._failures} LLM calls failed in a row, pausing calls "
+                        f"for {self.reset_seconds:.0f}s."
+                    )
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class RetryPolicy:
+    """When and after how long failed LLM calls are retried."""
+
+    max_retries: int
+    backoff_seconds: float
+    max_backoff_seconds: float
+    circuit_breaker: CircuitBreaker | None
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 60.0,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        """Sets up the policy.
+
+        Args:
+            max_retries (int, optional): Retries after the first attempt of a call.
+            backoff_seconds (float, optional): Initial delay for the exponential backoff.
+            max_backoff_seconds (float, optional): Longest delay between attempts.
+            circuit_breaker (CircuitBreaker, optional): Breaker shared by the calls of a run.
+                Defaults to no breaker.
+        """
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.circuit_breaker = circuit_breaker
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """Whether an error is transient, so that the call is worth retrying.
+
+        Args:
+            error (BaseException): The error raised by the call.
+
+        Returns:
+            bool: True for rate limits, timeouts, connection and server errors.
+        """
+        return isinstance(error, RETRYABLE_ERRORS)
+
+    @staticmethod
+    def retry_after(error: BaseException) -> float | None:
+        """The delay asked for by the 'retry-after' headers of an API error response.
+
+        Args:
+            error (BaseException): The error raised by the call.
+
+        Returns:
+            float: Seconds to wait, or None if the response does not say.
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                value = headers["retry-after"]
+                try:
+                    return float(value)
+                except ValueError:
+                    return parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    def delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """Seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure).
+            error (BaseException, optional): The error of the last attempt.
+
+        Returns:
+            float: The delay, as asked for by the response, or an exponential backoff with jitter.
+        """
+        retry_after = self.retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_backoff_seconds)
+
+        delay = self.backoff_seconds * 2 ** (attempt - 1)
+        delay += random.uniform(0, delay)  # noqa: S311
+        return min(delay, self.max_backoff_seconds)
+
+    def check_circuit(self) -> None:
+        """Raise CircuitOpenError if the circuit breaker stops calls."""
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+            msg = "LLM calls paused after repeated failures (circuit breaker open)."
+            raise CircuitOpenError(msg)
+
+    def record(self, outcome: object) -> None:
+        """Record the outcome of a call (a result or an exception) in the circuit breaker.
+
+        Args:
+            outcome (object): The result of the call, or the exception it raised.
+        """
+        if self.circuit_breaker is None:
+            return
+        if isinstance(outcome, BaseException):
+            if self.is_retryable(outcome):
+                self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    def call(
+        self,
+        function: Callable[..., T],
+        *args: object,
+        on_retry: Callable[[BaseException, float], None] | None = None,
+        **kwargs: object,
+    ) -> T:
+        """Call a function, retrying it according to this policy.
+
+        Args:
+            function (Callable): The function.
+            *args (object): Its positional arguments.
+            on_retry (Callable, optional): Called with the error and the delay before each retry.
+                Defaults to logging a warning.
+            **kwargs (object): Its keyword arguments.
+
+        Returns:
+            T: The result of the function.
+        """
+        attempt = 0
+        while True:
+            self.check_circuit()
+            attempt += 1
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                self.record(e)
+                if not self.is_retryable(e) or attempt > self.max_retries:
+                    raise
+                delay = self.delay(attempt, e)
+                if on_retry is not None:
+                    on_retry(e, delay)
+                else:
+                    logging.warning(
+                        f"{type(e).__name__} from the LLM, retrying in {delay:.1f}s."
+                    )
+                time.sleep(delay)
+            else:
+                self.record(result)
+                return result
+
+
+def _salvage_json_array(text: str) -> tuple[list, bool]:
+    """The complete items of the first JSON array in text, and whether it is cut short."""
+    items = []
+    try:
+        # Appended one by one, to keep the items before a fault.
+        for item in iter_json_array([text], strict=False):
+            items.append(item)  # noqa: PERF402
+    except ValueError:
+        # json.JSONDecodeError is a ValueError too.
+        return items, True
+    return items, False
+
+
+def parse_function_call_events(
+    message: BaseMessage,
+    key_name: str = "events",
+    model: type[BaseModel] = Event,
+) -> list[dict]:
+    """The events in the function call arguments of an LLM response.
+
+    When the arguments are not valid json, for example because the response was cut
+    short, the complete events before the fault are salvaged. Control characters inside
+    strings are accepted, as LLMs tend to put raw new lines in them. Each event is
+    validated.
+
+    Args:
+        message (BaseMessage): The response, with a function call.
+        key_name (str, optional): Key of the list of events in the arguments.
+        model (Type[BaseModel], optional): The model each event is validated with.
+            Defaults to Event.
+
+    Raises:
+        PartialExtractionError: Some events are invalid, or the response was truncated.
+            The error holds the valid events.
+        ValueError: The response has no function call, or its arguments have no list of
+            events.
+
+    Returns:
+        list[dict]: The events, as returned by the LLM.
+    """
+    function_call = getattr(message, "additional_kwargs", {}).get("function_call")
+    if not function_call:
+        msg = "The LLM response has no function call."
+        raise ValueError(msg)
+    arguments = function_call.get("arguments", "")
+
+    truncated = False
+    try:
+        parsed = json.loads(arguments, strict=False)
+    except json.JSONDecodeError:
+        items, truncated = _salvage_json_array(arguments)
+        if not items and truncated:
+            msg = "The LLM response holds no list of events."
+            raise ValueError(msg) from None
+    else:
+        items = parsed.get(key_name) if isinstance(parsed, dict) else None
+        if not isinstance(items, list):
+            msg = f"The LLM response has no '{key_name}' list."
+            raise ValueError(msg)  # noqa: TRY004
+
+    events = []
+    invalid = []
+    for item in items:
+        try:
+            model.model_validate(item)
+        except ValidationError as e:
+            invalid.append((item, str(e)))
+        else:
+            events.append(item)
+
+    if invalid or truncated:
+        raise PartialExtractionError(events, invalid, truncated)
+    return events
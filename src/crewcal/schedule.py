@@ -5,13 +5,55 @@ The schedule is a list of events, each of which contains the details of a set of
 """
 
 import json
-import logging
+import os
+import re
+import uuid
+from array import array
+from collections.abc import Iterable, Iterator
+from functools import cache
 from pathlib import Path
-from typing import List
+from typing import Any, List, TextIO
 
 import ics
 import pendulum
-from pydantic import BaseModel, Field, TypeAdapter
+from pendulum.tz.timezone import Timezone
+from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
+
+CALENDAR_CREATOR = "Ternyx - crewcal"
+# Namespace for the deterministic event UIDs.
+UID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "crewcal")
+
+# Dates and times as extracted, for example '2023-10-31' and '14:05'.
+_DATE_TIME = re.compile(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2})")
+
+
+@cache
+def _timezone(name: str) -> Timezone:
+    """The (shared) timezone object for a zone name such as 'America/Toronto'."""
+    return pendulum.timezone(name)
+
+
+def to_datetime(date: str, time: str, timezone: str) -> pendulum.DateTime:
+    """Create a timezone aware datetime from a date and time as they appear in events.
+
+    Equivalent to pendulum.from_format(f"{date} {time}", "YYYY-MM-DD HH:mm", tz=timezone),
+    but several times faster: the common format is parsed with a precompiled expression and
+    timezone objects are created once per zone name.
+
+    Args:
+        date (str): Date, for example '2023-10-31'.
+        time (str): Local time, for example '14:05'.
+        timezone (str): Zone name, for example 'America/Toronto'.
+
+    Returns:
+        pendulum.DateTime: The datetime.
+    """
+    date_time = f"{date} {time}"
+    match = _DATE_TIME.fullmatch(date_time)
+    if not match:
+        return pendulum.from_format(date_time, "YYYY-MM-DD HH:mm", tz=timezone)
+    year, month, day, hour, minute = map(int, match.groups())
+    return pendulum.datetime(year, month, day, hour, minute, tz=_timezone(timezone))
 
 
 class Event(BaseModel):
@@ -35,6 +77,22 @@ class Event(BaseModel):
     list_airport_codes: List[str]
     hotel_information: str
 
+    # Begin and end datetimes, each with the (date, time, timezone) they were created from.
+    _instants: dict[str, tuple[tuple[str, str, str], pendulum.DateTime]] = PrivateAttr(
+        default_factory=dict
+    )
+
+    def _instant(
+        self, name: str, date: str, time: str, timezone: str
+    ) -> pendulum.DateTime:
+        """Datetime from date, time and timezone, memoised until any of these change."""
+        key = (date, time, timezone)
+        memo = self._instants.get(name)
+        if memo is None or memo[0] != key:
+            memo = (key, to_datetime(date, time, timezone))
+            self._instants[name] = memo
+        return memo[1]
+
     def list_airport_pairs(self):
         """Generate a formatted string of airport pairs."""
         airport_pairs = zip(
@@ -66,10 +124,8 @@ class Event(BaseModel):
         Returns:
             datetime: start datetime
         """
-        return pendulum.from_format(
-            f"{self.starting_date} {self.starting_time}",
-            "YYYY-MM-DD HH:mm",
-            tz=self.departure_timezone[0],
+        return self._instant(
+            "begin", self.starting_date, self.starting_time, self.departure_timezone[0]
         )
 
     def get_end(self):
@@ -78,35 +134,343 @@ class Event(BaseModel):
         Returns:
             datetime: end datetime
         """
-        return pendulum.from_format(
-            f"{self.end_date} {self.list_times[-1]}",
-            "YYYY-MM-DD HH:mm",
-            tz=self.destination_timezone[-1],
+        return self._instant(
+            "end", self.end_date, self.list_times[-1], self.destination_timezone[-1]
         )
 
+    def get_duty_key(self) -> tuple[str, ...]:
+        """Get the key identifying the duty: its flight numbers and departure instant.
+
+        Events of different rosters with the same key are the same duty.
+
+        Returns:
+            tuple[str, ...]: The flight numbers, followed by the departure instant in UTC.
+        """
+        return (*self.duties, self.get_begin().in_timezone("UTC").isoformat())
+
+    def get_uid(self):
+        """Get a stable unique identifier of the flight event.
+
+        The identifier is derived from the flight numbers and the departure instant,
+        so that the same duty gets the same UID in every export.
+
+        Returns:
+            str: UID
+        """
+        duty_key = "|".join(self.get_duty_key())
+        return f"{uuid.uuid5(UID_NAMESPACE, duty_key)}@crewcal"
+
+    def to_icalendar_event(self):
+        """Generates the iCalendar representation of the flight event.
+
+        Returns:
+            ics.Event: The iCalendar event.
+        """
+        return ics.Event(
+            name=self.summary,
+            description=self.get_description(),
+            begin=self.get_begin(),
+            end=self.get_end(),
+            uid=self.get_uid(),
+        )
+
+
+# Creating a TypeAdapter is expensive; create it once.
+_EVENTS_ADAPTER = TypeAdapter(list[Event])
+_JSON_DELIMITERS = frozenset(" \t\r\n,]")
+
+
+class SlimEvent(BaseModel):
+    """An event as extracted in slim mode: with airport codes, but no names and timezones.
+
+    The names and timezones are filled in from the airport table afterwards, see
+    crewcal.airports.enrich_events().
+    """
+
+    starting_date: str
+    starting_time: str
+    duties: list[str]
+    summary: str
+    description: str
+    departure_airport: list[str]
+    destination_airport: list[str]
+    end_date: str
+    end_time: str
+    crew_list: list[str]
+    list_times: list[str]
+    list_airport_codes: list[str]
+    hotel_information: str
+
+
+class SlimSchedule(BaseModel):
+    """A flight schedule for an airline crew member, as extracted in slim mode."""
+
+    events: list[SlimEvent]
+
+
+class JsonArrayParser:
+    """Incremental parser of the items of a JSON array, for text that arrives in chunks.
+
+    Pass each chunk to feed() and consume the items it returns before feeding the next
+    one; call close() after the last chunk. Text before the opening bracket is skipped, so
+    the array may also be the first value inside an object, as in '{"events": [...]}'.
+    Only the item being parsed is held in memory.
+    """
+
+    complete: bool
+
+    def __init__(self, strict: bool = True) -> None:
+        """Sets up the parser, waiting for the opening bracket.
+
+        Args:
+            strict (bool, optional): Reject control characters, such as new lines, inside
+                strings; as for json.loads(). Defaults to True.
+        """
+        self.complete = False
+        self._decoder = json.JSONDecoder(strict=strict)
+        self._buffer = ""
+        self._position = 0
+        self._started = False
+
+    def feed(self, chunk: str) -> Iterator[Any]:
+        """Add the next chunk of text.
+
+        Args:
+            chunk (str): The text.
+
+        Returns:
+            Iterator[Any]: The items completed by the chunk.
+        """
+        if not self.complete:
+            self._buffer = self._buffer[self._position :] + chunk
+            self._position = 0
+        return self._items(at_end=False)
+
+    def close(self) -> Iterator[Any]:
+        """Mark the end of the text.
+
+        Yields:
+            Any: The items completed by the end of the text.
+
+        Raises:
+            ValueError: The text does not contain a (complete) JSON array.
+        """
+        yield from self._items(at_end=True)
+        if not self.complete:
+            msg = (
+                "Unterminated JSON array." if self._started else "No JSON array found."
+            )
+            raise ValueError(msg)
+
+    def _items(self, at_end: bool) -> Iterator[Any]:
+        """Parse the complete items in the buffer."""
+        buffer = self._buffer
+        while not self.complete:
+            if not self._started:
+                start = buffer.find("[", self._position)
+                if start < 0:
+                    self._position = len(buffer)
+                    return
+                self._position, self._started = start + 1, True
+            self._position = _skip_separators(buffer, self._position)
+            if self._position == len(buffer):
+                return
+            if buffer[self._position] == "]":
+                self.complete = True
+                return
+            try:
+                item, end = self._decoder.raw_decode(buffer, self._position)
+            except json.JSONDecodeError:
+                if at_end:
+                    raise
+                return
+            # An item is complete once followed by a delimiter; the number '4' may become '4.5'.
+            if not at_end and buffer[end : end + 1] not in _JSON_DELIMITERS:
+                return
+            self._position = end
+            yield item
+
+
+def iter_json_array(chunks: Iterable[str], strict: bool = True) -> Iterator[Any]:
+    """Parse the items of a JSON array incrementally, while its text arrives in chunks.
+
+    Text before the opening bracket is skipped, so the array may also be the first value
+    inside an object, as in '{"events": [...]}'. Only the item being parsed is held in memory.
+    See JsonArrayParser for text arriving asynchronously.
+
+    Args:
+        chunks (Iterable[str]): The text, in pieces of any size.
+        strict (bool, optional): Reject control characters, such as new lines, inside
+            strings; as for json.loads(). Defaults to True.
+
+    Yields:
+        Any: Each item of the array, as soon as it is complete.
+
+    Raises:
+        ValueError: The text does not contain a (complete) JSON array.
+    """
+    parser = JsonArrayParser(strict=strict)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.complete:
+            return
+    yield from parser.close()
+
+
+def _skip_separators(buffer: str, position: int) -> int:
+    """Position of the first character from position on that is not whitespace or a comma."""
+    while position < len(buffer) and buffer[position] in " \t\r\n,":
+        position += 1
+    return position
+
+
+def iter_json_events(filename: str, chunk_size: int = 1 << 16) -> Iterator[Event]:
+    """Load flight events from a JSON file one at a time.
+
+    Memory use does not grow with the size of the file, so this suits schedules too large
+    to load with Schedule.from_json(). Combine with write_icalendar() to convert such a file.
+
+    Args:
+        filename (str): The path of the JSON file.
+        chunk_size (int, optional): Number of characters read at a time.
+
+    Yields:
+        Event: Each event, validated.
+    """
+    with Path(filename).open("r") as infile:
+        for item in iter_json_array(iter(lambda: infile.read(chunk_size), "")):
+            yield Event.model_validate(item)
+
+
+@cache
+def calendar_frame(creator: str = CALENDAR_CREATOR) -> tuple[str, str]:
+    """The text before and after the events of an iCalendar file.
+
+    Taken from ics itself, so that calendars written piecemeal stay compatible.
+
+    Args:
+        creator (str, optional): PRODID of the calendar.
+
+    Returns:
+        tuple[str, str]: The header and the footer.
+    """
+    header, footer = ics.Calendar(creator=creator).serialize().rsplit("\r\n", 1)
+    return header, footer
+
+
+def write_icalendar(
+    events: Iterable[Event], file: TextIO, creator: str = CALENDAR_CREATOR
+) -> int:
+    """Write an iCalendar file, streaming the events one at a time.
+
+    Each VEVENT block is written as soon as its event is produced, so memory use does not
+    grow with the number of events. The output matches ics.Calendar.serialize().
+
+    Args:
+        events (Iterable[Event]): The events, for example a generator.
+        file (TextIO): Open file (or other text stream) to write to.
+        creator (str, optional): PRODID of the calendar.
+
+    Returns:
+        int: Number of characters written.
+    """
+    header, footer = calendar_frame(creator)
+    written = file.write(header)
+    for event in events:
+        written += file.write("\r\n")
+        written += file.write(event.to_icalendar_event().serialize())
+    written += file.write("\r\n")
+    written += file.write(footer)
+    return written
+
+
+def write_icalendar_file(
+    events: Iterable[Event], filename: str, creator: str = CALENDAR_CREATOR
+) -> None:
+    """Write an iCalendar file, streaming the events one at a time (see write_icalendar()).
+
+    The calendar is written under a temporary name and renamed when complete, so an error
+    part way leaves an existing file as it was.
+
+    Args:
+        events (Iterable[Event]): The events, for example a generator.
+        filename (str): The name of the file.
+        creator (str, optional): PRODID of the calendar.
+    """
+    path = Path(filename)
+    tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w") as file:
+            write_icalendar(events, file, creator)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+class ScheduleInstants:
+    """The begin and end instants of all events of a schedule, as arrays.
+
+    Instants are in epoch seconds; the timezone of each instant is an index into zones.
+    """
+
+    zones: list[str]
+    begin: array
+    begin_zone: array
+    end: array
+    end_zone: array
+
+    def __init__(self) -> None:
+        """Sets up empty arrays."""
+        self.zones = []
+        self.begin = array("q")
+        self.begin_zone = array("H")
+        self.end = array("q")
+        self.end_zone = array("H")
+
+    def __len__(self) -> int:
+        """Number of events."""
+        return len(self.begin)
+
 
 class Schedule(BaseModel):
     """A flight schedule for an airline crew member."""
 
     events: List[Event]
 
+    def resolve_instants(self) -> ScheduleInstants:
+        """Resolve the begin and end instants of all events in one pass.
+
+        The datetimes are memoised on the events, so that calendar generation afterwards
+        does not parse them again.
+
+        Returns:
+            ScheduleInstants: Begin and end of each event, in the order of the events.
+        """
+        instants = ScheduleInstants()
+        zone_ids: dict[str, int] = {}
+
+        def zone_id(name: str) -> int:
+            if name not in zone_ids:
+                zone_ids[name] = len(instants.zones)
+                instants.zones.append(name)
+            return zone_ids[name]
+
+        for event in self.events:
+            instants.begin.append(event.get_begin().int_timestamp)
+            instants.begin_zone.append(zone_id(event.departure_timezone[0]))
+            instants.end.append(event.get_end().int_timestamp)
+            instants.end_zone.append(zone_id(event.destination_timezone[-1]))
+        return instants
+
     def to_icalendar(self):
         """Generates a iCalendar representation of the schedule.
 
         Returns:
             ics.Calendar: The iCalendar object containing the events.
         """
-        calendar = ics.Calendar(creator="Ternyx - crewcal")
+        calendar = ics.Calendar(creator=CALENDAR_CREATOR)
 
-        events = [
-            ics.Event(
-                name=flight.summary,
-                description=flight.get_description(),
-                begin=flight.get_begin(),
-                end=flight.get_end(),
-            )
-            for flight in self.events
-        ]
+        events = [flight.to_icalendar_event() for flight in self.events]
 
         calendar.events.update(events)
 
@@ -115,14 +479,20 @@ class Schedule(BaseModel):
     def to_icalendar_file(self, filename: str) -> None:
         """Write the iCalendar representation of the schedule to a file.
 
+        The file is only replaced once the calendar is complete, see write_icalendar_file().
+
         Parameters:
             filename (str): The name of the file to write the iCalendar data to.
         """
-        try:
-            with Path(filename).open("w") as f:
-                f.write(self.to_icalendar().serialize())
-        except Exception as e:
-            logging.warning(f"Error writing to file: {e}")
+        write_icalendar_file(self.events, filename)
+
+    def to_json_file(self, filename: str) -> None:
+        """Write the schedule to a crewcal json schedule file: a list of the events.
+
+        Parameters:
+            filename (str): The name of the file to write the events to.
+        """
+        Path(filename).write_bytes(_EVENTS_ADAPTER.dump_json(self.events, indent=2))
 
     def json_dumps(self, indent=2):
         """Show the schedule as a JSON string.
@@ -135,6 +505,39 @@ class Schedule(BaseModel):
         """
         return json.dumps(self.model_dump(mode="json"), indent=indent)
 
+    @staticmethod
+    def merge(schedules: Iterable["Schedule"]) -> "Schedule":
+        """Combine schedules, for example the rosters of several crew members, into one.
+
+        Events of the same duty (see Event.get_duty_key()) are combined into a single event
+        listing the crew of all of them; other fields are taken from the first occurrence.
+        Duties are found with a hash index, so the time taken grows linearly with the total
+        number of events. The schedules passed in are not modified.
+
+        Args:
+            schedules (Iterable[Schedule]): The schedules.
+
+        Returns:
+            Schedule: The combined schedule, with the events ordered by departure.
+        """
+        merged: dict[tuple[str, ...], Event] = {}
+        crew_lists: dict[tuple[str, ...], dict[str, None]] = {}
+        for schedule in schedules:
+            for event in schedule.events:
+                key = event.get_duty_key()
+                if key not in merged:
+                    merged[key] = event
+                    crew_lists[key] = {}
+                # A dict keeps the crew members in order of appearance, without duplicates.
+                crew_lists[key].update(dict.fromkeys(event.crew_list))
+
+        events = [
+            event.model_copy(update={"crew_list": list(crew_lists[key])})
+            for key, event in merged.items()
+        ]
+        events.sort(key=lambda event: (event.get_begin(), event.duties))
+        return Schedule(events=events)
+
     @staticmethod
     def from_json(filename: str = "./etc/sched.json") -> "Schedule":
         """Load flight events from a JSON file and create a schedule.
@@ -145,23 +548,23 @@ class Schedule(BaseModel):
         Returns:
             Schedule: A Schedule object containing the schedule of flights.
         """
-        with Path(filename).open("r") as openfile:
-            events_from_file = json.load(openfile)
-
-        adapter = TypeAdapter(List[Event])
-        events = adapter.validate_python(events_from_file)
+        # Validating the raw bytes skips building intermediate Python objects.
+        events = _EVENTS_ADAPTER.validate_json(Path(filename).read_bytes())
         return Schedule(events=events)
 
     @staticmethod
-    def from_json_string(json_string: str) -> "Schedule":
+    def from_json_string(json_string: str | bytes | list[dict]) -> "Schedule":
         """Load flight events from a JSON string and create a schedule.
 
         Args:
-            json_string (str): The events in JSON format.
+            json_string (str | bytes | list[dict]): The events in JSON format, or already
+                decoded from JSON (as in OpenAISchedule.extracted_schedule).
 
         Returns:
             Schedule: A Schedule object containing the schedule of flights.
         """
-        adapter = TypeAdapter(List[Event])
-        events = adapter.validate_python(json_string)
+        if isinstance(json_string, (str, bytes, bytearray)):
+            events = _EVENTS_ADAPTER.validate_json(json_string)
+        else:
+            events = _EVENTS_ADAPTER.validate_python(json_string)
         return Schedule(events=events)
@@ -0,0 +1,337 @@
+"""Long-running local extraction service with a job queue.
+
+'crewcal serve' starts an HTTP server on localhost. Schedules are uploaded as PDF and
+queued; a pool of worker threads extracts them. The service process keeps the LLM
+client (with its connection pool), the imported libraries and the caches warm, so the
+cost per job is just parsing the PDF and the LLM call.
+
+Endpoints:
+- POST /jobs?format=ics|json|vcard[&wait=1]: upload a PDF (the request body). Returns the
+  job status, or with wait=1 the result once ready.
+- GET /jobs/<id>: job status.
+- GET /jobs/<id>/result: the result of a completed job.
+- GET /health: number of queued jobs and workers.
+"""
+
+import json
+import logging
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from pydantic import BaseModel, PrivateAttr
+
+from crewcal.backends import LLMBackend, OpenAIBackend
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.resilience import CircuitBreaker, RetryPolicy
+
+CONTENT_TYPES = {
+    "ics": "text/calendar; charset=utf-8",
+    "json": "application/json",
+    "vcard": "text/vcard; charset=utf-8",
+}
+
+
+class Job(BaseModel):
+    """An extraction requested from the service."""
+
+    id: str
+    format: str
+    status: str = "queued"  # one of: queued, running, done, failed
+    error: str = ""
+    created_at: float = 0.0
+    seconds: float = 0.0
+
+    _pdf: bytes = PrivateAttr(default=b"")
+    _result: bytes = PrivateAttr(default=b"")
+    _finished: threading.Event = PrivateAttr(default_factory=threading.Event)
+
+    @property
+    def result(self) -> bytes:
+        """The extracted schedule (or vCards) in the requested format."""
+        return self._result
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until the job has completed.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to no limit.
+
+        Returns:
+            bool: Whether the job has completed.
+        """
+        return self._finished.wait(timeout)
+
+
+class ExtractionService:
+    """Queue of extraction jobs, worked on by a pool of threads."""
+
+    backend: LLMBackend
+    workers: int
+    use_cache: bool
+    max_jobs: int
+    retry_policy: RetryPolicy
+    _jobs: "OrderedDict[str, Job]"
+    _queue: "queue.Queue[Job | None]"
+    _threads: list[threading.Thread]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        backend: LLMBackend | None = None,
+        workers: int = 2,
+        use_cache: bool = True,
+        max_jobs: int = 1000,
+    ) -> None:
+        """Sets up the service; call start() to start the workers.
+
+        Args:
+            backend (LLMBackend, optional): The LLM backend, shared by all jobs. Defaults to OpenAI.
+            workers (int, optional): Number of jobs worked on at the same time.
+            use_cache (bool, optional): Reuse earlier LLM results for identical input.
+            max_jobs (int, optional): Number of jobs remembered; the oldest completed ones are dropped.
+        """
+        self.backend = backend or OpenAIBackend()
+        self.workers = workers
+        self.use_cache = use_cache
+        self.max_jobs = max_jobs
+        # Shared by all jobs, so that an unavailable LLM fails jobs fast instead of piling them up.
+        self.retry_policy = RetryPolicy(circuit_breaker=CircuitBreaker())
+        self._jobs = OrderedDict()
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for _ in range(max(1, self.workers)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Let the workers finish the job they are working on, then stop them."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, pdf: bytes, format: str = "ics") -> Job:  # noqa: A002
+        """Queue the extraction of a schedule.
+
+        Args:
+            pdf (bytes): Contents of the PDF file.
+            format (str, optional): Result format: 'ics', 'json' or 'vcard' (hotel contacts).
+
+        Returns:
+            Job: The queued job.
+        """
+        if format not in CONTENT_TYPES:
+            msg = f"Unknown format '{format}', expected one of {list(CONTENT_TYPES)}."
+            raise ValueError(msg)
+
+        job = Job(id=uuid.uuid4().hex, format=format, created_at=time.time())
+        job._pdf = pdf
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Look up a job.
+
+        Args:
+            job_id (str): Id of the job.
+
+        Returns:
+            Job: The job, or None if unknown.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest completed jobs while more than max_jobs are remembered."""
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.wait(0)]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
+
+    def _work(self) -> None:
+        """Work on queued jobs until stopped."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        """Extract the schedule of a job."""
+        started = time.perf_counter()
+        job.status = "running"
+        try:
+            with tempfile.TemporaryDirectory(prefix="crewcal-") as folder:
+                pdf_path = Path(folder) / "schedule.pdf"
+                pdf_path.write_bytes(job._pdf)
+                job._result = self._extract(str(pdf_path), job.format)
+            job.status = "done"
+        except Exception as e:
+            logging.warning(f"Error extracting job {job.id}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job._pdf = b""
+            job.seconds = time.perf_counter() - started
+            job._finished.set()
+
+    def _extract(self, pdf_path: str, format: str) -> bytes:  # noqa: A002
+        """Extract a schedule and return it in the requested format."""
+        sched = OpenAISchedule(
+            pdf_path,
+            use_cache=self.use_cache,
+            backend=self.backend,
+            retry_policy=self.retry_policy,
+        )
+        folder = Path(pdf_path).parent
+        if format == "vcard":
+            sched.extract_hotels(folder / "hotels")
+            result = "".join(
+                path.read_text() for path in sorted((folder / "hotels").glob("*.vcf"))
+            ).encode("utf-8")
+        else:
+            sched.extract()
+            if format == "json":
+                result = json.dumps(sched.extracted_schedule).encode("utf-8")
+            else:
+                sched.write_icalendar(str(folder / "schedule.ics"))
+                result = (folder / "schedule.ics").read_bytes()
+        sched.emit_metrics()
+        return result
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Maps the HTTP endpoints onto the extraction service."""
+
+    service: ExtractionService
+    max_upload_bytes: int
+
+    def do_GET(self) -> None:
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if parts == ["health"]:
+            self._send_json(
+                HTTPStatus.OK,
+                {
+                    "status": "ok",
+                    "queued": self.service.queued,
+                    "workers": self.service.workers,
+                },
+            )
+            return
+
+        if len(parts) not in (2, 3) or parts[0] != "jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found."})
+            return
+
+        job = self.service.get(parts[1])
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Unknown job."})
+        elif len(parts) == 2:
+            self._send_json(HTTPStatus.OK, job.model_dump())
+        elif parts[2] == "result":
+            self._send_result(job)
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found."})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found."})
+            return
+
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Upload a PDF file."})
+            return
+        if length > self.max_upload_bytes:
+            self._send_json(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "PDF file too large."}
+            )
+            return
+
+        pdf = self.rfile.read(length)
+        try:
+            job = self.service.submit(pdf, query.get("format", ["ics"])[0])
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+
+        if query.get("wait", ["0"])[0] in ("1", "true", "yes"):
+            job.wait()
+            self._send_result(job)
+        else:
+            self._send_json(HTTPStatus.ACCEPTED, job.model_dump())
+
+    def _send_result(self, job: Job) -> None:
+        if job.status == "failed":
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, job.model_dump())
+        elif job.status != "done":
+            self._send_json(HTTPStatus.CONFLICT, job.model_dump())
+        else:
+            self._send(HTTPStatus.OK, job.result, CONTENT_TYPES[job.format])
+
+    def _send_json(self, status: HTTPStatus, content: dict) -> None:
+        self._send(status, json.dumps(content).encode("utf-8"), "application/json")
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+def make_server(
+    service: ExtractionService,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    max_upload_bytes: int = 20 * 1024 * 1024,
+) -> ThreadingHTTPServer:
+    """Create the HTTP server of an extraction service.
+
+    Sample use:
+    - service = ExtractionService(workers=4)
+    - service.start()
+    - make_server(service).serve_forever()
+
+    Args:
+        service (ExtractionService): The service; its workers must be started separately.
+        host (str, optional): Address to listen on. Defaults to localhost only.
+        port (int, optional): Port to listen on; 0 picks a free port.
+        max_upload_bytes (int, optional): Largest PDF accepted.
+
+    Returns:
+        ThreadingHTTPServer: The server.
+    """
+    handler = type(
+        "RequestHandler",
+        (_RequestHandler,),
+        {"service": service, "max_upload_bytes": max_upload_bytes},
+    )
+    return ThreadingHTTPServer((host, port), handler)
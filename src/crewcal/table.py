@@ -0,0 +1,294 @@
+"""Compact columnar representation of (large) flight schedules.
+
+A Schedule holds a pydantic Event, with about ten lists of strings, per duty. A
+ScheduleTable holds the same data as columns of integer arrays instead: every distinct
+string (airport code, timezone name, crew member, time, ...) is stored once in a string
+pool, and list fields are stored flattened, with an array of the length of the list of
+each event. This takes a fraction of the memory, which matters when the rosters
+of an entire base are loaded for analysis.
+"""
+
+import typing
+from array import array
+from collections.abc import Iterable, Iterator
+
+from crewcal.schedule import Event, Schedule
+
+# Event fields holding a single string, and fields holding a list of strings.
+SCALAR_COLUMNS = [
+    name for name, field in Event.model_fields.items() if field.annotation is str
+]
+LIST_COLUMNS = [
+    name
+    for name, field in Event.model_fields.items()
+    if typing.get_origin(field.annotation) is list
+]
+
+
+class StringPool:
+    """Stores each distinct string once; strings are referred to by their index."""
+
+    values: list[str]
+    _ids: dict[str, int]
+
+    def __init__(self) -> None:
+        """Sets up an empty pool."""
+        self.values = []
+        self._ids = {}
+
+    def add(self, value: str) -> int:
+        """Add a string to the pool, if not present yet.
+
+        Args:
+            value (str): The string.
+
+        Returns:
+            int: Index of the string in the pool.
+        """
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+    def find(self, value: str) -> int:
+        """Index of a string in the pool.
+
+        Args:
+            value (str): The string.
+
+        Returns:
+            int: Index of the string, or -1 if it is not in the pool.
+        """
+        return self._ids.get(value, -1)
+
+
+class ScheduleTable:
+    """Columnar (struct of arrays) representation of the events of a schedule.
+
+    Build with from_schedule() or from_events(). Tables created by filtering share the
+    string pool of the table they were created from.
+    """
+
+    pool: StringPool
+    scalars: dict[str, array]
+    lists: dict[str, array]
+    lengths: dict[str, array]
+    _offsets: dict[str, array]
+
+    def __init__(self, pool: StringPool | None = None) -> None:
+        """Sets up an empty table.
+
+        Args:
+            pool (StringPool, optional): String pool to use. Defaults to a new, empty pool.
+        """
+        self.pool = pool or StringPool()
+        self.scalars = {name: array("I") for name in SCALAR_COLUMNS}
+        self.lists = {name: array("I") for name in LIST_COLUMNS}
+        self.lengths = {name: array("H") for name in LIST_COLUMNS}
+        self._offsets = {}
+
+    @staticmethod
+    def from_events(events: Iterable[Event | dict]) -> "ScheduleTable":
+        """Create a table from events.
+
+        Events in crewcal json format (dicts) are validated one at a time, so a large json
+        schedule can be loaded without holding all its Event objects in memory.
+
+        Args:
+            events (Iterable[Event | dict]): The events.
+
+        Returns:
+            ScheduleTable: The table.
+        """
+        table = ScheduleTable()
+        for event in events:
+            table.append(event)
+        return table
+
+    @staticmethod
+    def from_schedule(schedule: Schedule) -> "ScheduleTable":
+        """Create a table from the events of a schedule.
+
+        Args:
+            schedule (Schedule): The schedule.
+
+        Returns:
+            ScheduleTable: The table.
+        """
+        return ScheduleTable.from_events(schedule.events)
+
+    def append(self, event: Event | dict) -> None:
+        """Add an event at the end of the table.
+
+        Args:
+            event (Event | dict): The event, as Event or in crewcal json format.
+        """
+        if not isinstance(event, Event):
+            event = Event.model_validate(event)
+        add = self.pool.add
+        for name in SCALAR_COLUMNS:
+            self.scalars[name].append(add(getattr(event, name)))
+        for name in LIST_COLUMNS:
+            values = getattr(event, name)
+            self.lists[name].extend(add(value) for value in values)
+            self.lengths[name].append(len(values))
+        self._offsets.clear()
+
+    def __len__(self) -> int:
+        """Number of events."""
+        return len(self.scalars[SCALAR_COLUMNS[0]])
+
+    def offsets(self, column: str) -> array:
+        """Where the list of each event starts in a list column.
+
+        Offsets are computed when first needed after a change, so that the table only
+        stores the (small) length of each list.
+
+        Args:
+            column (str): Name of a list field, for example 'crew_list'.
+
+        Returns:
+            array: Start of the list of each event, followed by the length of the column.
+        """
+        if column not in self._offsets:
+            offsets = array("I", [0])
+            total = 0
+            for length in self.lengths[column]:
+                total += length
+                offsets.append(total)
+            self._offsets[column] = offsets
+        return self._offsets[column]
+
+    def value(self, column: str, index: int) -> str | list[str]:
+        """The value of a field of an event.
+
+        Args:
+            column (str): Field name, for example 'starting_date' or 'crew_list'.
+            index (int): Position of the event in the table.
+
+        Returns:
+            str | list[str]: The value of the field.
+        """
+        strings = self.pool.values
+        if column in self.scalars:
+            return strings[self.scalars[column][index]]
+        offsets = self.offsets(column)
+        return [
+            strings[string_id]
+            for string_id in self.lists[column][offsets[index] : offsets[index + 1]]
+        ]
+
+    def event(self, index: int) -> Event:
+        """Recreate an event.
+
+        Args:
+            index (int): Position of the event in the table.
+
+        Returns:
+            Event: The event.
+        """
+        return Event.model_construct(
+            **{name: self.value(name, index) for name in SCALAR_COLUMNS + LIST_COLUMNS}
+        )
+
+    def __iter__(self) -> Iterator[Event]:
+        """Recreate the events, one at a time."""
+        return (self.event(index) for index in range(len(self)))
+
+    def to_schedule(self) -> Schedule:
+        """Recreate the schedule.
+
+        Returns:
+            Schedule: The schedule with all events of the table.
+        """
+        return Schedule(events=list(self))
+
+    def take(self, indices: Iterable[int]) -> "ScheduleTable":
+        """Create a table with a selection of the events.
+
+        Args:
+            indices (Iterable[int]): Positions of the selected events, in the order wanted.
+
+        Returns:
+            ScheduleTable: The new table; it shares the string pool of this table.
+        """
+        table = ScheduleTable(self.pool)
+        offsets = {name: self.offsets(name) for name in LIST_COLUMNS}
+        for index in indices:
+            for name in SCALAR_COLUMNS:
+                table.scalars[name].append(self.scalars[name][index])
+            for name in LIST_COLUMNS:
+                start, end = offsets[name][index], offsets[name][index + 1]
+                table.lists[name].extend(self.lists[name][start:end])
+                table.lengths[name].append(end - start)
+        return table
+
+    def _matching_lists(self, columns: list[str], string_ids: set) -> Iterator[int]:
+        """Positions of the events with a string in string_ids in any of the list columns."""
+        offsets = {name: self.offsets(name) for name in columns}
+        for index in range(len(self)):
+            for name in columns:
+                start, end = offsets[name][index], offsets[name][index + 1]
+                values = self.lists[name][start:end]
+                if not string_ids.isdisjoint(values):
+                    yield index
+                    break
+
+    def filter_dates(self, start: str = "", end: str = "") -> "ScheduleTable":
+        """Select the events departing in a date range.
+
+        Args:
+            start (str, optional): First date ('YYYY-MM-DD'), inclusive. Defaults to no limit.
+            end (str, optional): Last date ('YYYY-MM-DD'), inclusive. Defaults to no limit.
+
+        Returns:
+            ScheduleTable: The selected events.
+        """
+        strings = self.pool.values
+        # Compare each distinct date once, rather than once per event.
+        in_range = {
+            string_id
+            for string_id in set(self.scalars["starting_date"])
+            if (not start or strings[string_id] >= start)
+            and (not end or strings[string_id] <= end)
+        }
+        return self.take(
+            index
+            for index, string_id in enumerate(self.scalars["starting_date"])
+            if string_id in in_range
+        )
+
+    def filter_airport(self, airport_code: str) -> "ScheduleTable":
+        """Select the events departing from or arriving at an airport.
+
+        Args:
+            airport_code (str): IATA code of the airport, for example 'LIS'.
+
+        Returns:
+            ScheduleTable: The selected events.
+        """
+        string_id = self.pool.find(airport_code)
+        return self.take(
+            self._matching_lists(
+                ["departure_airport", "destination_airport"], {string_id}
+            )
+        )
+
+    def filter_crew(self, crew_member: str) -> "ScheduleTable":
+        """Select the events with a crew member.
+
+        Args:
+            crew_member (str): Name as in the crew list, or part of it (not case sensitive).
+
+        Returns:
+            ScheduleTable: The selected events.
+        """
+        crew_member = crew_member.casefold()
+        strings = self.pool.values
+        string_ids = {
+            string_id
+            for string_id in set(self.lists["crew_list"])
+            if crew_member in strings[string_id].casefold()
+        }
+        return self.take(self._matching_lists(["crew_list"], string_ids))
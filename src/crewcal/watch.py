@@ -0,0 +1,275 @@
+"""Watch a folder and extract roster PDFs as they arrive.
+
+New and modified PDFs are noticed through filesystem notifications when the optional
+watchdog package is installed, and by scanning the folder periodically otherwise. A
+file is only extracted once it has stopped changing for a while, so that partially
+written files are not picked up. A ledger in the target folder records the content hash
+of every extracted PDF; files with known contents (for example re-delivered or touched
+files) are skipped, so the work done is proportional to the new files only.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from crewcal.backends import LLMBackend
+from crewcal.batch import BatchItem, _extract_one
+from crewcal.pdf_text import file_hash
+from crewcal.resilience import CircuitBreaker, RetryPolicy
+
+LEDGER_FILE_NAME = ".crewcal_watch_ledger.json"
+
+
+class WatchLedger(BaseModel):
+    """The target file extracted from each PDF, by content hash of the PDF."""
+
+    processed: dict[str, str] = {}
+
+    @staticmethod
+    def from_file(filename: str | Path) -> "WatchLedger":
+        """Load a ledger from file. A missing or unreadable file gives an empty ledger.
+
+        Args:
+            filename (str | Path): The path of the ledger file.
+
+        Returns:
+            WatchLedger: The ledger.
+        """
+        try:
+            return WatchLedger.model_validate_json(Path(filename).read_text())
+        except (OSError, ValueError):
+            return WatchLedger()
+
+    def to_file(self, filename: str | Path) -> None:
+        """Save the ledger to file.
+
+        Args:
+            filename (str | Path): The path of the ledger file.
+        """
+        tmp_path = Path(filename).with_suffix(".tmp")
+        tmp_path.write_text(self.model_dump_json(indent=2))
+        tmp_path.replace(filename)
+
+
+def _is_pdf(path: Path) -> bool:
+    return path.suffix.lower() == ".pdf"
+
+
+class FolderWatcher:
+    """Extracts the PDFs arriving in a folder into calendars (or json) in a target folder."""
+
+    source: Path
+    target: Path
+    to_json: bool
+    concurrency: int
+    poll_seconds: float
+    settle_seconds: float
+    use_cache: bool
+    backend: LLMBackend | None
+    retry_policy: RetryPolicy
+    ledger: WatchLedger
+    _changes: dict[Path, tuple[float, tuple[int, int]]]
+    _snapshot: dict[Path, tuple[int, int]]
+    _in_flight: set[Path]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        source: str | Path,
+        target: str | Path,
+        to_json: bool = False,
+        concurrency: int = 4,
+        poll_seconds: float = 2.0,
+        settle_seconds: float = 2.0,
+        use_cache: bool = True,
+        backend: LLMBackend | None = None,
+    ) -> None:
+        """Sets up the watcher; call run() to start watching.
+
+        Args:
+            source (str | Path): Folder to watch for PDF schedules.
+            target (str | Path): Folder for the extracted schedules and the ledger.
+            to_json (bool, optional): Save to crewcal json format instead of iCalendar.
+            concurrency (int, optional): Maximum number of simultaneous extractions.
+            poll_seconds (float, optional): Interval between checks of the folder.
+            settle_seconds (float, optional): A file is extracted once unchanged for this long.
+            use_cache (bool, optional): Reuse earlier LLM results for identical input.
+            backend (LLMBackend, optional): The LLM backend. Defaults to OpenAI.
+        """
+        self.source = Path(source)
+        self.target = Path(target)
+        self.to_json = to_json
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.use_cache = use_cache
+        self.backend = backend
+        self.retry_policy = RetryPolicy(circuit_breaker=CircuitBreaker())
+        self.target.mkdir(parents=True, exist_ok=True)
+        self.ledger = WatchLedger.from_file(self.target / LEDGER_FILE_NAME)
+        self._changes = {}
+        self._snapshot = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def notice(self, path: str | Path) -> None:
+        """Register that a file was created or modified.
+
+        Args:
+            path (str | Path): The file.
+        """
+        path = Path(path)
+        if not _is_pdf(path):
+            return
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+        with self._lock:
+            self._changes[path] = (time.monotonic(), (stat.st_size, stat.st_mtime_ns))
+
+    def scan(self) -> None:
+        """Notice the PDFs in the source folder that are new or changed since the last scan."""
+        snapshot = {}
+        for path in self.source.iterdir():
+            if not _is_pdf(path):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+            if self._snapshot.get(path) != snapshot[path]:
+                self.notice(path)
+        self._snapshot = snapshot
+
+    def settled(self) -> list[Path]:
+        """Take the noticed files that have not changed for settle_seconds.
+
+        Returns:
+            list[Path]: The files, ready to be extracted.
+        """
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (noticed_at, size_and_time) in list(self._changes.items()):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    del self._changes[path]
+                    continue
+                current = (stat.st_size, stat.st_mtime_ns)
+                if current != size_and_time:
+                    # Still being written: wait until it has been quiet for a while.
+                    self._changes[path] = (now, current)
+                elif (
+                    now - noticed_at >= self.settle_seconds
+                    and path not in self._in_flight
+                ):
+                    del self._changes[path]
+                    ready.append(path)
+        return ready
+
+    def dispatch(self, executor: ThreadPoolExecutor, path: Path) -> Future | None:
+        """Extract a file in the executor, unless its contents were extracted before.
+
+        Args:
+            executor (ThreadPoolExecutor): The executor.
+            path (Path): The PDF file.
+
+        Returns:
+            Future: The extraction, or None if skipped.
+        """
+        try:
+            content_hash = file_hash(str(path))
+        except OSError:
+            return None
+        target = (
+            self.target / path.with_suffix(".json" if self.to_json else ".ics").name
+        )
+        if self.ledger.processed.get(content_hash) == target.name and target.is_file():
+            logging.info(f"Skipping '{path}', its contents were extracted before.")
+            return None
+
+        item = BatchItem(source=str(path), target=str(target))
+        with self._lock:
+            self._in_flight.add(path)
+        future = executor.submit(
+            _extract_one,
+            item,
+            to_json=self.to_json,
+            use_cache=self.use_cache,
+            retry_policy=self.retry_policy,
+            backend=self.backend,
+        )
+        future.add_done_callback(lambda _: self._completed(item, path, content_hash))
+        return future
+
+    def _completed(self, item: BatchItem, path: Path, content_hash: str) -> None:
+        """Record an extraction in the ledger."""
+        with self._lock:
+            self._in_flight.discard(path)
+            if item.status == "ok":
+                logging.info(f"Extracted '{item.source}' to '{item.target}'.")
+                self.ledger.processed[content_hash] = Path(item.target).name
+                self.ledger.to_file(self.target / LEDGER_FILE_NAME)
+            else:
+                logging.warning(f"Could not extract '{item.source}': {item.error}")
+
+    def _start_notifications(self):
+        """Start filesystem notifications, if the watchdog package is installed.
+
+        Returns:
+            The watchdog observer, or None if notifications are not available.
+        """
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logging.info("watchdog is not installed; scanning the folder instead.")
+            return None
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event) -> None:  # noqa: ANN001
+                if not event.is_directory:
+                    watcher.notice(getattr(event, "dest_path", "") or event.src_path)
+
+        observer = Observer()
+        observer.schedule(Handler(), str(self.source), recursive=False)
+        observer.start()
+        return observer
+
+    def run(
+        self, stop: threading.Event | None = None, notifications: bool = True
+    ) -> None:
+        """Watch the folder and extract arriving PDFs until stopped.
+
+        PDFs already in the folder are extracted first, unless the ledger shows their
+        contents were extracted before.
+
+        Args:
+            stop (threading.Event, optional): Watching stops when this is set. Defaults to
+                watching until interrupted.
+            notifications (bool, optional): Use filesystem notifications if available;
+                otherwise (or if False) the folder is scanned every poll_seconds.
+        """
+        stop = stop or threading.Event()
+        observer = self._start_notifications() if notifications else None
+        self.scan()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as executor:
+                while not stop.wait(self.poll_seconds):
+                    if observer is None:
+                        self.scan()
+                    for path in self.settled():
+                        self.dispatch(executor, path)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
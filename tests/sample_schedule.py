@@ -0,0 +1,96 @@
+"""Sample events in crewcal json format, for tests that do not call an LLM."""
+
+EVENTS = [
+    {
+        "starting_date": "2023-10-31",
+        "starting_time": "21:55",
+        "duties": ["480"],
+        "summary": "YYZ - LIS",
+        "description": "",
+        "departure_airport": ["YYZ"],
+        "departure_airport_name": ["Toronto Pearson"],
+        "departure_timezone": ["America/Toronto"],
+        "destination_airport": ["LIS"],
+        "destination_airport_name": ["Lisbon"],
+        "destination_timezone": ["Europe/Lisbon"],
+        "end_date": "2023-11-01",
+        "end_time": "08:50",
+        "crew_list": ["CA SMITH J"],
+        "list_times": ["20:35", "21:55", "08:50", "09:05"],
+        "list_airport_codes": ["YYZ", "LIS"],
+        "hotel_information": "Hotel Tivoli, Av. da Liberdade 185, Lisbon, +351 21 319 8900",
+    },
+    {
+        "starting_date": "2023-11-03",
+        "starting_time": "10:40",
+        "duties": ["481"],
+        "summary": "LIS - YYZ",
+        "description": "",
+        "departure_airport": ["LIS"],
+        "departure_airport_name": ["Lisbon"],
+        "departure_timezone": ["Europe/Lisbon"],
+        "destination_airport": ["YYZ"],
+        "destination_airport_name": ["Toronto Pearson"],
+        "destination_timezone": ["America/Toronto"],
+        "end_date": "2023-11-03",
+        "end_time": "15:25",
+        "crew_list": ["CA SMITH J"],
+        "list_times": ["09:20", "10:40", "15:25", "15:40"],
+        "list_airport_codes": ["LIS", "YYZ"],
+        "hotel_information": "",
+    },
+]
+
+AIRPORTS = [
+    ("YYZ", "Toronto Pearson", "America/Toronto"),
+    ("LIS", "Lisbon", "Europe/Lisbon"),
+    ("GLA", "Glasgow", "Europe/London"),
+    ("CUN", "Cancun", "America/Cancun"),
+    ("YUL", "Montreal Trudeau", "America/Toronto"),
+    ("CDG", "Paris Charles de Gaulle", "Europe/Paris"),
+    ("YVR", "Vancouver", "America/Vancouver"),
+    ("PUJ", "Punta Cana", "America/Santo_Domingo"),
+]
+
+
+def synthetic_events(count):
+    """Generate count distinct, valid events in crewcal json format (two flights per duty)."""
+    for number in range(count):
+        day = number // 3
+        year, month, day_of_month = 2024 + day // 336, 1 + (day // 28) % 12, 1 + day % 28
+        date = f"{year}-{month:02d}-{day_of_month:02d}"
+        first, second = AIRPORTS[number % 8], AIRPORTS[(number + 3) % 8]
+        start = f"{6 + (number % 3) * 5:02d}:{(number * 7) % 60:02d}"
+        end = f"{8 + (number % 3) * 5:02d}:{(number * 11) % 60:02d}"
+        yield {
+            "starting_date": date,
+            "starting_time": start,
+            "duties": [str(100 + number % 900), str(1000 + number % 9000)],
+            "summary": f"{first[0]} - {second[0]} - {first[0]}",
+            "description": "",
+            "departure_airport": [first[0], second[0]],
+            "departure_airport_name": [first[1], second[1]],
+            "departure_timezone": [first[2], second[2]],
+            "destination_airport": [second[0], first[0]],
+            "destination_airport_name": [second[1], first[1]],
+            "destination_timezone": [second[2], first[2]],
+            "end_date": date,
+            "end_time": end,
+            "crew_list": [f"CA CREW{number % 50}", f"FO CREW{(number + 7) % 50}", f"FA CREW{(number + 13) % 50}"],
+            "list_times": [start, end],
+            "list_airport_codes": [first[0], second[0]],
+            "hotel_information": "",
+        }
+
+
+def synthetic_roster_pages(count, duties_per_page=25):
+    """Generate the text of the pages of a roster pdf with count duties, in AIMS style."""
+    lines = [
+        f"{event['starting_date'][8:10]}/{event['starting_date'][5:7]}/{event['starting_date'][:4]} Mon "
+        f"{event['duties'][0]} {event['summary']} {event['list_times'][0]} {event['list_times'][-1]}"
+        for event in synthetic_events(count)
+    ]
+    return [
+        "Personal Crew Schedule Report\n" + "\n".join(lines[start : start + duties_per_page])
+        for start in range(0, len(lines), duties_per_page)
+    ]
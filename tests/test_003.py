@@ -0,0 +1,69 @@
+import json
+import os
+import time
+
+from crewcal.cache import ExtractionCache
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.llm_prompts import template_flight_schedule
+
+
+def test_make_key_is_deterministic():
+    key = ExtractionCache.make_key("doc", "template", "model", "schema")
+    assert key == ExtractionCache.make_key("doc", "template", "model", "schema")
+    assert key != ExtractionCache.make_key("doc", "template", "other-model", "schema")
+    assert ExtractionCache.make_key("ab", "c") != ExtractionCache.make_key("a", "bc")
+
+
+def test_set_get_roundtrip(tmp_path):
+    cache = ExtractionCache(tmp_path)
+    cache.set("key", [{"duties": ["480"]}])
+    assert cache.get("key") == [{"duties": ["480"]}]
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ExtractionCache(tmp_path, max_age_days=1)
+    cache.set("old", 1)
+    two_days_ago = time.time() - 2 * 24 * 60 * 60
+    os.utime(tmp_path / "old.json", (two_days_ago, two_days_ago))
+    assert cache.get("old") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ExtractionCache(tmp_path, max_entries=2)
+    for count, key in enumerate(["a", "b", "c"]):
+        cache.set(key, key)
+        os.utime(tmp_path / f"{key}.json", (count, time.time() - 10 + count))
+    cache.evict()
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+
+
+def test_purge(tmp_path):
+    cache = ExtractionCache(tmp_path)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.purge() == 2
+    assert cache.get("a") is None
+
+
+def test_extract_served_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CREWCAL_CACHE_DIR", str(tmp_path))
+    sched = OpenAISchedule("")
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: ["roster text"])
+
+    def no_llm():
+        msg = "LLM must not be called on a cache hit"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(sched, "_schedule_chain", no_llm)
+
+    key = sched._cache_key(
+        "roster text",
+        template_flight_schedule,
+        json.dumps(sched._schedule_function(), sort_keys=True),
+    )
+    sched.cache.set(key, [{"duties": ["480"]}])
+
+    sched.extract()
+    assert sched.extracted_schedule == [{"duties": ["480"]}]
@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from click.testing import CliRunner
+from langchain.schema.runnable import RunnableLambda
+
+from crewcal import batch
+from crewcal.cli import cli
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.resilience import RetryPolicy
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+
+class FakeSchedule:
+    """Stands in for OpenAISchedule; pretends to call a slow LLM."""
+
+    active = 0
+    max_active = 0
+    failed_chunks = ()
+    lock = threading.Lock()
+
+    def __init__(self, schedule_path, to_json_file="", to_icalendar_file="", **kwargs):
+        with FakeSchedule.lock:
+            FakeSchedule.active += 1
+            FakeSchedule.max_active = max(FakeSchedule.max_active, FakeSchedule.active)
+        time.sleep(0.2)
+        with FakeSchedule.lock:
+            FakeSchedule.active -= 1
+        Path(to_json_file or to_icalendar_file).write_text(schedule_path)
+
+
+@pytest.fixture
+def rosters(tmp_path):
+    folder = tmp_path / "rosters"
+    folder.mkdir()
+    for count in range(6):
+        (folder / f"roster{count}.pdf").write_bytes(b"%PDF")
+    (folder / "notes.txt").write_text("not a roster")
+    return folder
+
+
+def test_find_schedule_pdfs(rosters):
+    assert len(batch.find_schedule_pdfs(str(rosters))) == 6
+    assert len(batch.find_schedule_pdfs(str(rosters / "roster[0-2].pdf"))) == 3
+
+
+def test_extract_batch_runs_concurrently(rosters, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "OpenAISchedule", FakeSchedule)
+    FakeSchedule.max_active = 0
+    out = tmp_path / "out"
+
+    report = batch.extract_batch(batch.find_schedule_pdfs(str(rosters)), out, concurrency=3)
+
+    assert report.succeeded == 6
+    assert FakeSchedule.max_active == 3
+    assert report.seconds < 6 * 0.2
+    assert (out / "roster0.ics").is_file()
+    summary = json.loads((out / batch.REPORT_FILE_NAME).read_text())
+    assert len(summary["items"]) == 6
+
+
+def test_extract_batch_skips_existing(rosters, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "OpenAISchedule", FakeSchedule)
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "roster0.json").write_text("[]")
+
+    report = batch.extract_batch(batch.find_schedule_pdfs(str(rosters)), out, to_json=True)
+
+    assert [item.status for item in report.items].count("skipped") == 1
+    assert (out / "roster0.json").read_text() == "[]"
+
+
+def rate_limit_error():
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.mark.parametrize(("failures", "status", "calls"), [(1, "ok", 2), (5, "failed", 3)])
+def test_extract_batch_retries_rate_limit_once_per_call(tmp_path, monkeypatch, failures, status, calls):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    answers = []
+
+    def rate_limited(inputs):
+        answers.append(inputs)
+        if len(answers) <= failures:
+            raise rate_limit_error()
+        return EVENTS
+
+    monkeypatch.setattr(OpenAISchedule, "_schedule_chain", lambda self: RunnableLambda(rate_limited))
+    policy = RetryPolicy(max_retries=2, backoff_seconds=0.0)
+
+    report = batch.extract_batch([pdf], tmp_path / "out", use_cache=False, retry_policy=policy)
+
+    assert report.items[0].status == status
+    assert len(answers) == calls
+
+
+def test_extract_batch_fails_schedule_with_missing_chunks(rosters, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "OpenAISchedule", lambda schedule_path, **kwargs: SimpleNamespace(failed_chunks=[2]))
+    source = batch.find_schedule_pdfs(str(rosters))[:1]
+
+    report = batch.extract_batch(source, tmp_path / "out")
+
+    assert report.items[0].status == "failed"
+    assert "chunk(s) [2]" in report.items[0].error
+
+
+def test_extract_batch_fails_schedules_with_the_same_name(rosters, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "OpenAISchedule", FakeSchedule)
+    (rosters / "other").mkdir()
+    (rosters / "other" / "roster0.PDF").write_bytes(b"%PDF")
+    sources = [rosters / "roster0.pdf", rosters / "other" / "roster0.PDF", rosters / "roster1.pdf"]
+    out = tmp_path / "out"
+
+    report = batch.extract_batch(sources, out)
+
+    assert [item.status for item in report.items] == ["failed", "failed", "ok"]
+    assert "same file" in report.items[0].error
+    assert not (out / "roster0.ics").exists()
+
+
+def test_cli_batch_exits_non_zero_on_failure(rosters, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "OpenAISchedule", lambda schedule_path, **kwargs: SimpleNamespace(failed_chunks=[2]))
+
+    result = CliRunner().invoke(cli, ["batch", str(rosters), str(tmp_path / "out")])
+    assert result.exit_code == 1
+    assert "6 schedule(s) failed" in result.output
+
+    result = CliRunner().invoke(cli, ["batch", str(tmp_path / "empty"), str(tmp_path / "out")])
+    assert result.exit_code == 1
+    assert "No pdf files found" in result.output
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from langchain.schema.runnable import RunnableLambda
+
+from crewcal import llm_extract
+from crewcal.hotel import Hotel, Hotels
+from crewcal.llm_extract import OpenAISchedule
+
+EVENTS = [{"duties": ["480"]}]
+
+
+async def slow_llm(_):
+    await asyncio.sleep(0.2)
+    return EVENTS
+
+
+def make_schedule(monkeypatch):
+    sched = OpenAISchedule("roster.pdf", use_cache=False)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: ["roster text"])
+    monkeypatch.setattr(sched, "_schedule_chain", lambda: RunnableLambda(slow_llm))
+    return sched
+
+
+def test_aextract_runs_concurrently(monkeypatch):
+    schedules = [make_schedule(monkeypatch) for _ in range(5)]
+
+    async def run():
+        await asyncio.gather(*(sched.aextract() for sched in schedules))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    assert time.perf_counter() - started < 5 * 0.2
+    assert all(sched.extracted_schedule == EVENTS for sched in schedules)
+
+
+def test_aextract_hotels(monkeypatch, tmp_path):
+    sched = make_schedule(monkeypatch)
+    hotels = Hotels(hotels=[Hotel(vcf_file_name="tivoli.vcf", hotel_contact="BEGIN:VCARD")])
+
+    async def hotel_llm(_):
+        return hotels
+
+    monkeypatch.setattr(sched, "_hotel_chain", lambda: RunnableLambda(hotel_llm))
+
+    asyncio.run(sched.aextract_hotels(tmp_path))
+    assert (tmp_path / "tivoli.vcf").read_text() == "BEGIN:VCARD"
+
+
+def test_extract_all_reads_pdf_once_and_runs_in_parallel(monkeypatch, tmp_path):
+    reads = []
+
+    def counting_reader(path, **kwargs):
+        reads.append(path)
+        return ["roster text"]
+
+    monkeypatch.setattr(llm_extract, "read_pdf_pages", counting_reader)
+    sched = OpenAISchedule("roster.pdf", use_cache=False)
+
+    def slow_schedule(_):
+        time.sleep(0.2)
+        return EVENTS
+
+    def slow_hotels(_):
+        time.sleep(0.2)
+        return Hotels(hotels=[Hotel(vcf_file_name="tivoli.vcf", hotel_contact="BEGIN:VCARD")])
+
+    monkeypatch.setattr(sched, "_schedule_chain", lambda: RunnableLambda(slow_schedule))
+    monkeypatch.setattr(sched, "_hotel_chain", lambda: RunnableLambda(slow_hotels))
+
+    started = time.perf_counter()
+    sched.extract_all(tmp_path / "hotels", to_json_file=str(tmp_path / "sched.json"))
+
+    assert time.perf_counter() - started < 2 * 0.2
+    assert reads == ["roster.pdf"]
+    assert (tmp_path / "sched.json").is_file()
+    assert (tmp_path / "hotels" / "tivoli.vcf").is_file()
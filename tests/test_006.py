@@ -0,0 +1,107 @@
+import pytest
+from click.testing import CliRunner
+from langchain.callbacks import OpenAICallbackHandler
+from langchain.schema import HumanMessage
+from langchain.schema.runnable import RunnableLambda
+
+from crewcal.backends import ReplayBackend
+from crewcal.chunking import chunk_pages, merge_events, split_hotel_section
+from crewcal.cli import cli
+from crewcal.compact import estimate_tokens
+from crewcal.llm_extract import OpenAISchedule
+from tests.pdf_factory import make_pdf
+
+HOTELS = "Hotel Information\nLIS Hotel Tivoli +351 21 319 8900\n"
+PAGES = [
+    "Schedule Details\n31/10/2023 Tue 480 YYZ - LIS\n",
+    "   crew: SMITH J\n03/11/2023 Fri 481 LIS - YYZ\n",
+    "04/11/2023 Sat 244 YYZ - GLA\n" + HOTELS,
+]
+
+
+def test_split_hotel_section():
+    document, hotels = split_hotel_section("".join(PAGES))
+    assert hotels == HOTELS
+    assert "Hotel Information" not in document
+
+
+def test_chunk_pages_keeps_duty_continuations_and_hotels():
+    chunks = chunk_pages(PAGES, 1)
+    assert len(chunks) == 3
+    assert "crew: SMITH J" in chunks[0]
+    assert "crew: SMITH J" not in chunks[1]
+    assert all(chunk.endswith(HOTELS) for chunk in chunks)
+
+
+def test_chunk_pages_no_chunking():
+    assert chunk_pages(PAGES, 0) == ["".join(PAGES)]
+
+
+def test_merge_events_deduplicates_and_sorts():
+    first = {"starting_date": "2023-11-03", "starting_time": "10:40", "duties": ["481"]}
+    second = {"starting_date": "2023-10-31", "starting_time": "21:55", "duties": ["480"]}
+    merged = merge_events([[first], [second, dict(first)]])
+    assert merged == [second, first]
+
+
+def fake_llm(inputs):
+    if "GLA" in inputs["input"].split("Hotel Information")[0]:
+        msg = "malformed response"
+        raise ValueError(msg)
+    duty = "480" if "480" in inputs["input"] else "481"
+    return [{"starting_date": "2023-11-0" + duty[-1], "starting_time": "10:00", "duties": [duty]}]
+
+
+def test_extract_in_chunks_survives_failed_chunk(monkeypatch):
+    sched = OpenAISchedule("roster.pdf", use_cache=False, pages_per_chunk=1)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: PAGES)
+    monkeypatch.setattr(sched, "_schedule_chain", lambda: RunnableLambda(fake_llm))
+
+    sched.extract()
+    assert [event["duties"] for event in sched.extracted_schedule] == [["480"], ["481"]]
+    assert sched.failed_chunks == [3]
+    assert sched.metrics.failed_chunks == 1
+
+
+def test_cli_reports_pages_of_failed_chunk(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "roster.pdf", PAGES)
+    monkeypatch.setattr(OpenAISchedule, "_schedule_chain", lambda self: RunnableLambda(fake_llm))
+
+    result = CliRunner().invoke(
+        cli, ["extract", "--to-json", "--no-cache", "--pages-per-chunk", "1", str(pdf), str(tmp_path / "roster")]
+    )
+
+    assert result.exit_code == 1
+    assert "page(s) 3" in result.output
+    assert (tmp_path / "roster.json").is_file()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["extract", "--stream", "--incremental", "roster.pdf", "roster.ics"],
+        ["merge", "shared.ics", "missing.json"],
+        ["diff", "missing.ics", "missing.json", "changes.ics"],
+        ["watch", "missing", "calendars"],
+    ],
+)
+def test_cli_errors_exit_non_zero(tmp_path, monkeypatch, args):
+    monkeypatch.chdir(tmp_path)
+    make_pdf(tmp_path / "roster.pdf", PAGES)
+
+    result = CliRunner().invoke(cli, args)
+
+    assert result.exit_code == 1
+    assert "not found" in result.output or "cannot be combined" in result.output
+
+
+def test_batch_counts_tokens_of_calls_on_worker_threads():
+    backend = ReplayBackend({"content": "no hotels"})
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=backend)
+    usage = OpenAICallbackHandler()
+
+    sched._run_batch(backend.chat_model(), [[HumanMessage(content=page)] for page in PAGES], usage)
+
+    assert usage.successful_requests == 3
+    assert usage.prompt_tokens == sum(estimate_tokens(page) for page in PAGES)
+    assert usage.completion_tokens == 3 * estimate_tokens("no hotels")
@@ -0,0 +1,66 @@
+"""Import time benchmark: local commands must not pay for the LLM machinery."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).parents[1] / "src")
+HEAVY_MODULES = ("langchain", "openai", "pypdf")
+
+
+def run_python(code, *args, cwd=None):
+    env = {**os.environ, "PYTHONPATH": SRC}
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *args, "-c", code], capture_output=True, text=True, env=env, check=True, cwd=cwd
+    )
+
+
+def cumulative_import_us(module):
+    """Cumulative import time in microseconds as reported by 'python -X importtime'."""
+    result = run_python(f"import {module}", "-X", "importtime")
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    msg = f"{module} not found in import time report"
+    raise AssertionError(msg)
+
+
+@pytest.mark.parametrize(
+    "args", [["convert", "--help"], ["convert", "{json}", "{ics}"], ["--help"]]
+)
+def test_local_commands_do_not_import_llm_machinery(args, tmp_path):
+    json_path = tmp_path / "sched.json"
+    json_path.write_text("[]")
+    args = [arg.format(json=json_path, ics=tmp_path / "sched.ics") for arg in args]
+
+    result = run_python(
+        "import sys\n"
+        "from crewcal.cli import cli\n"
+        "try:\n"
+        f"    cli.main({args!r}, standalone_mode=False)\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sorted(sys.modules)))"
+    )
+    loaded = result.stdout.splitlines()[-1].split()
+    assert not [name for name in loaded if name.split(".")[0] in HEAVY_MODULES]
+
+
+def test_cli_import_is_a_fraction_of_llm_import():
+    assert cumulative_import_us("crewcal.cli") * 4 < cumulative_import_us("crewcal.llm_extract")
+
+
+def test_cli_options_are_read_from_dotenv(tmp_path, monkeypatch):
+    monkeypatch.delenv("CREWCAL_LLM_MODEL", raising=False)
+    (tmp_path / ".env").write_text("CREWCAL_LLM_MODEL=gpt-from-dotenv\n")
+
+    result = run_python(
+        "from crewcal.cli import cli\n"
+        "print(cli.make_context('crewcal', ['purge-cache']).params['model'])",
+        cwd=tmp_path,
+    )
+    assert result.stdout.strip() == "gpt-from-dotenv"
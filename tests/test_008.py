@@ -0,0 +1,130 @@
+import json
+
+from click.testing import CliRunner
+from langchain.schema.runnable import RunnableLambda
+
+from crewcal.cli import cli
+from crewcal.incremental import PageManifest, manifest_path, page_fingerprint
+from crewcal.llm_extract import OpenAISchedule
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+ISSUE_1 = [
+    "31/10/2023 Tue 480 YYZ - LIS 21:55\n",
+    "03/11/2023 Fri 481 LIS - YYZ 10:40\n",
+    "04/11/2023 Sat 244 YYZ - GLA 20:55\n",
+]
+# Reissue: only the time of the duty on the second page changed.
+ISSUE_2 = [ISSUE_1[0], "03/11/2023 Fri 481 LIS - YYZ 11:10\n", ISSUE_1[2]]
+HOTELS = "Hotel Information\nLIS Hotel Tivoli +351 21 319 8900\n"
+
+
+def fake_llm(calls):
+    def extract(inputs):
+        calls.append(inputs["input"])
+        page, *hotels = inputs["input"].split("Hotel Information")
+        date, _, duty, _, _, destination, time = page.split()
+        day, month, year = date.split("/")
+        hotel = [line for line in "".join(hotels).splitlines() if line.startswith(destination)]
+        return [
+            {
+                "starting_date": f"{year}-{month}-{day}",
+                "starting_time": time,
+                "duties": [duty],
+                "destination_airport": [destination],
+                "hotel_information": "".join(hotel),
+            }
+        ]
+
+    return RunnableLambda(extract)
+
+
+def make_schedule(monkeypatch, pages, calls):
+    sched = OpenAISchedule("roster.pdf", use_cache=False)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: pages)
+    monkeypatch.setattr(sched, "_schedule_chain", lambda: fake_llm(calls))
+    return sched
+
+
+def test_page_fingerprint_ignores_whitespace():
+    assert page_fingerprint("480  YYZ\n") == page_fingerprint("480 YYZ")
+    assert page_fingerprint("480 YYZ") != page_fingerprint("481 YYZ")
+
+
+def test_only_changed_pages_are_extracted(monkeypatch, tmp_path):
+    manifest = manifest_path(str(tmp_path / "schedule.json"))
+
+    first_calls = []
+    make_schedule(monkeypatch, ISSUE_1, first_calls).extract_incremental(manifest)
+    assert len(first_calls) == 3
+
+    second_calls = []
+    sched = make_schedule(monkeypatch, ISSUE_2, second_calls)
+    sched.extract_incremental(manifest)
+
+    assert second_calls == [ISSUE_2[1]]
+    assert [event["starting_time"] for event in sched.extracted_schedule] == ["21:55", "11:10", "20:55"]
+    assert len(PageManifest.from_file(manifest).pages) == 3
+
+
+def test_manifest_of_other_extraction_is_not_reused(monkeypatch, tmp_path):
+    manifest = str(tmp_path / "schedule.json.pages.json")
+    make_schedule(monkeypatch, ISSUE_1, []).extract_incremental(manifest)
+
+    calls = []
+    sched = make_schedule(monkeypatch, ISSUE_1, calls)
+    sched.llm_model_name = "another-model"
+    sched.extract_incremental(manifest)
+    assert len(calls) == 3
+
+
+def test_hotel_changes_only_invalidate_pages_of_their_airport(monkeypatch, tmp_path):
+    manifest = manifest_path(str(tmp_path / "schedule.json"))
+    make_schedule(monkeypatch, [*ISSUE_1, HOTELS], []).extract_incremental(manifest)
+
+    calls = []
+    hotels = HOTELS + "GLA Radisson Blu +44 141 204 3333\n"
+    sched = make_schedule(monkeypatch, [*ISSUE_1, hotels], calls)
+    sched.extract_incremental(manifest)
+
+    assert [call.split("Hotel Information")[0] for call in calls] == [ISSUE_1[2]]
+    assert [event["hotel_information"] for event in sched.extracted_schedule] == [
+        "LIS Hotel Tivoli +351 21 319 8900",
+        "",
+        "GLA Radisson Blu +44 141 204 3333",
+    ]
+
+
+def write_fixture(tmp_path):
+    fixture = tmp_path / "fixture.json"
+    hotels = {"hotels": [{"vcf_file_name": "tivoli.vcf", "hotel_contact": "BEGIN:VCARD\nEND:VCARD"}]}
+    fixture.write_text(json.dumps({"functions": {"Schedule": {"events": EVENTS[:1]}}, "content": hotels}))
+    return fixture
+
+
+def test_cli_incremental_extracts_hotels(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    out = tmp_path / "roster.ics"
+
+    result = CliRunner().invoke(
+        cli,
+        ["--backend", "replay", "--replay-fixture", str(write_fixture(tmp_path)),
+         "extract", "--no-cache", "--incremental", "--hotel-folder", str(tmp_path / "hotels"),
+         str(pdf), str(out)],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "SUMMARY:YYZ - LIS" in out.read_text()
+    assert (tmp_path / "hotels" / "tivoli.vcf").is_file()
+
+
+def test_cli_incremental_rejects_pages_per_chunk(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+
+    result = CliRunner().invoke(
+        cli, ["extract", "--incremental", "--pages-per-chunk", "2", str(pdf), str(tmp_path / "roster.ics")]
+    )
+
+    assert result.exit_code == 1
+    assert "cannot be combined" in result.output
+    assert not (tmp_path / "roster.ics").exists()
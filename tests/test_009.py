@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from crewcal.backends import LLMBackend, ReplayBackend, ReplayChatModel, get_backend
+from crewcal.cli import cli
+from crewcal.llm_extract import OpenAISchedule
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+EVENT = EVENTS[0]
+HOTELS = {"hotels": [{"vcf_file_name": "tivoli.vcf", "hotel_contact": "BEGIN:VCARD\nEND:VCARD"}]}
+
+
+def write_fixture(tmp_path):
+    fixture = tmp_path / "fixture.json"
+    fixture.write_text(json.dumps({"functions": {"Schedule": {"events": [EVENT]}}, "content": HOTELS}))
+    return fixture
+
+
+def test_replay_backend_extracts_schedule_and_hotels(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    backend = ReplayBackend(write_fixture(tmp_path))
+
+    sched = OpenAISchedule(
+        str(pdf), to_hotel_folder=str(tmp_path / "hotels"), use_cache=False, backend=backend
+    )
+    sched.extract()
+
+    assert sched.extracted_schedule == [EVENT]
+    assert (tmp_path / "hotels" / "tivoli.vcf").is_file()
+    assert sched.llm_model_name == "replay:fixture.json"
+
+
+def test_schedule_json_as_replay_fixture(tmp_path):
+    schedule_json = tmp_path / "sched.json"
+    schedule_json.write_text(json.dumps([EVENT]))
+    backend = get_backend("replay", fixture=str(schedule_json))
+    assert backend.fixture["functions"]["Schedule"]["events"] == [EVENT]
+
+
+def test_cli_end_to_end_offline(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    out = tmp_path / "roster.ics"
+
+    result = CliRunner().invoke(
+        cli,
+        ["--backend", "replay", "--replay-fixture", str(write_fixture(tmp_path)),
+         "extract", "--no-cache", str(pdf), str(out)],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "SUMMARY:YYZ - LIS" in out.read_text()
+
+
+def test_backend_must_provide_chat_model():
+    class NoModel(LLMBackend):
+        pass
+
+    with pytest.raises(TypeError, match="chat_model"):
+        NoModel()
+
+
+def test_replay_models_do_not_share_responses():
+    first = ReplayChatModel()
+    first.function_arguments["Schedule"] = {"events": []}
+    assert ReplayChatModel().function_arguments == {}
@@ -0,0 +1,56 @@
+import io
+
+import pytest
+from pendulum.tz.zoneinfo.exceptions import InvalidTimezone
+
+from crewcal.schedule import Event, Schedule, write_icalendar
+from tests.sample_schedule import EVENTS
+
+
+def vevents(text):
+    return sorted(block.split("END:VEVENT")[0] for block in text.split("BEGIN:VEVENT")[1:])
+
+
+def test_streamed_calendar_matches_ics():
+    sched = Schedule.from_json_string(EVENTS)
+    expected = sched.to_icalendar().serialize()
+
+    out = io.StringIO()
+    written = write_icalendar((Event(**event) for event in EVENTS), out)
+
+    assert written == len(out.getvalue())
+    assert out.getvalue().startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:Ternyx - crewcal\r\n")
+    assert out.getvalue().endswith("END:VEVENT\r\nEND:VCALENDAR")
+    assert len(out.getvalue()) == len(expected)
+    assert vevents(out.getvalue()) == vevents(expected)
+
+
+def test_single_event_is_byte_identical():
+    sched = Schedule.from_json_string(EVENTS[:1])
+    out = io.StringIO()
+    write_icalendar(sched.events, out)
+    assert out.getvalue() == sched.to_icalendar().serialize()
+
+
+def test_uids_are_stable():
+    first, second = (Schedule.from_json_string(EVENTS) for _ in range(2))
+    assert [e.get_uid() for e in first.events] == [e.get_uid() for e in second.events]
+    assert first.events[0].get_uid() != first.events[1].get_uid()
+
+
+def test_empty_calendar():
+    out = io.StringIO()
+    write_icalendar([], out)
+    assert out.getvalue() == Schedule(events=[]).to_icalendar().serialize()
+
+
+def test_failed_calendar_keeps_previous_file(tmp_path):
+    target = tmp_path / "roster.ics"
+    target.write_text("previous calendar")
+    broken = Schedule.from_json_string([EVENTS[0], dict(EVENTS[1], departure_timezone=["Mars/Olympus"])])
+
+    with pytest.raises(InvalidTimezone, match="Mars/Olympus"):
+        broken.to_icalendar_file(str(target))
+
+    assert target.read_text() == "previous calendar"
+    assert [path.name for path in tmp_path.iterdir()] == ["roster.ics"]
@@ -0,0 +1,113 @@
+"""Benchmarks of the parse, validate and calendar pipeline.
+
+Run with 'nox -s benchmark' to save results in .benchmarks/ and compare with the previous
+saved run. The 100k event sizes are skipped unless CREWCAL_BENCHMARK_LARGE=1 is set.
+"""
+
+import io
+import json
+import os
+
+import pytest
+
+from crewcal.backends import ReplayBackend
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.schedule import Schedule, iter_json_events, write_icalendar
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import synthetic_events, synthetic_roster_pages
+
+pytest.importorskip("pytest_benchmark")
+pytestmark = pytest.mark.benchmark
+
+LARGE = pytest.mark.skipif(
+    not os.environ.get("CREWCAL_BENCHMARK_LARGE"), reason="set CREWCAL_BENCHMARK_LARGE=1 to run"
+)
+SIZES = [10, 1000, pytest.param(100_000, marks=LARGE)]
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}events")
+def events(request):
+    return list(synthetic_events(request.param))
+
+
+@pytest.fixture(scope="module")
+def schedule(events):
+    return Schedule.from_json_string(events)
+
+
+def test_from_json(benchmark, events, tmp_path_factory):
+    path = tmp_path_factory.mktemp("json") / "sched.json"
+    path.write_text(json.dumps(events))
+    result = benchmark(Schedule.from_json, str(path))
+    assert len(result.events) == len(events)
+
+
+def test_iter_json_events(benchmark, events, tmp_path_factory):
+    path = tmp_path_factory.mktemp("json") / "sched.json"
+    path.write_text(json.dumps(events))
+    result = benchmark(lambda: sum(1 for _ in iter_json_events(str(path))))
+    assert result == len(events)
+
+
+def test_from_json_string(benchmark, events):
+    result = benchmark(Schedule.from_json_string, events)
+    assert len(result.events) == len(events)
+
+
+def test_get_begin_end(benchmark, schedule):
+    def instants():
+        return [(event.get_begin(), event.get_end()) for event in schedule.events]
+
+    assert len(benchmark(instants)) == len(schedule.events)
+
+
+def test_resolve_instants_cold(benchmark, events):
+    def resolve():
+        # Fresh events, so that nothing is memoised yet.
+        return Schedule.from_json_string(events).resolve_instants()
+
+    assert len(benchmark(resolve)) == len(events)
+
+
+def test_merge(benchmark, schedule):
+    merged = benchmark(Schedule.merge, [schedule, schedule])
+    assert len(merged.events) == len(schedule.events)
+
+
+def test_get_description(benchmark, schedule):
+    def descriptions():
+        return [event.get_description() for event in schedule.events]
+
+    assert len(benchmark(descriptions)) == len(schedule.events)
+
+
+def test_to_icalendar_serialize(benchmark, schedule):
+    result = benchmark(lambda: schedule.to_icalendar().serialize())
+    assert result.count("BEGIN:VEVENT") == len(schedule.events)
+
+
+def test_write_icalendar_stream(benchmark, schedule):
+    assert benchmark(write_icalendar, schedule.events, io.StringIO()) > 0
+
+
+@pytest.mark.parametrize("duties", [25, 250, pytest.param(2500, marks=LARGE)])
+def test_read_schedule_pdf(benchmark, duties, tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", synthetic_roster_pages(duties))
+    sched = OpenAISchedule("", use_cache=False)
+
+    def read():
+        sched._pages.clear()
+        return sched.read_schedule_pdf(str(pdf))
+
+    assert benchmark(read).count("Personal Crew Schedule Report") == -(-duties // 25)
+
+
+@pytest.mark.parametrize("duties", [25, 250])
+def test_end_to_end_replay(benchmark, duties, tmp_path):
+    """Pdf to iCalendar with a stubbed LLM: crewcal's own overhead, without model latency."""
+    pdf = make_pdf(tmp_path / "roster.pdf", synthetic_roster_pages(duties))
+    backend = ReplayBackend(list(synthetic_events(duties)))
+    out = tmp_path / "roster.ics"
+
+    benchmark(OpenAISchedule, str(pdf), to_icalendar_file=str(out), use_cache=False, backend=backend)
+    assert out.read_text().count("BEGIN:VEVENT") == duties
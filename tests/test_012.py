@@ -0,0 +1,97 @@
+import json
+
+from click.testing import CliRunner
+
+from crewcal.backends import ReplayBackend
+from crewcal.cli import cli
+from crewcal.compact import estimate_tokens
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.metrics import ExtractionMetrics, add_metrics_hook, remove_metrics_hook
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+
+def test_metrics_of_extraction(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS", "01/11/2023 Wed 481 LIS - YYZ"])
+    out = tmp_path / "roster.ics"
+    received = []
+    add_metrics_hook(received.append)
+    try:
+        sched = OpenAISchedule(
+            str(pdf), to_icalendar_file=str(out), use_cache=False, backend=ReplayBackend(EVENTS)
+        )
+    finally:
+        remove_metrics_hook(received.append)
+
+    assert received == [sched.metrics]
+    metrics = sched.metrics
+    assert metrics.source == str(pdf)
+    assert metrics.page_count == 2
+    assert metrics.characters > 0
+    assert metrics.llm_calls == 1
+    assert metrics.events == len(EVENTS)
+    assert metrics.bytes_written == out.stat().st_size
+    assert metrics.llm_seconds > 0
+    assert metrics.serialization_seconds > 0
+
+
+def test_tokens_of_all_chunks_are_counted(tmp_path, monkeypatch):
+    pages = ["31/10/2023 Tue 480 YYZ - LIS\n", "03/11/2023 Fri 481 LIS - YYZ\n"]
+    response_tokens = estimate_tokens(json.dumps({"events": EVENTS}))
+    chunked = OpenAISchedule("roster.pdf", use_cache=False, backend=ReplayBackend(EVENTS), pages_per_chunk=1)
+    incremental = OpenAISchedule("roster.pdf", use_cache=False, backend=ReplayBackend(EVENTS))
+    for sched in (chunked, incremental):
+        monkeypatch.setattr(sched, "read_schedule_pages", lambda _: pages)
+
+    chunked.extract()
+    incremental.extract_incremental(str(tmp_path / "manifest.json"))
+
+    for metrics in (chunked.metrics, incremental.metrics):
+        assert metrics.llm_calls == 2
+        assert metrics.completion_tokens == 2 * response_tokens
+        assert metrics.prompt_tokens > sum(estimate_tokens(page) for page in pages)
+
+
+def test_cache_hits_are_counted(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    from crewcal.cache import ExtractionCache
+
+    cache_dir = tmp_path / "cache"
+    for _ in range(2):
+        sched = OpenAISchedule(str(pdf), backend=ReplayBackend(EVENTS))
+        sched.cache = ExtractionCache(cache_dir)
+        sched.extract()
+
+    assert sched.metrics.cache_hits == 1
+    assert sched.metrics.llm_calls == 0
+
+
+def test_metrics_add_and_timer():
+    metrics = ExtractionMetrics()
+    metrics.add(llm_calls=2, retries=1)
+    with metrics.timer("validation_seconds"):
+        pass
+
+    assert metrics.llm_calls == 2
+    assert metrics.retries == 1
+    assert metrics.validation_seconds >= 0
+
+
+def test_cli_writes_metrics_as_json_lines(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    fixture = tmp_path / "fixture.json"
+    fixture.write_text(json.dumps(EVENTS))
+    metrics_file = tmp_path / "metrics.jsonl"
+
+    for target in ["first.ics", "second.ics"]:
+        result = CliRunner().invoke(
+            cli,
+            ["--backend", "replay", "--replay-fixture", str(fixture), "--metrics", str(metrics_file),
+             "extract", "--no-cache", str(pdf), str(tmp_path / target)],
+        )
+        assert result.exit_code == 0, result.output
+
+    lines = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["events"] == len(EVENTS)
+    assert lines[0]["page_count"] == 1
@@ -0,0 +1,50 @@
+import pendulum
+import pytest
+
+from crewcal.schedule import Event, Schedule, to_datetime
+from tests.sample_schedule import EVENTS, synthetic_events
+
+
+@pytest.mark.parametrize(
+    ("date", "time", "timezone"),
+    [
+        ("2023-10-31", "21:55", "America/Toronto"),
+        ("2024-03-31", "02:30", "Europe/Lisbon"),  # skipped by the DST change
+        ("2023-11-05", "01:30", "America/Toronto"),  # occurs twice
+        ("2024-02-29", "00:00", "UTC"),
+    ],
+)
+def test_to_datetime_matches_pendulum(date, time, timezone):
+    expected = pendulum.from_format(f"{date} {time}", "YYYY-MM-DD HH:mm", tz=timezone)
+    result = to_datetime(date, time, timezone)
+    assert result == expected
+    assert result.utcoffset() == expected.utcoffset()
+    assert result.timezone_name == timezone
+
+
+def test_to_datetime_rejects_invalid_input():
+    with pytest.raises(ValueError, match="YYYY-MM-DD HH:mm"):
+        to_datetime("31/10/2023", "21:55", "America/Toronto")
+
+
+def test_begin_is_memoised_until_changed():
+    event = Event.model_validate(EVENTS[0])
+    assert event.get_begin() is event.get_begin()
+
+    event.starting_time = "22:10"
+    assert event.get_begin().minute == 10
+
+
+def test_resolve_instants():
+    events = list(synthetic_events(30))
+    schedule = Schedule.from_json_string(events)
+
+    instants = schedule.resolve_instants()
+
+    assert len(instants) == 30
+    for count, event in enumerate(schedule.events):
+        assert instants.begin[count] == event.get_begin().int_timestamp
+        assert instants.end[count] == event.get_end().int_timestamp
+        assert instants.zones[instants.begin_zone[count]] == event.departure_timezone[0]
+        assert instants.zones[instants.end_zone[count]] == event.destination_timezone[-1]
+    assert len(instants.zones) == len(set(instants.zones))
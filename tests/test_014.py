@@ -0,0 +1,45 @@
+import tracemalloc
+
+from crewcal.schedule import Schedule
+from crewcal.table import ScheduleTable
+from tests.sample_schedule import EVENTS, synthetic_events
+
+
+def test_round_trip():
+    schedule = Schedule.from_json_string(list(synthetic_events(50)) + EVENTS)
+    table = ScheduleTable.from_schedule(schedule)
+
+    assert len(table) == 52
+    assert table.to_schedule() == schedule
+    assert table.value("departure_airport", 51) == ["LIS"]
+    assert next(iter(table)).get_begin() == schedule.events[0].get_begin()
+
+
+def test_filters():
+    table = ScheduleTable.from_events(EVENTS + list(synthetic_events(30)))
+
+    assert [event.duties for event in table.filter_dates("2023-11-01", "2023-11-30")] == [["481"]]
+    assert len(table.filter_dates(start="2024-01-01")) == 30
+    assert len(table.filter_airport("LIS")) == 2 + sum(
+        "LIS" in event["departure_airport"] for event in synthetic_events(30)
+    )
+    assert len(table.filter_airport("XXX")) == 0
+    assert [event.duties for event in table.filter_crew("smith")] == [["480"], ["481"]]
+    assert len(table.filter_crew("CA SMITH J").filter_airport("YYZ").filter_dates(end="2023-10-31")) == 1
+
+
+def test_memory_per_event():
+    events = list(synthetic_events(20_000))
+
+    tracemalloc.start()
+    schedule = Schedule.from_json_string(events)
+    schedule_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    table = ScheduleTable.from_events(events)
+    table_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(table) == len(schedule.events)
+    assert table_bytes * 10 < schedule_bytes
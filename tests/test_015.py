@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from crewcal.schedule import Schedule, iter_json_array, iter_json_events
+from tests.sample_schedule import EVENTS, synthetic_events
+
+
+def test_from_json_string_accepts_text_bytes_and_objects():
+    text = json.dumps(EVENTS)
+    expected = Schedule.from_json_string(EVENTS)
+
+    assert Schedule.from_json_string(text) == expected
+    assert Schedule.from_json_string(text.encode()) == expected
+
+
+def test_from_json(tmp_path):
+    path = tmp_path / "sched.json"
+    path.write_text(json.dumps(EVENTS))
+    assert Schedule.from_json(str(path)) == Schedule.from_json_string(EVENTS)
+
+
+def test_iter_json_events_in_small_chunks(tmp_path):
+    events = list(synthetic_events(25))
+    path = tmp_path / "sched.json"
+    path.write_text(json.dumps(events, indent=2))
+
+    streamed = list(iter_json_events(str(path), chunk_size=7))
+
+    assert streamed == Schedule.from_json_string(events).events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 100])
+def test_iter_json_array(size):
+    text = '{"events": [1, 23, {"a": [1, "]"]}, "x", [], null, 4.5]}'
+    chunks = [text[start : start + size] for start in range(0, len(text), size)]
+    assert list(iter_json_array(chunks)) == [1, 23, {"a": [1, "]"]}, "x", [], None, 4.5]
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [('[{"a": 1}, {"b":', "Expecting value"), ('{"events": [1, 2', "Unterminated"), ('{"a": 1}', "No JSON array")],
+)
+def test_iter_json_array_incomplete(text, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_json_array([text]))
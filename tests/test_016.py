@@ -0,0 +1,77 @@
+import copy
+import json
+
+from click.testing import CliRunner
+
+from crewcal.cli import cli
+from crewcal.schedule import Schedule
+from tests.sample_schedule import EVENTS, synthetic_events
+
+
+def roster(crew_member, events):
+    events = copy.deepcopy(events)
+    for event in events:
+        event["crew_list"] = [crew_member, "CA SMITH J"]
+    return Schedule.from_json_string(events)
+
+
+def test_merge_deduplicates_and_unions_crew():
+    first = roster("FA JONES A", EVENTS)
+    second = roster("FO BROWN B", EVENTS[1:])
+
+    merged = Schedule.merge([second, first])
+
+    assert [event.duties for event in merged.events] == [["480"], ["481"]]
+    assert merged.events[0].crew_list == ["FA JONES A", "CA SMITH J"]
+    assert merged.events[1].crew_list == ["FO BROWN B", "CA SMITH J", "FA JONES A"]
+    assert second.events[0].crew_list == ["FO BROWN B", "CA SMITH J"]
+
+
+def test_same_flight_on_another_day_is_kept():
+    other_day = copy.deepcopy(EVENTS[0])
+    other_day["starting_date"] = "2023-11-07"
+    other_day["end_date"] = "2023-11-08"
+
+    merged = Schedule.merge([Schedule.from_json_string(EVENTS), Schedule.from_json_string([other_day])])
+
+    assert len(merged.events) == 3
+    assert len({event.get_uid() for event in merged.events}) == 3
+
+
+def test_merge_many_schedules():
+    events = list(synthetic_events(300))
+    schedules = [Schedule.from_json_string(events[start : start + 200]) for start in range(0, 300, 50)]
+
+    merged = Schedule.merge(schedules)
+
+    assert len(merged.events) == 300
+    assert merged.events == sorted(merged.events, key=lambda event: event.get_begin())
+
+
+def test_cli_merge(tmp_path):
+    files = []
+    for count, crew_member in enumerate(["FA JONES A", "FO BROWN B"]):
+        path = tmp_path / f"roster{count}.json"
+        path.write_text(json.dumps(roster(crew_member, EVENTS).model_dump(mode="json")["events"]))
+        files.append(str(path))
+
+    result = CliRunner().invoke(cli, ["merge", str(tmp_path / "crew"), *files])
+
+    assert result.exit_code == 0, result.output
+    calendar = (tmp_path / "crew.ics").read_text()
+    assert calendar.count("BEGIN:VEVENT") == 2
+    assert "FO BROWN B" in calendar
+
+
+def test_cli_merge_to_json_reads_back(tmp_path):
+    source = tmp_path / "roster.json"
+    source.write_text(json.dumps(EVENTS))
+    target = tmp_path / "crew.json"
+
+    result = CliRunner().invoke(cli, ["merge", "--to-json", str(target), str(source)])
+    assert result.exit_code == 0, result.output
+    assert Schedule.from_json(str(target)) == Schedule.from_json_string(EVENTS)
+
+    result = CliRunner().invoke(cli, ["convert", str(target), str(tmp_path / "crew.ics")])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "crew.ics").read_text().count("BEGIN:VEVENT") == 2
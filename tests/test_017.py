@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.document_loaders import PyPDFLoader
+
+from crewcal import pdf_text
+from crewcal.cache import ExtractionCache
+from crewcal.pdf_text import read_pdf_pages
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import synthetic_roster_pages
+
+
+def test_parallel_read_matches_pypdfloader(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", synthetic_roster_pages(500, duties_per_page=20))
+
+    pages = read_pdf_pages(str(pdf), processes=3)
+
+    assert len(pages) == 25 >= pdf_text.PARALLEL_MIN_PAGES
+    assert pages == [doc.page_content for doc in PyPDFLoader(str(pdf)).load()]
+    assert read_pdf_pages(str(pdf), processes=1) == pages
+
+
+def test_page_text_is_cached_by_file_contents(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    cache = ExtractionCache(tmp_path / "cache")
+    pages = read_pdf_pages(str(pdf), cache=cache)
+
+    def fail(*args):
+        msg = "pdf parsed again"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(pdf_text, "_read_page_range", fail)
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(pdf.read_bytes())
+    assert read_pdf_pages(str(copy), cache=cache) == pages
+
+
+def test_worker_threads_read_in_process(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "roster.pdf", synthetic_roster_pages(500, duties_per_page=20))
+
+    def no_pool(*args, **kwargs):
+        msg = "process pool started from a worker thread"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(pdf_text, "ProcessPoolExecutor", no_pool)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pages = executor.submit(read_pdf_pages, str(pdf), processes=3).result()
+
+    assert len(pages) == 25
@@ -0,0 +1,93 @@
+from crewcal.backends import ReplayBackend, ReplayChatModel
+from crewcal.compact import compact_pages, estimate_tokens, hotel_document, normalize_whitespace
+from crewcal.llm_extract import OpenAISchedule
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+HEADER = "Personal Crew Schedule Report   CA SMITH J"
+COLUMNS = "Date     Duty   Route     Report   Dep   Arr"
+
+
+def page(number, duties, count=3):
+    return "\n".join([HEADER, COLUMNS, *duties, "", f"Page {number} of {count}", "Printed by AIMS"])
+
+
+PAGES = [
+    page(1, ["31/10/2023 Tue   480   YYZ -   LIS  20:35 21:55 08:50"]),
+    page(2, ["03/11/2023 Fri   481   LIS - YYZ  09:20 10:40 15:25"]),
+    page(3, ["Hotel Information", "LIS  Hotel Tivoli   +351 21 319 8900"]),
+]
+
+
+def test_normalize_whitespace():
+    assert normalize_whitespace("  a   b \n\n\t c\n") == "a b\nc\n"
+
+
+def test_page_furniture_kept_once():
+    compacted = compact_pages(PAGES)
+
+    assert compacted[0].splitlines() == [
+        "Personal Crew Schedule Report CA SMITH J",
+        "Date Duty Route Report Dep Arr",
+        "31/10/2023 Tue 480 YYZ - LIS 20:35 21:55 08:50",
+        "Printed by AIMS",
+    ]
+    assert compacted[1] == "03/11/2023 Fri 481 LIS - YYZ 09:20 10:40 15:25\n"
+    assert compacted[2] == "Hotel Information\nLIS Hotel Tivoli +351 21 319 8900\n"
+    assert estimate_tokens("".join(compacted)) < estimate_tokens("".join(PAGES))
+
+
+def test_content_repeated_on_some_pages_is_kept():
+    crew = "Crew: CA SMITH J FO DOE A"
+    pages = [
+        page(1, ["31/10/2023 Tue 480 YYZ - LIS", crew]),
+        page(2, ["03/11/2023 Fri 481 LIS - YYZ", crew]),
+        page(3, ["04/11/2023 Sat 244 YYZ - GLA", "Crew: CA SMITH J FO ROE B"]),
+    ]
+
+    compacted = compact_pages(pages)
+
+    assert crew in compacted[0].splitlines()
+    assert crew in compacted[1].splitlines()
+
+
+def test_only_explicit_page_numbers_are_removed():
+    pages = ["HEADER\n480/481\n31/10\nPage 1\n", "HEADER\n482/483\n01/11\nPage 2\n"]
+    assert compact_pages(pages) == ["HEADER\n480/481\n31/10\n", "482/483\n01/11\n"]
+
+
+def test_single_page_keeps_its_lines():
+    assert compact_pages(["HEADER\n01/11/2023 481"]) == ["HEADER\n01/11/2023 481\n"]
+
+
+def test_hotel_document():
+    compacted = compact_pages(PAGES)
+    assert hotel_document(compacted) == compacted[2]
+    assert hotel_document(compacted[:2]) == "".join(compacted[:2])
+
+
+def test_extraction_reports_tokens_saved(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "roster.pdf", PAGES)
+    prompts = []
+    generate = ReplayChatModel._generate
+
+    def recording_generate(self, messages, *args, **kwargs):
+        prompts.append(messages[-1].content)
+        return generate(self, messages, *args, **kwargs)
+
+    monkeypatch.setattr(ReplayChatModel, "_generate", recording_generate)
+    sched = OpenAISchedule(str(pdf), use_cache=False, backend=ReplayBackend(EVENTS), compact=True)
+    sched.extract()
+
+    assert sched.extracted_schedule == EVENTS
+    assert sched.metrics.tokens_saved > 0
+    assert "Page 2 of 3" not in prompts[0]
+    assert "480 YYZ - LIS" in prompts[0]
+
+
+def test_compaction_is_opt_in(tmp_path):
+    pdf = make_pdf(tmp_path / "roster.pdf", PAGES)
+    sched = OpenAISchedule(str(pdf), use_cache=False, backend=ReplayBackend(EVENTS))
+    sched.extract()
+
+    assert sched.metrics.tokens_saved == 0
@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from crewcal.backends import ReplayBackend
+from crewcal.server import ExtractionService, make_server
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+HOTELS = {"hotels": [{"vcf_file_name": "tivoli.vcf", "hotel_contact": "BEGIN:VCARD\nEND:VCARD\n"}]}
+
+
+@pytest.fixture
+def url():
+    backend = ReplayBackend({"functions": {"Schedule": {"events": EVENTS}}, "content": HOTELS})
+    service = ExtractionService(backend=backend, workers=2, use_cache=False)
+    server = make_server(service, port=0)
+    service.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    service.stop()
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return make_pdf(tmp_path / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"]).read_bytes()
+
+
+def request(url, data=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:  # noqa: S310
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def test_sync_ics(url, pdf):
+    status, body = request(f"{url}/jobs?format=ics&wait=1", pdf)
+    assert status == 200
+    assert body.decode().count("BEGIN:VEVENT") == 2
+
+
+def test_job_id_json_and_vcard(url, pdf):
+    status, body = request(f"{url}/jobs?format=json", pdf)
+    assert status == 202
+    job_id = json.loads(body)["id"]
+
+    for _ in range(100):
+        job = json.loads(request(f"{url}/jobs/{job_id}")[1])
+        if job["status"] == "done":
+            break
+        time.sleep(0.05)
+
+    status, body = request(f"{url}/jobs/{job_id}/result")
+    assert status == 200
+    assert json.loads(body) == EVENTS
+
+    status, body = request(f"{url}/jobs?format=vcard&wait=1", pdf)
+    assert (status, body) == (200, b"BEGIN:VCARD\nEND:VCARD\n")
+
+
+def test_errors(url, pdf):
+    assert request(f"{url}/jobs/unknown")[0] == 404
+    assert request(f"{url}/jobs?format=xls", pdf)[0] == 400
+    status, body = request(f"{url}/jobs?wait=1", b"not a pdf")
+    assert status == 500
+    assert json.loads(body)["status"] == "failed"
+    assert json.loads(request(f"{url}/health")[1])["workers"] == 2
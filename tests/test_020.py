@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from crewcal.backends import ReplayBackend
+from crewcal.watch import LEDGER_FILE_NAME, FolderWatcher, WatchLedger
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+
+def watcher(tmp_path, **kwargs):
+    (tmp_path / "in").mkdir(exist_ok=True)
+    return FolderWatcher(
+        tmp_path / "in", tmp_path / "out", use_cache=False, backend=ReplayBackend(EVENTS), **kwargs
+    )
+
+
+def process(folder_watcher):
+    folder_watcher.scan()
+    with ThreadPoolExecutor() as executor:
+        futures = [folder_watcher.dispatch(executor, path) for path in folder_watcher.settled()]
+    return [future for future in futures if future is not None]
+
+
+def test_new_files_extracted_once(tmp_path):
+    folder_watcher = watcher(tmp_path, settle_seconds=0)
+    make_pdf(tmp_path / "in" / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    (tmp_path / "in" / "notes.txt").write_text("not a roster")
+
+    assert len(process(folder_watcher)) == 1
+    assert (tmp_path / "out" / "roster.ics").read_text().count("BEGIN:VEVENT") == 2
+    assert len(WatchLedger.from_file(tmp_path / "out" / LEDGER_FILE_NAME).processed) == 1
+
+    # Unchanged: not noticed. Touched, or a restarted watcher: noticed, but skipped by hash.
+    assert process(folder_watcher) == []
+    os.utime(tmp_path / "in" / "roster.pdf")
+    assert process(folder_watcher) == []
+    assert process(watcher(tmp_path, settle_seconds=0)) == []
+
+    make_pdf(tmp_path / "in" / "roster.pdf", ["07/11/2023 Tue 480 YYZ - LIS"])
+    assert len(process(folder_watcher)) == 1
+
+
+def test_partial_writes_are_debounced(tmp_path):
+    folder_watcher = watcher(tmp_path, settle_seconds=0.3)
+    path = tmp_path / "in" / "roster.pdf"
+    path.write_bytes(b"%PDF-1.4 partial")
+    folder_watcher.scan()
+    assert folder_watcher.settled() == []
+
+    time.sleep(0.2)
+    make_pdf(path, ["31/10/2023 Tue 480 YYZ - LIS"])
+    time.sleep(0.2)
+    assert folder_watcher.settled() == []  # changed since noticed: wait again
+
+    time.sleep(0.4)
+    assert folder_watcher.settled() == [path]
+
+
+def test_run_until_stopped(tmp_path):
+    folder_watcher = watcher(tmp_path, settle_seconds=0, poll_seconds=0.05)
+    stop = threading.Event()
+    thread = threading.Thread(target=folder_watcher.run, kwargs={"stop": stop, "notifications": False})
+    thread.start()
+    make_pdf(tmp_path / "in" / "roster.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+
+    for _ in range(100):
+        if (tmp_path / "out" / "roster.ics").is_file():
+            break
+        time.sleep(0.05)
+    stop.set()
+    thread.join()
+
+    assert (tmp_path / "out" / "roster.ics").is_file()
@@ -0,0 +1,173 @@
+import json
+
+import httpx
+import openai
+import pytest
+from langchain.schema import AIMessage
+from langchain.schema.runnable import RunnableLambda
+
+from crewcal import batch
+from crewcal.backends import ReplayBackend
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    PartialExtractionError,
+    RetryPolicy,
+    parse_function_call_events,
+)
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+EVENT = EVENTS[0]
+INVALID = {"starting_date": "2023-11-03", "duties": ["481"]}
+
+
+def function_call(arguments):
+    return AIMessage(content="", additional_kwargs={"function_call": {"name": "Schedule", "arguments": arguments}})
+
+
+def rate_limit_error(headers=None):
+    request = httpx.Request("POST", "https://api.openai.com")
+    response = httpx.Response(429, request=request, headers=headers or {})
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_parse_keeps_valid_events():
+    assert parse_function_call_events(function_call(json.dumps({"events": [EVENT]}))) == [EVENT]
+
+    with pytest.raises(PartialExtractionError) as error:
+        parse_function_call_events(function_call(json.dumps({"events": [EVENT, INVALID]})))
+    assert error.value.events == [EVENT]
+    assert [event for event, _ in error.value.invalid] == [INVALID]
+    assert not error.value.truncated
+
+
+def test_parse_salvages_truncated_response():
+    arguments = json.dumps({"events": [EVENT, EVENT]})
+    truncated = arguments[: len(arguments) - 40]
+
+    with pytest.raises(PartialExtractionError) as error:
+        parse_function_call_events(function_call(truncated))
+    assert error.value.events == [EVENT]
+    assert error.value.truncated
+
+    with pytest.raises(ValueError, match="no list of events"):
+        parse_function_call_events(function_call('{"events": [{"starting'))
+
+
+def test_parse_salvage_accepts_control_characters():
+    event = {**EVENT, "hotel_information": "Hotel Tivoli\nLisbon"}
+    arguments = json.dumps({"events": [event, EVENT]}).replace("\\n", "\n")
+    assert parse_function_call_events(function_call(arguments)) == [event, EVENT]
+
+    with pytest.raises(PartialExtractionError) as error:
+        parse_function_call_events(function_call(arguments[: len(arguments) - 40]))
+    assert error.value.events == [event]
+    assert error.value.truncated
+
+
+@pytest.mark.parametrize("arguments", ['{"schedule": []}', '{"events": {}}', "[]"])
+def test_parse_rejects_arguments_without_events(arguments):
+    with pytest.raises(ValueError, match="no 'events' list"):
+        parse_function_call_events(function_call(arguments))
+
+
+def test_delay_honours_retry_after_and_cap():
+    policy = RetryPolicy(backoff_seconds=1.0, max_backoff_seconds=10.0)
+    assert policy.delay(1, rate_limit_error({"retry-after-ms": "1500"})) == 1.5
+    assert policy.delay(1, rate_limit_error({"retry-after": "3"})) == 3.0
+    assert 1.0 <= policy.delay(1, rate_limit_error()) <= 2.0
+    assert policy.delay(10) == 10.0
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    assert breaker.allow()  # the trial call after reset_seconds
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+def test_policy_call_fails_fast_when_circuit_open():
+    policy = RetryPolicy(max_retries=5, backoff_seconds=0.0, circuit_breaker=CircuitBreaker(2, 60.0))
+    calls = []
+
+    def unavailable():
+        calls.append(1)
+        raise openai.APITimeoutError(httpx.Request("POST", "https://api.openai.com"))
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(unavailable)
+    assert len(calls) == 2
+
+
+def test_only_failed_chunks_are_retried(monkeypatch):
+    pages = ["31/10/2023 Tue 480 YYZ - LIS\n", "03/11/2023 Fri 481 LIS - YYZ\n"]
+    sched = OpenAISchedule("roster.pdf", use_cache=False, pages_per_chunk=1, retry_policy=RetryPolicy(backoff_seconds=0.0))
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: pages)
+    calls = []
+
+    def flaky_llm(inputs):
+        calls.append(inputs["input"])
+        if "481" in inputs["input"] and len(calls) <= 2:
+            raise rate_limit_error()
+        return [{"duties": ["481" if "481" in inputs["input"] else "480"]}]
+
+    monkeypatch.setattr(sched, "_schedule_chain", lambda: RunnableLambda(flaky_llm))
+
+    sched.extract()
+
+    assert [event["duties"] for event in sched.extracted_schedule] == [["480"], ["481"]]
+    assert len(calls) == 3
+    assert sched.metrics.retries == 1
+
+
+def test_invalid_events_are_requested_again(tmp_path, monkeypatch):
+    backend = ReplayBackend({"functions": {"Schedule": {"events": [EVENT, INVALID]}}})
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=backend)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: ["31/10/2023 Tue 480 YYZ - LIS"])
+    repairs = []
+
+    def repair_chain():
+        def repair(inputs):
+            repairs.append(json.loads(inputs["invalid"]))
+            return [dict(EVENT, starting_date="2023-11-03", duties=["481"])]
+
+        return RunnableLambda(repair)
+
+    monkeypatch.setattr(sched, "_repair_chain", repair_chain)
+
+    sched.extract()
+
+    assert [event["duties"] for event in sched.extracted_schedule] == [EVENT["duties"], ["481"]]
+    assert repairs[0][0]["event"] == INVALID
+    assert "starting_time" in repairs[0][0]["errors"]
+
+
+def test_batch_circuit_breaker_stops_calls(tmp_path, monkeypatch):
+    rosters = tmp_path / "rosters"
+    rosters.mkdir()
+    for count in range(3):
+        make_pdf(rosters / f"roster{count}.pdf", ["31/10/2023 Tue 480 YYZ - LIS"])
+    calls = []
+
+    def unavailable(inputs):
+        calls.append(inputs)
+        raise rate_limit_error()
+
+    monkeypatch.setattr(OpenAISchedule, "_schedule_chain", lambda self: RunnableLambda(unavailable))
+    policy = RetryPolicy(max_retries=5, backoff_seconds=0.0, circuit_breaker=CircuitBreaker(3, 60.0))
+
+    report = batch.extract_batch(
+        batch.find_schedule_pdfs(str(rosters)), tmp_path / "out", concurrency=1, use_cache=False, retry_policy=policy
+    )
+
+    assert report.failed == 3
+    assert len(calls) == 3
+    assert all("circuit breaker" in item.error for item in report.items)
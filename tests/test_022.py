@@ -0,0 +1,67 @@
+import copy
+import json
+
+from click.testing import CliRunner
+
+from crewcal.cli import cli
+from crewcal.diff import CalendarEvent, diff_calendars, parse_icalendar_events, read_calendar_events
+from crewcal.schedule import Schedule
+from tests.sample_schedule import EVENTS, synthetic_events
+
+ROSTER = [*EVENTS, next(synthetic_events(1))]
+ROSTER_CHANGED = copy.deepcopy(ROSTER)
+ROSTER_CHANGED[1]["crew_list"] = ["CA SMITH J", "FO BROWN B"]
+
+
+def write_json(path, events):
+    path.write_text(json.dumps(events))
+    return path
+
+
+def test_unchanged_roster_has_no_updates():
+    events = Schedule.from_json_string(list(synthetic_events(50))).events
+    difference = diff_calendars(map(CalendarEvent.from_event, events), events)
+    assert difference.updates == []
+    assert len(difference.unchanged) == 50
+
+
+def test_added_changed_and_cancelled(tmp_path):
+    old = read_calendar_events(write_json(tmp_path / "old.json", ROSTER[:2]))
+    new = Schedule.from_json_string([ROSTER_CHANGED[1], ROSTER[2]]).events
+
+    difference = diff_calendars(old, new)
+
+    assert [event.uid for event in difference.added] == [new[1].get_uid()]
+    assert [event.uid for event in difference.changed] == [new[0].get_uid()]
+    assert difference.changed[0].sequence == 1
+    assert "SEQUENCE:1" in difference.changed[0].lines
+    [cancelled] = difference.cancelled
+    assert cancelled.uid == old[0].uid
+    assert "STATUS:CANCELLED" in cancelled.lines
+
+
+def test_sequence_increases_with_each_change(tmp_path):
+    old = read_calendar_events(write_json(tmp_path / "old.json", ROSTER))
+    first = diff_calendars(old, Schedule.from_json_string(ROSTER_CHANGED).events)
+    second = diff_calendars(first.calendar, Schedule.from_json_string(ROSTER).events)
+
+    assert [event.sequence for event in second.changed] == [2]
+    assert len(second.unchanged) == 2
+
+
+def test_cli_diff_against_previous_ics(tmp_path):
+    old_ics = tmp_path / "old.ics"
+    Schedule.from_json_string(ROSTER).to_icalendar_file(str(old_ics))
+    new_json = write_json(tmp_path / "new.json", ROSTER_CHANGED[:2])
+    updates = tmp_path / "updates.ics"
+    calendar = tmp_path / "calendar.ics"
+
+    result = CliRunner().invoke(cli, ["diff", str(old_ics), str(new_json), str(updates), "--calendar", str(calendar)])
+
+    assert result.exit_code == 0, result.output
+    assert "0 added, 1 changed, 1 cancelled, 1 unchanged" in result.output
+    text = updates.read_text()
+    assert text.startswith("BEGIN:VCALENDAR")
+    assert text.rstrip().endswith("END:VCALENDAR")
+    assert len(parse_icalendar_events(text)) == 2
+    assert len(parse_icalendar_events(calendar.read_text())) == 2
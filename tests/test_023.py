@@ -0,0 +1,75 @@
+from crewcal.backends import ReplayBackend
+from crewcal.hotel import Hotel
+from crewcal.hotel_index import HotelIndex, hotel_key, match_hotels, parse_hotel_entries
+from crewcal.llm_extract import OpenAISchedule
+
+TIVOLI = Hotel(vcf_file_name="tivoli.vcf", hotel_contact="BEGIN:VCARD\nFN:Hotel Tivoli\nTEL:+351213198900\nEND:VCARD")
+RADISSON = Hotel(vcf_file_name="radisson.vcf", hotel_contact="BEGIN:VCARD\nFN:Radisson Blu\nTEL:+441412043333\nEND:VCARD")
+SECTION = (
+    "Hotel Information\n"
+    "31/10/2023 LIS Hotel Tivoli, Av. da Liberdade 185, 1250-146 Lisboa +351 21 319 8900\n"
+    "GLA Radisson Blu\n"
+    "301 Argyle St\n"
+    "Tel: +44 141 204 3333\n"
+)
+
+
+def test_parse_hotel_entries():
+    entries = parse_hotel_entries(SECTION)
+    assert len(entries) == 2
+    assert entries[1] == "GLA Radisson Blu\n301 Argyle St\nTel: +44 141 204 3333"
+
+
+def test_key_ignores_dates_case_and_punctuation():
+    first = "31/10/2023 LIS Hotel Tivoli, Av. da Liberdade 185 +351 21 319 8900"
+    second = "12/01/2024 LIS HOTEL TIVOLI  Av da Liberdade 185 +351-21-319-8900"
+    assert hotel_key(first) == hotel_key(second)
+
+
+def test_match_hotels_by_phone_and_name():
+    entries = parse_hotel_entries(SECTION)
+    assert match_hotels(entries, [RADISSON, TIVOLI]) == {0: TIVOLI, 1: RADISSON}
+
+
+def make_schedule(tmp_path, section, hotels):
+    backend = ReplayBackend({"functions": {}, "content": {"hotels": [hotel.model_dump() for hotel in hotels]}})
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=backend)
+    sched.hotel_index_file = str(tmp_path / "index" / "hotels.json")
+    sched._pages["roster.pdf"] = ["31/10/2023 Tue 480 YYZ - LIS\n", section]
+    return sched
+
+
+def test_known_hotels_skip_the_llm(tmp_path):
+    first = make_schedule(tmp_path, SECTION, [TIVOLI, RADISSON])
+    first.extract_hotels(tmp_path / "first")
+    assert first.metrics.llm_calls == 1
+    assert len(HotelIndex.from_file(first.hotel_index_file).hotels) == 2
+
+    reissued = SECTION.replace("31/10/2023", "04/11/2023")
+    second = make_schedule(tmp_path, reissued, [])
+    second.extract_hotels(tmp_path / "second")
+
+    assert second.metrics.llm_calls == 0
+    assert second.metrics.hotel_index_hits == 2
+    assert sorted(path.name for path in (tmp_path / "second").iterdir()) == ["radisson.vcf", "tivoli.vcf"]
+
+
+def test_only_unknown_hotels_go_to_the_llm(tmp_path):
+    index = HotelIndex()
+    index.add(parse_hotel_entries(SECTION)[0], TIVOLI)
+    index.to_file(tmp_path / "index" / "hotels.json")
+    sched = make_schedule(tmp_path, SECTION, [RADISSON])
+    prompts = []
+    chain = sched._hotel_chain
+
+    def recording_chain():
+        from langchain.schema.runnable import RunnableLambda
+
+        return RunnableLambda(lambda document: prompts.append(document) or document) | chain()
+
+    sched._hotel_chain = recording_chain
+    sched.extract_hotels(tmp_path / "hotels")
+
+    assert "Radisson" in prompts[0]
+    assert "Tivoli" not in prompts[0]
+    assert [hotel.vcf_file_name for hotel in sched.extracted_hotels.hotels] == ["tivoli.vcf", "radisson.vcf"]
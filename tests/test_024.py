@@ -0,0 +1,109 @@
+import json
+import logging
+
+import pytest
+
+from crewcal import airports
+from crewcal.airports import (
+    Airport,
+    UnknownAirportError,
+    airport_index,
+    enrich_event,
+    is_valid_timezone,
+    lookup_airport,
+)
+from crewcal.backends import ReplayBackend
+from crewcal.llm_extract import OpenAISchedule
+from tests.sample_schedule import AIRPORTS, EVENTS
+
+EVENT = EVENTS[0]
+NAMES_AND_TIMEZONES = (
+    "departure_airport_name",
+    "departure_timezone",
+    "destination_airport_name",
+    "destination_timezone",
+)
+SLIM_EVENT = {key: value for key, value in EVENT.items() if key not in NAMES_AND_TIMEZONES}
+
+
+def test_table_has_valid_timezones():
+    index = airport_index()
+    assert len(index) > 200
+    assert all(is_valid_timezone(airport.timezone) for airport in index.values())
+    assert lookup_airport(" yyz") == Airport("YYZ", "Toronto Pearson", "America/Toronto")
+    assert lookup_airport("XXX") is None
+    assert all(lookup_airport(code) == Airport(code, name, zone) for code, name, zone in AIRPORTS)
+
+
+def test_enrich_fills_names_and_timezones():
+    assert enrich_event(SLIM_EVENT) == EVENT
+    assert enrich_event(dict(EVENT, departure_timezone=["Toronto"])) == EVENT
+    assert enrich_event({"duties": ["480"]}) == {"duties": ["480"]}
+
+
+def test_unknown_airport_keeps_its_fields(caplog):
+    event = dict(EVENT, departure_airport=["XXX"], departure_airport_name=["Nowhere"], departure_timezone=["Mars"])
+    with caplog.at_level(logging.WARNING):
+        enriched = enrich_event(event)
+    assert enriched["departure_airport_name"] == ["Nowhere"]
+    assert enriched["departure_timezone"] == ["Mars"]
+    assert "XXX" in caplog.text
+
+
+def test_extra_airports_from_environment(tmp_path, monkeypatch):
+    table = tmp_path / "airports.tsv"
+    table.write_text("# extra airports\nXXX\tNowhere\tAmerica/Toronto\nLIS\tLisboa\tEurope/Lisbon\n")
+    monkeypatch.setenv("CREWCAL_AIRPORTS", str(table))
+    airports.airport_index.cache_clear()
+    try:
+        assert lookup_airport("XXX").name == "Nowhere"
+        assert lookup_airport("LIS").name == "Lisboa"
+        assert lookup_airport("YYZ").name == "Toronto Pearson"
+    finally:
+        airports.airport_index.cache_clear()
+
+
+def test_slim_extraction(monkeypatch):
+    backend = ReplayBackend([SLIM_EVENT])
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=backend, slim=True)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: ["31/10/2023 Tue 480 YYZ - LIS"])
+
+    sched.extract()
+
+    assert sched.extracted_schedule == [EVENT]
+    schema = json.dumps(sched._schedule_function())
+    assert sched._schedule_function()["name"] == "Schedule"
+    assert "departure_timezone" not in schema
+    assert "departure_airport" in schema
+    full = OpenAISchedule("roster.pdf", use_cache=False, backend=backend)
+    assert sched._schedule_cache_key("page") != full._schedule_cache_key("page")
+
+
+def unknown_airport_schedule(monkeypatch, timezone):
+    event = dict(SLIM_EVENT, destination_airport=["XXX"], list_airport_codes=["YYZ", "XXX"])
+    fixture = {
+        "functions": {"Schedule": {"events": [event]}},
+        "content": {"airports": [{"code": "XXX", "name": "Nowhere", "timezone": timezone}]},
+    }
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=ReplayBackend(fixture), slim=True)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: ["31/10/2023 Tue 480 YYZ - XXX"])
+    return sched
+
+
+def test_slim_extraction_looks_up_unknown_airports(monkeypatch):
+    sched = unknown_airport_schedule(monkeypatch, "Europe/Lisbon")
+
+    sched.extract()
+
+    [event] = sched.extracted_schedule
+    assert event["destination_airport_name"] == ["Nowhere"]
+    assert event["destination_timezone"] == ["Europe/Lisbon"]
+    assert event["departure_timezone"] == ["America/Toronto"]
+    assert sched.metrics.llm_calls == 2
+
+
+def test_slim_extraction_fails_for_airport_without_timezone(monkeypatch):
+    sched = unknown_airport_schedule(monkeypatch, "Lisbon")
+
+    with pytest.raises(UnknownAirportError, match="XXX"):
+        sched.extract()
@@ -0,0 +1,127 @@
+import copy
+
+import pytest
+
+from crewcal.backends import ReplayBackend
+from crewcal.layouts import (
+    LayoutParser,
+    parse_known_layout,
+    register_layout_parser,
+    remove_layout_parser,
+)
+from crewcal.llm_extract import OpenAISchedule
+from tests.sample_schedule import EVENTS
+
+ROSTER = (
+    "Sample Roster Report\n31/10/2023 Tue 480 YYZ - LIS\n03/11/2023 Fri 481 LIS - YYZ\n"
+)
+
+
+class SampleLayout(LayoutParser):
+    """Reads the sample events from any schedule with the sample report title."""
+
+    name = "sample"
+
+    def __init__(self, events=EVENTS):
+        self.events = events
+
+    def detect(self, text):
+        return text.startswith("Sample Roster Report")
+
+    def parse(self, text):
+        if "481" not in text:
+            msg = "Missing duty."
+            raise ValueError(msg)
+        return copy.deepcopy(self.events)
+
+
+@pytest.fixture
+def sample_layout():
+    parser = SampleLayout()
+    register_layout_parser(parser)
+    yield parser
+    remove_layout_parser(parser)
+
+
+def test_no_parsers_are_built_in():
+    assert parse_known_layout(ROSTER) is None
+
+
+def test_registered_parser_reads_schedule(sample_layout):
+    assert parse_known_layout(ROSTER) == ("sample", EVENTS)
+
+
+def test_removed_parser_is_not_used(sample_layout):
+    remove_layout_parser(sample_layout)
+    assert parse_known_layout(ROSTER) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Other Roster Report\n31/10/2023 Tue 480 YYZ - LIS\n",
+        ROSTER.replace("481", "482"),
+    ],
+)
+def test_unknown_layouts_fall_back(sample_layout, text):
+    assert parse_known_layout(text) is None
+
+
+@pytest.mark.parametrize(
+    "events",
+    [
+        [],
+        [{key: value for key, value in EVENTS[0].items() if key != "summary"}],
+        [{**EVENTS[0], "destination_airport": ["ZZZ"], "destination_timezone": []}],
+    ],
+)
+def test_invalid_events_fall_back(events):
+    parser = SampleLayout(events)
+    register_layout_parser(parser)
+    try:
+        assert parse_known_layout(ROSTER) is None
+    finally:
+        remove_layout_parser(parser)
+
+
+def test_registered_parser_comes_first(sample_layout):
+    class OneDuty(LayoutParser):
+        name = "one-duty"
+
+        def detect(self, text):
+            return "480" in text
+
+        def parse(self, text):
+            return [EVENTS[0]]
+
+    parser = OneDuty()
+    register_layout_parser(parser)
+    try:
+        assert parse_known_layout(ROSTER) == ("one-duty", [EVENTS[0]])
+    finally:
+        remove_layout_parser(parser)
+    assert parse_known_layout(ROSTER)[0] == "sample"
+
+
+def test_extraction_reports_path(monkeypatch, sample_layout):
+    backend = ReplayBackend([EVENTS[1]])
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=backend, layouts=True)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: [ROSTER])
+    sched.extract()
+    assert sched.extracted_schedule == EVENTS
+    assert (sched.metrics.layout, sched.metrics.llm_calls) == ("sample", 0)
+
+    fallback = OpenAISchedule("roster.pdf", use_cache=False, backend=backend)
+    monkeypatch.setattr(fallback, "read_schedule_pages", lambda _: [ROSTER])
+    fallback.extract()
+    assert fallback.extracted_schedule == [EVENTS[1]]
+    assert (fallback.metrics.layout, fallback.metrics.llm_calls) == ("", 1)
+
+
+def test_layout_parser_is_abstract():
+    class DetectOnly(LayoutParser):
+        def detect(self, text):
+            return True
+
+    with pytest.raises(TypeError, match="parse"):
+        DetectOnly()
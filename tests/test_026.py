@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import httpx
+import openai
+from click.testing import CliRunner
+from langchain.schema.runnable import RunnableLambda
+
+from crewcal.backends import ReplayBackend
+from crewcal.cli import cli
+from crewcal.diff import parse_icalendar_events
+from crewcal.llm_extract import OpenAISchedule
+from crewcal.resilience import RetryPolicy
+from tests.pdf_factory import make_pdf
+from tests.sample_schedule import EVENTS
+
+INVALID = {"starting_date": "2023-11-03", "duties": ["481"]}
+PAGES = ["31/10/2023 Tue 480 YYZ - LIS\n03/11/2023 Fri 481 LIS - YYZ\n"]
+
+
+def make_schedule(monkeypatch, events=EVENTS, **kwargs):
+    backend = ReplayBackend(events)
+    sched = OpenAISchedule("roster.pdf", use_cache=False, backend=backend, **kwargs)
+    monkeypatch.setattr(sched, "read_schedule_pages", lambda _: PAGES)
+    return sched
+
+
+def test_events_are_yielded_while_streaming(monkeypatch):
+    sched = make_schedule(monkeypatch)
+    text = json.dumps({"events": EVENTS})
+    sent = []
+
+    def arguments(document):
+        for start in range(0, len(text), 10):
+            sent.append(start)
+            yield text[start : start + 10]
+
+    monkeypatch.setattr(sched, "_stream_arguments", arguments)
+    stream = sched.stream_events()
+
+    assert next(stream) == EVENTS[0]
+    assert len(sent) <= len(json.dumps(EVENTS[0])) / 10 + 3
+    assert list(stream) == [EVENTS[1]]
+    assert sched.extracted_schedule == EVENTS
+    assert sched.metrics.llm_calls == 1
+    assert sched.metrics.first_event_seconds > 0
+
+
+def test_replay_backend_streams_in_pieces(monkeypatch):
+    sched = make_schedule(monkeypatch)
+    chunks = list(sched._stream_chain().stream({"input": PAGES[0]}))
+    assert len(chunks) > 10
+    assert chunks[0].additional_kwargs["function_call"]["name"] == "Schedule"
+
+    assert list(sched.stream_events()) == EVENTS
+
+
+def test_truncated_stream_keeps_complete_events(monkeypatch):
+    sched = make_schedule(monkeypatch)
+    text = json.dumps({"events": EVENTS})
+    monkeypatch.setattr(sched, "_stream_arguments", lambda document: iter([text[:-60]]))
+
+    assert list(sched.stream_events()) == [EVENTS[0]]
+    assert sched.extracted_schedule == [EVENTS[0]]
+
+
+def test_invalid_events_are_repaired_after_the_stream(monkeypatch):
+    sched = make_schedule(monkeypatch, events=[EVENTS[0], INVALID])
+    monkeypatch.setattr(sched, "_repair_chain", lambda: RunnableLambda(lambda inputs: [EVENTS[1]]))
+
+    assert list(sched.stream_events()) == EVENTS
+    assert sched.extracted_schedule == EVENTS
+
+
+def test_failed_request_is_retried_before_first_event(monkeypatch):
+    sched = make_schedule(monkeypatch, retry_policy=RetryPolicy(backoff_seconds=0.0))
+    stream_arguments = sched._stream_arguments
+    attempts = []
+
+    def flaky(document):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise openai.APITimeoutError(httpx.Request("POST", "https://api.openai.com"))
+        return stream_arguments(document)
+
+    monkeypatch.setattr(sched, "_stream_arguments", flaky)
+
+    assert list(sched.stream_events()) == EVENTS
+    assert (sched.metrics.llm_calls, sched.metrics.retries) == (2, 1)
+
+
+def test_async_stream(monkeypatch):
+    sched = make_schedule(monkeypatch)
+
+    async def collect():
+        return [event async for event in sched.astream_events()]
+
+    assert asyncio.run(collect()) == EVENTS
+    assert sched.extracted_schedule == EVENTS
+
+
+def test_cli_stream_to_icalendar(tmp_path):
+    fixture = tmp_path / "fixture.json"
+    fixture.write_text(json.dumps(EVENTS))
+    pdf = make_pdf(tmp_path / "roster.pdf", PAGES)
+    target = tmp_path / "roster.ics"
+
+    result = CliRunner().invoke(
+        cli,
+        ["--backend", "replay", "--replay-fixture", str(fixture), "extract", "--stream", "--no-cache", str(pdf), str(target)],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert len(parse_icalendar_events(target.read_text())) == 2
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == ".tmp"] == []